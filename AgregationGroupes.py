@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+
+# Clés de regroupement des documents
+CLES = ('type', 'auteur', 'annee')
+
+# Mesures de comparaison de deux groupes
+MESURES = ('diff', 'ratio', 'log_vraisemblance', 'chi2')
+
+
+def groupes_documents(corpus, doc_ids, par):
+    """
+    Groupe de chaque ligne d'une matrice Documents x Termes (ordre doc_ids),
+    lu dans les colonnes du DocumentStore du corpus.
+    Retourne (codes, libellés) : codes[ligne] indexe libellés, -1 pour un
+    document qui n'est plus dans le corpus.
+    """
+    if par not in CLES:
+        raise ValueError(f"Clé de regroupement inconnue : {par} (attendu : {', '.join(CLES)})")
+    store = corpus.store
+    positions = np.array([store.positions.get(doc_id, -1) for doc_id in doc_ids], dtype=np.int64)
+    vivantes = positions >= 0
+
+    if par == 'annee':
+        dates = store.tableau_dates()[positions[vivantes]]
+        valeurs = dates.astype('datetime64[us]').astype('datetime64[Y]').astype(np.int64) + 1970
+    else:
+        colonne = store.types if par == 'type' else store.auteurs
+        valeurs = np.array(colonne, dtype=np.int64)[positions[vivantes]]
+
+    # Seuls les groupes présents gardent une ligne, dans l'ordre de leur valeur
+    presentes, codes_vivants = np.unique(valeurs, return_inverse=True)
+    if par == 'annee':
+        libelles = [int(annee) for annee in presentes]
+    else:
+        table = store.table_types if par == 'type' else store.table_auteurs
+        libelles = [table.valeurs[code] for code in presentes]
+
+    codes = np.full(len(doc_ids), -1, dtype=np.int64)
+    codes[vivantes] = codes_vivants
+    return codes, libelles
+
+
+class AgregationGroupes:
+    """
+    Matrice Groupes x Termes : somme des lignes TF des documents de chaque
+    groupe (type, auteur ou année), obtenue par un seul produit creux entre
+    la matrice indicatrice Groupes x Documents et la matrice TF.
+        - matrice : comptes entiers (csr), une ligne par groupe
+        - groupes : libellé de chaque ligne ; totaux : nombre de mots par groupe
+        - nb_documents : nombre de documents par groupe
+    """
+
+    def __init__(self, corpus, doc_ids, mat_TF, par='type'):
+        self.par = par
+        self.generation = corpus.generation
+        codes, self.groupes = groupes_documents(corpus, doc_ids, par)
+
+        lignes = np.flatnonzero(codes >= 0)
+        indicatrice = csr_matrix(
+            (np.ones(len(lignes), dtype=np.float64), (codes[lignes], lignes)),
+            shape=(len(self.groupes), len(doc_ids))
+        )
+        # Produit en float64 : les comptes restent exacts avant l'arrondi
+        matrice = (indicatrice @ mat_TF.astype(np.float64)).tocsr()
+        matrice.data = np.rint(matrice.data)
+        self.matrice = matrice.astype(np.int64)
+        self.totaux = np.asarray(self.matrice.sum(axis=1), dtype=np.int64).ravel()
+        self.nb_documents = np.bincount(codes[lignes], minlength=len(self.groupes)).astype(np.int64)
+
+    def _ligne(self, groupe):
+        """Numéro de ligne d'un libellé (casse ignorée pour les types)."""
+        for i, libelle in enumerate(self.groupes):
+            if libelle == groupe or (self.par == 'type' and str(libelle).lower() == str(groupe).lower()):
+                return i
+        if self.par == 'annee' and str(groupe).isdigit():
+            return self._ligne(int(groupe))
+        return None
+
+    def vecteur(self, groupes):
+        """
+        Comptes (tableau dense, un par terme) d'un groupe ou de la réunion de
+        plusieurs groupes. Un groupe inconnu ne compte pour rien.
+        """
+        if isinstance(groupes, (str, int, np.integer)):
+            groupes = [groupes]
+        lignes = [ligne for ligne in (self._ligne(g) for g in groupes) if ligne is not None]
+        if not lignes:
+            return np.zeros(self.matrice.shape[1], dtype=np.int64)
+        return np.asarray(self.matrice[lignes].sum(axis=0), dtype=np.int64).ravel()
+
+    def tableau(self):
+        """DataFrame Groupes x (nb_documents, nb_mots)."""
+        return pd.DataFrame({'nb_documents': self.nb_documents, 'nb_mots': self.totaux},
+                            index=pd.Index(self.groupes, name=self.par))
+
+
+def mesures_comparaison(tf1, tf2):
+    """
+    Mesures (tableaux, une valeur par terme) qui opposent les comptes de deux
+    groupes :
+        - diff : tf1 - tf2
+        - ratio : (tf1 + 1) / (tf2 + 1), lissé pour éviter la division par zéro
+        - log_vraisemblance : G² de Dunning sur la table 2x2 (terme / autres
+          mots, groupe 1 / groupe 2)
+        - chi2 : chi² de Pearson sur la même table
+    G² et chi² sont signés : positifs quand le terme est plus fréquent
+    (relativement à la taille du groupe) dans le groupe 1.
+    """
+    a = tf1.astype(np.float64)
+    b = tf2.astype(np.float64)
+    n1, n2 = a.sum(), b.sum()
+    total = n1 + n2
+    mesures = {'diff': tf1.astype(np.int64) - tf2.astype(np.int64), 'ratio': (a + 1) / (b + 1)}
+    if n1 == 0 or n2 == 0:
+        mesures['log_vraisemblance'] = np.zeros(len(a))
+        mesures['chi2'] = np.zeros(len(a))
+        return mesures
+
+    signe = np.sign(a / n1 - b / n2)
+    part = (a + b) / total
+    # Cases de la table : (observé, attendu) pour le terme puis pour les autres mots
+    cases = [(a, n1 * part), (b, n2 * part), (n1 - a, n1 * (1 - part)), (n2 - b, n2 * (1 - part))]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 0 * log(0) = 0
+        g2 = sum(np.where(observe > 0, observe * np.log(observe / attendu), 0.0) for observe, attendu in cases)
+        mesures['log_vraisemblance'] = signe * 2 * g2
+
+        denominateur = (a + b) * (total - a - b) * n1 * n2
+        chi2 = total * (a * (n2 - b) - b * (n1 - a)) ** 2 / denominateur
+        mesures['chi2'] = signe * np.where(denominateur > 0, chi2, 0.0)
+    return mesures
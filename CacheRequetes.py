@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class CacheRequetes:
+    """
+    Cache LRU (avec durée de vie optionnelle) des résultats de recherche.
+
+    - clé : multiensemble des mots nettoyés de la requête (« Paris, paris ! »
+      et « paris paris » partagent la même entrée, l'ordre des mots ne compte pas)
+    - chaque entrée garde au moins profondeur résultats classés : une requête
+      avec un nb_docs plus petit est servie par la même entrée
+    - chaque entrée est datée par la génération de l'index ; une entrée d'une
+      autre génération est périmée (le corpus ou l'index a changé)
+
+    Les compteurs nb_succes, nb_echecs, nb_evictions et nb_invalidations sont
+    exposés tels quels et résumés par statistiques().
+    """
+
+    def __init__(self, taille_max=1000, duree_vie=None, profondeur=50):
+        if taille_max <= 0:
+            raise ValueError("taille_max doit être strictement positif")
+        if duree_vie is not None and duree_vie <= 0:
+            raise ValueError("duree_vie doit être strictement positive (ou None)")
+
+        self.taille_max = taille_max
+        self.duree_vie = duree_vie      # en secondes, None : pas d'expiration
+        self.profondeur = profondeur    # nombre minimal de résultats gardés par entrée
+        self._entrees = OrderedDict()   # clé -> (génération, date, résultats, complet)
+        self._verrou = threading.Lock()
+
+        self.nb_succes = 0
+        self.nb_echecs = 0
+        self.nb_evictions = 0        # entrées retirées car le cache était plein
+        self.nb_invalidations = 0    # entrées périmées (génération ou durée de vie)
+
+    @staticmethod
+    def cle(mots):
+        """Clé d'une requête à partir de ses mots nettoyés."""
+        return tuple(sorted(Counter(mots).items()))
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def obtenir(self, cle, generation, nb_docs):
+        """
+        Les nb_docs premiers résultats en cache pour cette clé, ou None si
+        l'entrée manque, est périmée ou ne contient pas assez de résultats.
+        """
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                generation_entree, date, resultats, complet = entree
+                perimee = generation_entree != generation or (
+                    self.duree_vie is not None and time.monotonic() - date > self.duree_vie
+                )
+                if perimee:
+                    del self._entrees[cle]
+                    self.nb_invalidations += 1
+                elif complet or len(resultats) >= nb_docs:
+                    self._entrees.move_to_end(cle)
+                    self.nb_succes += 1
+                    return resultats.head(nb_docs).reset_index(drop=True)
+            self.nb_echecs += 1
+            return None
+
+    def ranger(self, cle, generation, resultats, profondeur):
+        """
+        Range les résultats calculés pour profondeur documents. S'il y en a
+        moins que profondeur, l'entrée est complète et sert tout nb_docs.
+        """
+        with self._verrou:
+            complet = len(resultats) < profondeur
+            self._entrees[cle] = (generation, time.monotonic(), resultats.copy(), complet)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.nb_evictions += 1
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+
+    def statistiques(self):
+        total = self.nb_succes + self.nb_echecs
+        return {
+            'entrees': len(self._entrees),
+            'succes': self.nb_succes,
+            'echecs': self.nb_echecs,
+            'evictions': self.nb_evictions,
+            'invalidations': self.nb_invalidations,
+            'taux_succes': self.nb_succes / total if total else 0.0
+        }
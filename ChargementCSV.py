@@ -0,0 +1,152 @@
+from datetime import datetime
+
+import pandas as pd
+
+from DocumentFactory import DocumentFactory
+
+
+# Noms de colonnes acceptés pour chaque champ, dans l'ordre de préférence
+COLONNES = {
+    'titre': ('Titre', 'titre'),
+    'auteur': ('Auteur', 'auteur'),
+    'date': ('Date', 'date'),
+    'url': ('URL', 'url'),
+    'texte': ('text', 'texte'),
+    'id': ('id', 'ID'),
+}
+
+# Formats essayés sur toute une colonne (les mêmes que Document.convertir_date)
+FORMATS_DATE = ("%Y-%m-%d", "%B %d, %Y", "%d/%m/%Y", "%Y/%m/%d")
+
+
+def resoudre_colonnes(colonnes_csv, colonnes_type=('type', 'Type')):
+    """
+    Résout une seule fois la correspondance champ -> colonne du CSV
+    (None si aucune colonne candidate n'existe).
+    """
+    presentes = set(colonnes_csv)
+    candidats = dict(COLONNES, type=tuple(colonnes_type))
+    return {
+        champ: next((nom for nom in noms if nom in presentes), None)
+        for champ, noms in candidats.items()
+    }
+
+
+class ConvertisseurDates:
+    """
+    Conversion d'une colonne de dates en une fois. Le dernier format reconnu
+    est mémorisé et essayé en premier sur le lot suivant ; les valeurs qui ne
+    correspondent à aucun format passent par dateutil (une fois par valeur
+    distincte), puis, en dernier recours, prennent la date actuelle comme
+    Document.convertir_date.
+    """
+
+    def __init__(self):
+        self.format_detecte = None
+        self._dateutil = {}  # valeur -> datetime pour les formats libres
+
+    def convertir(self, serie):
+        """Retourne la liste des datetime correspondant à la colonne serie."""
+        textes = serie.astype('string').str.strip().reset_index(drop=True)
+        dates = pd.Series(pd.NaT, index=textes.index, dtype='datetime64[ns]')
+        a_convertir = textes.notna() & (textes != '')
+
+        formats = list(FORMATS_DATE)
+        if self.format_detecte is not None:
+            formats.remove(self.format_detecte)
+            formats.insert(0, self.format_detecte)
+
+        premier_succes = True
+        for fmt in formats:
+            restantes = a_convertir & dates.isna()
+            if not restantes.any():
+                break
+            converties = pd.to_datetime(textes[restantes], format=fmt, errors='coerce').dropna()
+            if len(converties) > 0:
+                dates[converties.index] = converties
+                if premier_succes:
+                    self.format_detecte = fmt
+                    premier_succes = False
+
+        resultat = []
+        maintenant = None
+        invalides = 0
+        for valeur, date in zip(textes.tolist(), dates.tolist()):
+            if not pd.isna(date):
+                resultat.append(date.to_pydatetime())
+                continue
+            date = None
+            if not pd.isna(valeur) and valeur != '':
+                date = self._convertir_libre(valeur)
+                invalides += date is None
+            if date is None:
+                if maintenant is None:
+                    maintenant = datetime.now()
+                date = maintenant
+            resultat.append(date)
+
+        if invalides:
+            print(f"{invalides} date(s) au format invalide. Utilisation de la date actuelle.")
+        return resultat
+
+    def _convertir_libre(self, valeur):
+        if valeur not in self._dateutil:
+            try:
+                from dateutil import parser
+                self._dateutil[valeur] = parser.parse(valeur)
+            except Exception:
+                self._dateutil[valeur] = None
+        return self._dateutil[valeur]
+
+
+def lire_documents_csv(chemin, sep=',', taille_lot=10000, colonnes_type=('type', 'Type'),
+                       valeurs_par_defaut=None, longueur_min=0, premier_id=0):
+    """
+    Lit un CSV par morceaux de taille_lot lignes (mémoire bornée) et produit,
+    pour chaque morceau, la liste des (doc_id, document) construits.
+
+    - colonnes_type : colonnes candidates pour le type (Reddit / Arxiv / Document)
+    - valeurs_par_defaut : valeur d'un champ quand sa colonne est absente
+    - longueur_min : les documents au texte plus court sont ignorés
+    - premier_id : doc_id du premier document quand le CSV n'a pas de colonne id
+    """
+    defauts = {'titre': '', 'auteur': '', 'date': '', 'url': '', 'texte': '', 'type': 'Document'}
+    defauts.update(valeurs_par_defaut or {})
+
+    convertisseur = ConvertisseurDates()
+    colonnes = None
+    prochain_id = premier_id
+
+    for morceau in pd.read_csv(chemin, sep=sep, chunksize=taille_lot):
+        if colonnes is None:
+            colonnes = resoudre_colonnes(morceau.columns, colonnes_type)
+
+        def colonne(champ):
+            nom = colonnes[champ]
+            if nom is None:
+                return [defauts[champ]] * len(morceau)
+            return morceau[nom].tolist()
+
+        textes = colonne('texte')
+        gardes = [i for i, texte in enumerate(textes) if len(str(texte)) >= longueur_min]
+        if len(gardes) < len(morceau):
+            morceau = morceau.iloc[gardes]
+            textes = [textes[i] for i in gardes]
+
+        if colonnes['date'] is not None:
+            dates = convertisseur.convertir(morceau[colonnes['date']])
+        else:
+            dates = convertisseur.convertir(pd.Series([defauts['date']] * len(morceau), dtype=object))
+
+        if colonnes['id'] is not None:
+            doc_ids = morceau[colonnes['id']].tolist()
+        else:
+            doc_ids = list(range(prochain_id, prochain_id + len(morceau)))
+        prochain_id += len(morceau)
+
+        lot = []
+        for doc_id, type_doc, titre, auteur, date, url, texte in zip(
+                doc_ids, colonne('type'), colonne('titre'), colonne('auteur'),
+                dates, colonne('url'), textes):
+            lot.append((doc_id, DocumentFactory.create(type_doc, titre, auteur, date, url, texte)))
+        yield lot
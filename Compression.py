@@ -0,0 +1,162 @@
+import numpy as np
+
+
+def encoder_varbyte(valeurs):
+    """
+    Encodage « variable byte » d'entiers positifs, vectorisé : 7 bits utiles
+    par octet (poids faibles d'abord), bit de poids fort à 1 sur le dernier
+    octet de chaque valeur.
+    Retourne (octets, nombre d'octets de chaque valeur).
+    """
+    valeurs = np.asarray(valeurs, dtype=np.uint64)
+    nb_octets = np.ones(len(valeurs), dtype=np.int64)
+    reste = valeurs >> np.uint64(7)
+    while reste.any():
+        nb_octets += reste > 0
+        reste >>= np.uint64(7)
+
+    debuts = np.cumsum(nb_octets) - nb_octets
+    valeur_de_octet = np.repeat(np.arange(len(valeurs)), nb_octets)
+    rang = np.arange(int(nb_octets.sum())) - np.repeat(debuts, nb_octets)
+    octets = ((valeurs[valeur_de_octet] >> (np.uint64(7) * rang.astype(np.uint64))) & np.uint64(0x7F)).astype(np.uint8)
+    octets[rang == nb_octets[valeur_de_octet] - 1] |= 0x80
+    return octets, nb_octets
+
+
+def decoder_varbyte(octets):
+    """Inverse de encoder_varbyte : tableau uint8 -> valeurs (uint64)."""
+    octets = np.asarray(octets, dtype=np.uint8)
+    if len(octets) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    fins = np.flatnonzero(octets & 0x80)
+    if len(fins) == len(octets):
+        # Cas courant des petits écarts : un octet par valeur
+        return (octets & 0x7F).astype(np.uint64)
+    debuts = np.empty(len(fins), dtype=np.int64)
+    debuts[0] = 0
+    debuts[1:] = fins[:-1] + 1
+    rang = np.arange(len(octets)) - np.repeat(debuts, fins - debuts + 1)
+    morceaux = (octets & 0x7F).astype(np.uint64) << (np.uint64(7) * rang.astype(np.uint64))
+    return np.bitwise_or.reduceat(morceaux, debuts)
+
+
+class PostingsCompresses:
+    """
+    Listes triées d'entiers (une par terme) compressées par blocs :
+        - chaque bloc de taille_bloc valeurs stocke la première valeur telle
+          quelle puis les écarts, encodés en variable byte
+        - table de sauts : dernière valeur et début (en octets) de chaque bloc
+
+    Un bloc se décode indépendamment des autres : une intersection consulte
+    la table de sauts et ne décompresse que les blocs qui peuvent contenir
+    un candidat.
+    """
+
+    def __init__(self, octets, bloc_debut, bloc_dernier, bloc_taille, premier_bloc, comptes):
+        self.octets = octets
+        self.bloc_debut = bloc_debut      # nb_blocs + 1 positions dans octets
+        self.bloc_dernier = bloc_dernier  # plus grande valeur de chaque bloc
+        self.bloc_taille = bloc_taille    # nombre de valeurs de chaque bloc
+        self.premier_bloc = premier_bloc  # terme -> premier bloc (nb_termes + 1)
+        self.comptes = comptes            # terme -> nombre de valeurs
+
+    @classmethod
+    def depuis_tableaux(cls, termes, valeurs, nb_termes, taille_bloc=128):
+        """
+        termes : ids de terme triés ; valeurs : entiers strictement croissants
+        au sein de chaque terme.
+        """
+        termes = np.asarray(termes, dtype=np.int64)
+        valeurs = np.asarray(valeurs, dtype=np.int64)
+        comptes = np.bincount(termes, minlength=nb_termes).astype(np.int64)
+
+        debut_terme = np.cumsum(comptes) - comptes
+        rang = np.arange(len(valeurs)) - debut_terme[termes]
+        premier_bloc = np.zeros(nb_termes + 1, dtype=np.int64)
+        premier_bloc[1:] = np.cumsum((comptes + taille_bloc - 1) // taille_bloc)
+        nb_blocs = int(premier_bloc[-1])
+        bloc = premier_bloc[termes] + rang // taille_bloc
+
+        ecarts = np.diff(valeurs, prepend=0)
+        debut_de_bloc = rang % taille_bloc == 0
+        ecarts[debut_de_bloc] = valeurs[debut_de_bloc]
+        octets, nb_octets = encoder_varbyte(ecarts)
+
+        bloc_debut = np.zeros(nb_blocs + 1, dtype=np.int64)
+        bloc_debut[1:] = np.cumsum(np.bincount(bloc, weights=nb_octets, minlength=nb_blocs).astype(np.int64))
+        fins = np.flatnonzero(np.r_[bloc[1:] != bloc[:-1], True]) if len(bloc) else np.zeros(0, dtype=np.int64)
+        bloc_dernier = valeurs[fins]
+        bloc_taille = np.bincount(bloc, minlength=nb_blocs).astype(np.int64)
+        return cls(octets, bloc_debut, bloc_dernier, bloc_taille, premier_bloc, comptes)
+
+    def nb_termes(self):
+        return len(self.comptes)
+
+    def taille(self, terme_id):
+        return int(self.comptes[terme_id])
+
+    def taille_octets(self):
+        return int(self.octets.nbytes + self.bloc_debut.nbytes + self.bloc_dernier.nbytes
+                   + self.bloc_taille.nbytes + self.premier_bloc.nbytes + self.comptes.nbytes)
+
+    def _decoder_blocs(self, blocs):
+        """Valeurs des blocs donnés (triés), mises bout à bout."""
+        if len(blocs) == 0:
+            return np.zeros(0, dtype=np.int64)
+        debuts = self.bloc_debut[blocs]
+        longueurs = self.bloc_debut[blocs + 1] - debuts
+        decalages = np.repeat(debuts - (np.cumsum(longueurs) - longueurs), longueurs)
+        ecarts = decoder_varbyte(self.octets[decalages + np.arange(int(longueurs.sum()))]).astype(np.int64)
+
+        # Somme cumulée qui repart de zéro au début de chaque bloc
+        tailles = self.bloc_taille[blocs]
+        cumul = np.cumsum(ecarts)
+        premiers = np.cumsum(tailles) - tailles
+        return cumul - np.repeat(cumul[premiers] - ecarts[premiers], tailles)
+
+    def bloc(self, numero):
+        """
+        Valeurs d'un seul bloc, décompressées en liste Python : pour une
+        centaine d'octets, une boucle simple coûte moins que les appels numpy
+        de decoder_varbyte.
+        """
+        valeurs = []
+        valeur = ecart = decalage = 0
+        for octet in self.octets[self.bloc_debut[numero]:self.bloc_debut[numero + 1]].tobytes():
+            if octet & 0x80:
+                valeur += ecart | ((octet & 0x7F) << decalage)
+                valeurs.append(valeur)
+                ecart = decalage = 0
+            else:
+                ecart |= octet << decalage
+                decalage += 7
+        return valeurs
+
+    def blocs(self, numeros):
+        """Valeurs des blocs donnés (triés), décompressées et mises bout à bout."""
+        return self._decoder_blocs(np.asarray(numeros, dtype=np.int64))
+
+    def toutes(self):
+        """Toutes les listes décompressées, mises bout à bout dans l'ordre des termes."""
+        return self._decoder_blocs(np.arange(len(self.bloc_taille)))
+
+    def liste(self, terme_id):
+        """Toute la liste d'un terme, décompressée."""
+        if terme_id is None or not 0 <= terme_id < len(self.comptes):
+            return np.zeros(0, dtype=np.int64)
+        return self._decoder_blocs(np.arange(self.premier_bloc[terme_id], self.premier_bloc[terme_id + 1]))
+
+    def intersecter(self, terme_id, candidats):
+        """
+        Candidats (triés) présents dans la liste du terme. La table de sauts
+        donne, pour chaque candidat, le seul bloc qui peut le contenir ; seuls
+        ces blocs sont décompressés.
+        """
+        candidats = np.asarray(candidats, dtype=np.int64)
+        if terme_id is None or not 0 <= terme_id < len(self.comptes) or len(candidats) == 0:
+            return np.zeros(0, dtype=np.int64)
+        premier, dernier = self.premier_bloc[terme_id], self.premier_bloc[terme_id + 1]
+        blocs = premier + np.searchsorted(self.bloc_dernier[premier:dernier], candidats, side='left')
+        dans_liste = blocs < dernier
+        valeurs = self._decoder_blocs(np.unique(blocs[dans_liste]))
+        return candidats[dans_liste][np.isin(candidats[dans_liste], valeurs, assume_unique=True)]
@@ -1,48 +1,179 @@
 import pandas as pd
+import numpy as np
 import pickle
 import json
+import hashlib
 import re
+import weakref
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 from Document import Document, RedditDocument, ArxivDocument
-from Author import Author
+from DocumentStore import DocumentStore
+from ChargementCSV import lire_documents_csv
+from IndexNgrammes import IndexTrigrammes
+from IndexPositionnel import IndexPositionnel
+from Instrumentation import INACTIVE
+
+
+# Découpage en mots d'un texte déjà nettoyé
+MOT = re.compile(r'\b\w+\b')
+# Mot-clé réduit à un seul mot (concordance servie par l'index positionnel)
+MOT_ENTIER = re.compile(r'\w+')
+
+
+def nettoyer(text):
+    """Mise en minuscule, passages à la ligne, ponctuation et espaces multiples retirés."""
+    if not isinstance(text, str):
+        text = str(text)
+    text = text.lower()
+    text = re.sub(r'\n', ' ', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def _analyser_textes(textes):
+    """
+    Tokenisation d'un lot de textes dans un processus de travail.
+    Retourne le vocabulaire local (ordre de première apparition), le nombre de
+    mots de chaque texte et les ids locaux de tous les mots, bout à bout.
+    """
+    termes = {}
+    longueurs = []
+    ids = []
+    for texte in textes:
+        mots = MOT.findall(nettoyer(texte))
+        longueurs.append(len(mots))
+        for mot in mots:
+            ids.append(termes.setdefault(mot, len(termes)))
+    return list(termes), np.array(longueurs, dtype=np.int64), np.array(ids, dtype=np.int32)
 
 
 class Corpus:
     def __init__(self, nom: str):
         self.nom = nom
-        self.authors = {}      
-        self.id2doc = {}       #id: Document, RedditDocument, ArxivDocument
+        # Stockage en colonnes ; id2doc et authors en sont des vues
+        self.store = DocumentStore()
+        self.store.corpus = self
+        self.authors = self.store.vue_auteurs       # nom: Author
+        self.id2doc = self.store.documents          #id: Document, RedditDocument, ArxivDocument
         self.ndoc = 0
         self.naut = 0
 
+        # Cache d'analyse : chaque document est tokenisé une seule fois
+        self._termes = {}        # mot -> id du terme (dictionnaire partagé)
+        self._liste_termes = []  # id du terme -> mot
+        self._tokens = {}        # doc_id -> tableau numpy des ids de ses mots
+
+        # Index tenus à jour à chaque ajout / suppression de document
+        self.generation = 0      # incrémenté à chaque modification du corpus
+        self._abonnes = weakref.WeakSet()
+        self._index_trigrammes = None  # pour search(), construit au premier appel
+        self._index_positionnel = None  # pour concorde(), construit au premier appel
+        self.instrumentation = INACTIVE  # chronomètres de load / concorde / stats
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_abonnes', None)  # les index abonnés ne sont pas sauvegardés
+        state.pop('_index_trigrammes', None)
+        state.pop('_index_positionnel', None)
+        state.pop('_texte_complet', None)
+        state.pop('instrumentation', None)  # sorties (loggers, verrous) non sauvegardées
+        return state
+
+    def __setstate__(self, state):
+        # Les corpus picklés avant le cache d'analyse n'ont pas ces attributs
+        state.setdefault('_termes', {})
+        state.setdefault('_liste_termes', [])
+        state.setdefault('_tokens', {})
+        state.setdefault('generation', 0)
+        self.__dict__.update(state)
+        self._abonnes = weakref.WeakSet()
+        self._index_trigrammes = None
+        self._index_positionnel = None
+        self.instrumentation = INACTIVE
+
+        # Corpus picklés avant le stockage en colonnes : id2doc était un dict
+        if 'store' not in state:
+            documents = self.id2doc
+            self.store = DocumentStore()
+            self.authors = self.store.vue_auteurs
+            self.id2doc = self.store.documents
+            for doc_id, document in documents.items():
+                self.id2doc[doc_id] = document
+        self.store.corpus = self
+
+    def abonner(self, index):
+        """
+        Abonne un index aux modifications du corpus. L'index doit fournir
+        document_ajoute(doc_id) et document_supprime(doc_id) ; ce dernier est
+        appelé avant le retrait, quand l'ancienne version est encore lisible.
+        Un index qui repère les documents par position dans le store fournit
+        aussi positions_renumerotees(renumerotation), appelé par compacter().
+        """
+        self._abonnes.add(index)
+
+    def desabonner(self, index):
+        self._abonnes.discard(index)
+
     def add_document(self, doc_id, titre, auteur, date, url, texte):
 
         date_obj = datetime.strptime(date, "%Y-%m-%d")
 
         document = Document(titre, auteur, date_obj, url, texte)
-        self.id2doc[doc_id] = document
-        self.ndoc += 1
-
-        # On gère les auteur
-        if auteur not in self.authors:
-            self.authors[auteur] = Author(auteur)
-            self.naut += 1
-
-        self.authors[auteur].add(doc_id, document)
+        self.add_document_obj(doc_id, document)
 
     def add_document_obj(self, doc_id, document):
         #Ajoute un objet déjà créé (RedditDocument, ArxivDocument, Document)
+        if doc_id in self.id2doc:
+            # Remplacement : l'ancienne version est retirée des auteurs et des index
+            self._retirer_document(doc_id)
+
+        # Le store range le document en colonnes et met à jour les auteurs
         self.id2doc[doc_id] = document
         self.ndoc = len(self.id2doc)
-
-        auteur = document.auteur
-
-        if auteur not in self.authors:
-            self.authors[auteur] = Author(auteur)
-            self.naut = len(self.authors)
-
-        self.authors[auteur].add(doc_id, document)
+        self.naut = len(self.authors)
+
+        self.generation += 1
+        for index in list(self._abonnes):
+            index.document_ajoute(doc_id)
+        if self.store.a_compacter():
+            self.compacter()
+
+    def supprimer_document(self, doc_id):
+        """Retire un document du corpus et des index abonnés."""
+        self._retirer_document(doc_id)
+        del self.id2doc[doc_id]
+        self.ndoc = len(self.id2doc)
+        self.naut = len(self.authors)
+        self.generation += 1
+        if self.store.a_compacter():
+            self.compacter()
+
+    def compacter(self):
+        """
+        Compacte le stockage (voir DocumentStore.compacter), fait
+        automatiquement quand les documents supprimés ou les textes remplacés
+        occupent plus de place que les vivants : la mémoire reste bornée même
+        avec beaucoup d'ajouts et de suppressions. Les index abonnés repérés
+        par position sont renumérotés.
+        """
+        renumerotation = self.store.compacter()
+        for index in list(self._abonnes):
+            renumeroter = getattr(index, 'positions_renumerotees', None)
+            if renumeroter is not None:
+                renumeroter(renumerotation)
+        self.generation += 1
+
+    def _retirer_document(self, doc_id):
+        # Les abonnés sont prévenus tant que l'ancienne version est lisible
+        for index in list(self._abonnes):
+            index.document_supprime(doc_id)
+
+        self._tokens.pop(doc_id, None)  # le texte a pu changer
 
 
     def afficher_tri_date(self, n=5):
@@ -123,48 +254,53 @@ class Corpus:
 
 
     @classmethod
-    def load(cls, filename, format_type='csv'):
+    def load(cls, filename, format_type='csv', taille_lot=10000, instrumentation=None):
+        # instrumentation : Instrumentation optionnelle, gardée par le corpus chargé
         if format_type == 'csv':
-            df = pd.read_csv(f"{filename}.csv")
             corpus = cls(f"Corpus_charge_{filename}")
-
-            for _, row in df.iterrows():
-                doc_type = row.get("type", row.get("Type", "Document"))
-                
-                # On récupère  les colonnes (essayer majuscules puis minuscules)
-                titre = row.get('Titre', row.get('titre', ''))
-                auteur = row.get('Auteur', row.get('auteur', ''))
-                date = row.get('Date', row.get('date', ''))
-                url = row.get('URL', row.get('url', ''))
-                texte = row.get('text', row.get('texte', ''))
-
-                if doc_type == "Reddit":
-                    obj = RedditDocument(
-                        titre, auteur, date,
-                        url, texte, nb_commentaires=0
-                    )
-
-                elif doc_type == "Arxiv":
-                    obj = ArxivDocument(
-                        titre, auteur, date,
-                        url, texte, coauthors=[]
-                    )
-
-                else:
-                    obj = Document(
-                        titre, auteur, date,
-                        url, texte
-                    )
-
-                doc_id = row.get("id", row.get("ID", len(corpus.id2doc)))
-                corpus.add_document_obj(doc_id, obj)
-
+            if instrumentation is not None:
+                corpus.instrumentation = instrumentation
+            corpus.charger_csv(f"{filename}.csv", taille_lot=taille_lot)
             return corpus
         
         elif format_type == 'pickle':
-            with open(f"{filename}.pkl", 'rb') as f:
-                return pickle.load(f)
+            with (instrumentation or INACTIVE).etape('corpus.chargement'):
+                with open(f"{filename}.pkl", 'rb') as f:
+                    corpus = pickle.load(f)
+            if instrumentation is not None:
+                corpus.instrumentation = instrumentation
+            return corpus
+
 
+    def empreinte(self):
+        """
+        Empreinte SHA-256 du contenu (doc_id et texte de chaque document, dans
+        l'ordre des doc_id triés) : permet de savoir si un index sauvegardé a
+        été construit sur ce corpus.
+        """
+        h = hashlib.sha256()
+        for doc_id in sorted(self.id2doc.keys()):
+            h.update(repr(doc_id).encode('utf-8'))
+            h.update(b'\x00')
+            h.update(str(self.id2doc[doc_id].texte).encode('utf-8'))
+            h.update(b'\x01')
+        return h.hexdigest()
+
+    def charger_csv(self, chemin, sep=',', taille_lot=10000, **options):
+        """
+        Ajoute au corpus les documents d'un CSV lu par morceaux (voir
+        ChargementCSV.lire_documents_csv pour les options).
+        """
+        options.setdefault('premier_id', len(self.id2doc))
+        nb_charges = 0
+        with self.instrumentation.etape('corpus.chargement'):
+            for lot in lire_documents_csv(chemin, sep=sep, taille_lot=taille_lot, **options):
+                for doc_id, document in lot:
+                    self.add_document_obj(doc_id, document)
+                nb_charges += len(lot)
+                self.instrumentation.progresser('corpus.chargement', nb_charges)
+        self.instrumentation.compter('corpus.documents_charges', nb_charges)
+        return self
 
     def __repr__(self):
         return f"<Corpus '{self.nom}', {self.ndoc} document(s), {self.naut} auteur(s)>"
@@ -172,115 +308,239 @@ class Corpus:
 
     #La fonction de recherche qui va retourner les passages de document contenant le mot clé
     def search(self, keyword):
-        # Construila chaîne complète une seule fois si pas déjà fait
-        if not hasattr(self, '_texte_complet'):
-            self._texte_complet = ' '.join([doc.texte for doc in self.id2doc.values()])
-        
-        results = []
-        keyword_lower = keyword.lower()
-        for doc_id, doc in self.id2doc.items():
-            if keyword_lower in doc.texte.lower() or keyword_lower in doc.titre.lower():
-                results.append((doc_id, doc))
-        return results
+        # Index de trigrammes construit au premier appel puis tenu à jour par abonnement
+        if getattr(self, '_index_trigrammes', None) is None:
+            self._index_trigrammes = IndexTrigrammes(self)
+        return [(doc_id, self.id2doc[doc_id]) for doc_id in self._index_trigrammes.rechercher(keyword)]
             
 
 #fonction de concordance en utilisant re et pandas et avoir dans un tableau :contexte gauche, motif trouvé, contexte droit
-    def concorde(self, keyword, taille=30): 
-        concordance_list = []
-        # Pattern pour capturer contexte gauche, motif, contexte droit
-        pattern = re.compile(
-            r'(.{0,' + str(taille) + r'})\b' + re.escape(keyword) + r'\b(.{0,' + str(taille) + r'})',
-            re.IGNORECASE
-        )
-
-        for doc_id, doc in self.id2doc.items():
-            for match in pattern.finditer(doc.texte):
-                contexte_gauche = match.group(1).strip()
-                motif_trouve = keyword
-                contexte_droit = match.group(2).strip()
-                
-                concordance_list.append({
-                    'doc_id': doc_id,
-                    'contexte_gauche': contexte_gauche,
-                    'motif_trouve': motif_trouve,
-                    'contexte_droit': contexte_droit,
-                    'concordance': contexte_gauche + ' [' + motif_trouve + '] ' + contexte_droit
-                })
-
-        return pd.DataFrame(concordance_list)
+    def concorde(self, keyword, taille=30, limite=None):
+        # limite : nombre maximal de lignes (None pour toutes)
+        colonnes = ['doc_id', 'contexte_gauche', 'motif_trouve', 'contexte_droit', 'concordance']
+        with self.instrumentation.etape('corpus.concorde'):
+            return pd.DataFrame(list(self.concorde_iter(keyword, taille, limite)), columns=colonnes)
+
+    def concorde_iter(self, keyword, taille=30, limite=None):
+        """
+        Version générateur de concorde : produit les lignes une à une, dans
+        l'ordre des documents puis du texte, et s'arrête après limite lignes.
+        """
+        store = self.store
+        if MOT_ENTIER.fullmatch(keyword):
+            # Un seul mot : ses occurrences sont lues dans l'index positionnel
+            if getattr(self, '_index_positionnel', None) is None:
+                self._index_positionnel = IndexPositionnel(self)
+            positions, _, debuts = self._index_positionnel.occurrences(keyword)
+            occurrences = ((p, d, d + len(keyword)) for p, d in zip(positions.tolist(), debuts.tolist()))
+        else:
+            # Expression quelconque : recherche du motif seul, sans contexte dans la regex
+            pattern = re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE)
+            occurrences = (
+                (position, match.start(), match.end())
+                for position, doc_id in enumerate(store.doc_ids) if doc_id is not None
+                for match in pattern.finditer(store.textes.lire(position))
+            )
+
+        nb = 0
+        position_texte, texte = None, None
+        for position, debut, fin in occurrences:
+            if limite is not None and nb >= limite:
+                return
+            if position != position_texte:
+                position_texte, texte = position, store.textes.lire(position)
+
+            # Le contexte s'arrête au passage à la ligne, comme « . » dans une regex
+            gauche = texte[max(0, debut - taille):debut]
+            gauche = gauche[gauche.rfind('\n') + 1:].strip()
+            droite = texte[fin:fin + taille]
+            coupure = droite.find('\n')
+            droite = (droite if coupure < 0 else droite[:coupure]).strip()
+
+            nb += 1
+            yield {
+                'doc_id': store.doc_ids[position],
+                'contexte_gauche': gauche,
+                'motif_trouve': keyword,
+                'contexte_droit': droite,
+                'concordance': gauche + ' [' + keyword + '] ' + droite
+            }
 
 #PARTIE 2: Statistiques 
 
 #Fonction nettoyer_text qui prend une chaine de caractères en entrée et lui applique une chaine de traitement, mise en minuscule, remplacement des passages à la ligne
 
     def nettoyer_text (self, text):
-        text = text.lower()
-        text = re.sub(r'\n', ' ', text)
-        text = re.sub(r'[^\w\s]', '', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return nettoyer(text)
+
+#Cache d'analyse : texte nettoyé -> tableau d'ids de termes, calculé une fois par document
+
+    def tokens_document(self, doc_id):
+        """Retourne les ids des mots du document (tableau numpy int32)."""
+        tokens = self._tokens.get(doc_id)
+        if tokens is None:
+            mots = MOT.findall(self.nettoyer_text(self.id2doc[doc_id].texte))
+            termes = self._termes
+            liste_termes = self._liste_termes
+            ids = []
+            for mot in mots:
+                terme_id = termes.get(mot)
+                if terme_id is None:
+                    terme_id = len(liste_termes)
+                    termes[mot] = terme_id
+                    liste_termes.append(mot)
+                ids.append(terme_id)
+            tokens = np.array(ids, dtype=np.int32)
+            self._tokens[doc_id] = tokens
+        return tokens
+
+    def analyser(self, doc_ids=None, nb_processus=None, taille_lot=2000, progression=None):
+        """
+        Remplit le cache d'analyse pour doc_ids (tous les documents par défaut)
+        en répartissant la tokenisation par lots de taille_lot documents sur
+        nb_processus processus (None : un par cœur).
+
+        Chaque processus renvoie son vocabulaire local ; les ids locaux sont
+        ensuite convertis vers le dictionnaire partagé, lot par lot et dans
+        l'ordre, ce qui donne exactement les mêmes tokens qu'en séquentiel.
+
+        progression : fonction optionnelle appelée avec ('corpus.analyse',
+        documents analysés, documents à analyser) après chaque lot.
+        """
+        if doc_ids is None:
+            doc_ids = list(self.id2doc.keys())
+        manquants = [doc_id for doc_id in doc_ids if doc_id not in self._tokens]
+        if progression is None:
+            progression = self.instrumentation.progression
+        if nb_processus is None:
+            nb_processus = os.cpu_count() or 1
+        if nb_processus <= 1 or len(manquants) <= taille_lot:
+            for debut in range(0, len(manquants), taille_lot):
+                for doc_id in manquants[debut:debut + taille_lot]:
+                    self.tokens_document(doc_id)
+                if progression is not None:
+                    progression('corpus.analyse', min(debut + taille_lot, len(manquants)), len(manquants))
+            return
+
+        lots = [manquants[i:i + taille_lot] for i in range(0, len(manquants), taille_lot)]
+        with ProcessPoolExecutor(max_workers=nb_processus) as pool:
+            # Au plus deux lots en attente par processus : mémoire bornée
+            en_cours = deque()
+            fait = 0
+            for lot in lots:
+                textes = [self.id2doc[doc_id].texte for doc_id in lot]
+                en_cours.append((lot, pool.submit(_analyser_textes, textes)))
+                if len(en_cours) >= 2 * nb_processus:
+                    lot_termine, futur = en_cours.popleft()
+                    self._fusionner_analyse(lot_termine, *futur.result())
+                    fait += len(lot_termine)
+                    if progression is not None:
+                        progression('corpus.analyse', fait, len(manquants))
+            while en_cours:
+                lot_termine, futur = en_cours.popleft()
+                self._fusionner_analyse(lot_termine, *futur.result())
+                fait += len(lot_termine)
+                if progression is not None:
+                    progression('corpus.analyse', fait, len(manquants))
+
+    def _fusionner_analyse(self, doc_ids, mots, longueurs, ids):
+        """Range dans le cache les tokens d'un lot analysé par _analyser_textes."""
+        termes = self._termes
+        liste_termes = self._liste_termes
+        correspondance = np.empty(len(mots), dtype=np.int32)
+        for terme_local, mot in enumerate(mots):
+            terme_id = termes.get(mot)
+            if terme_id is None:
+                terme_id = len(liste_termes)
+                termes[mot] = terme_id
+                liste_termes.append(mot)
+            correspondance[terme_local] = terme_id
+
+        tokens = correspondance[ids]
+        fins = np.cumsum(longueurs)
+        for doc_id, debut, fin in zip(doc_ids, (fins - longueurs).tolist(), fins.tolist()):
+            self._tokens[doc_id] = tokens[debut:fin]
+
+    def liste_termes(self):
+        """Dictionnaire partagé du cache : id du terme -> mot."""
+        return self._liste_termes
+
+    def id_terme(self, mot):
+        """Id d'un mot dans le dictionnaire partagé (None s'il est inconnu)."""
+        return self._termes.get(mot)
+
+    def tokens_concatenes(self, doc_ids=None):
+        """
+        Tokens de plusieurs documents mis bout à bout.
+        Retourne (lignes, termes) : lignes[i] est la position du document
+        dans doc_ids (ordre de id2doc par défaut) et termes[i] l'id du mot.
+        """
+        if doc_ids is None:
+            doc_ids = list(self.id2doc.keys())
+        tableaux = [self.tokens_document(doc_id) for doc_id in doc_ids]
+        if not tableaux:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+        longueurs = np.array([len(t) for t in tableaux], dtype=np.int64)
+        lignes = np.repeat(np.arange(len(tableaux), dtype=np.int64), longueurs)
+        return lignes, np.concatenate(tableaux)
+
+    def _frequences(self, avec_df=False):
+        """
+        Term frequency (et document frequency si avec_df) de chaque id de terme
+        du cache d'analyse.
+        """
+        lignes, termes = self.tokens_concatenes()
+        nb_termes = len(self._liste_termes)
+        tf = np.bincount(termes, minlength=nb_termes)
+        if not avec_df:
+            return tf, None
+
+        # Une paire (document, terme) distincte compte pour un document
+        paires = np.sort(lignes * max(nb_termes, 1) + termes)
+        distinctes = paires[np.r_[True, paires[1:] != paires[:-1]]] if len(paires) else paires
+        df = np.bincount(distinctes % max(nb_termes, 1), minlength=nb_termes)
+        return tf, df
     
 #Le nombre de mots différents dans le corpus
 
     def nombre_mots_differents (self):
-        mots_uniques = set()
-        for doc_id, doc in self.id2doc.items():
-            mots = re.findall(r'\b\w+\b', doc.texte.lower())
-            mots_uniques.update(mots)
-        return len(mots_uniques)
+        tf, _ = self._frequences()
+        return int(np.count_nonzero(tf))
     
     #Afficher les n mots les plus fréquents 
     def mots_plus_frequents(self, n=10):
-        from collections import Counter
-        compteur_mots = Counter()
-        for doc_id, doc in self.id2doc.items():
-            texte_net = self.nettoyer_text(doc.texte)
-            mots = re.findall(r'\b\w+\b', texte_net)
-            compteur_mots.update(mots)
-        return compteur_mots.most_common(n)
+        tf, _ = self._frequences()
+        presents = np.flatnonzero(tf)
+        # Tri stable : à égalité, l'ordre d'apparition des mots est conservé
+        ordre = presents[np.argsort(-tf[presents], kind='stable')][:n]
+        return [(self._liste_termes[i], int(tf[i])) for i in ordre]
 
     # Méthode stats pour affiche statistiques textuelles
-    def stats(self, n=10):
-        """Affiche les statistiques textuelles du corpus"""
-        from collections import Counter
-        
-        # Compteurs pour term frequency et document frequency
-        compteur_tf = Counter()  # Term frequency sui est le nombre total d'occurrences)
-        compteur_df = Counter()  # Document frequency qui est le nombre de documents contenant le mot
-        
-        vocabulaire = set()
-        
-        # on va d'abord parcourir tous les documents une  fois
-        for doc_id, doc in self.id2doc.items():
-            texte_net = self.nettoyer_text(doc.texte)
-            mots = re.findall(r'\b\w+\b', texte_net)
-            vocabulaire.update(mots)
-            compteur_tf.update(mots)
-            # Compte les documents contenant chaque mot unique (document frequency)
-            mots_uniques_doc = set(mots)
-            compteur_df.update(mots_uniques_doc)
-        
-        # Créeation du DataFrame avec les fréquences
-        if vocabulaire:  #  vocabulaire
-            freq_data = []
-            for mot in vocabulaire:
-                freq_data.append({
-                    'mot': mot,
-                    'term_frequency': compteur_tf[mot],
-                    'document_frequency': compteur_df[mot]
-                })
-            
-            df_freq = pd.DataFrame(freq_data)
+    def stats(self, n=10, afficher=True):
+        """Affiche les statistiques textuelles du corpus (afficher=False : DataFrame seul)"""
+        # Term frequency (nombre total d'occurrences) et document frequency
+        # (nombre de documents contenant le mot), lus dans le cache d'analyse
+        with self.instrumentation.etape('corpus.stats'):
+            tf, df = self._frequences(avec_df=True)
+            presents = np.flatnonzero(tf)
+
+            # Créeation du DataFrame avec les fréquences
+            df_freq = pd.DataFrame({
+                'mot': [self._liste_termes[i] for i in presents],
+                'term_frequency': tf[presents],
+                'document_frequency': df[presents]
+            }, columns=['mot', 'term_frequency', 'document_frequency'])
             # Trie des TF par term frequency décroissante
             if not df_freq.empty:
-                df_freq = df_freq.sort_values('term_frequency', ascending=False)
-        else:
-            df_freq = pd.DataFrame(columns=['mot', 'term_frequency', 'document_frequency'])
+                df_freq = df_freq.sort_values('term_frequency', ascending=False, kind='stable')
         
+        if not afficher:
+            return df_freq
+
         # Affichage des statistiques
         print(f"\n=== Statistiques du corpus '{self.nom}' ===")
         print(f"Nombre de documents : {self.ndoc}")
-        print(f"Nombre de mots différents (vocabulaire) : {len(vocabulaire)}")
+        print(f"Nombre de mots différents (vocabulaire) : {len(presents)}")
         print(f"\nLes {n} mots les plus fréquents :")
         print(df_freq.head(n).to_string(index=False))
         
@@ -288,12 +548,8 @@ class Corpus:
     
 #Dictionnaire vocab contenant le text de mes documents
     def vocab(self):
-        vocab = set()
-        for doc_id, doc in self.id2doc.items():
-            texte_net = self.nettoyer_text(doc.texte)
-            mots = re.findall(r'\b\w+\b', texte_net)
-            vocab.update(mots)
-        return sorted(vocab)
+        tf, _ = self._frequences()
+        return sorted(self._liste_termes[i] for i in np.flatnonzero(tf))
     
  
 
@@ -0,0 +1,258 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class DictionnaireTermes:
+    """
+    Dictionnaire de termes triés, stocké dans deux tableaux :
+        - blob : les termes encodés en UTF-8, bout à bout
+        - offsets : début de chaque terme dans blob (len(termes) + 1 valeurs)
+
+    L'id d'un terme est son rang alphabétique ; la recherche d'un mot se fait
+    par dichotomie. L'ordre des octets UTF-8 est celui des points de code, donc
+    celui de sorted() sur les chaînes Python.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def depuis_liste(cls, termes):
+        """Construit le dictionnaire à partir d'une liste de termes déjà triée."""
+        encodes = [terme.encode('utf-8') for terme in termes]
+        offsets = np.zeros(len(encodes) + 1, dtype=np.int64)
+        if encodes:
+            offsets[1:] = np.cumsum([len(e) for e in encodes])
+        blob = np.frombuffer(b''.join(encodes), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _octets(self, terme_id):
+        return self.blob[self.offsets[terme_id]:self.offsets[terme_id + 1]].tobytes()
+
+    def __getitem__(self, terme_id):
+        if terme_id < 0:
+            terme_id += len(self)
+        if not 0 <= terme_id < len(self):
+            raise IndexError(terme_id)
+        return self._octets(terme_id).decode('utf-8')
+
+    def __iter__(self):
+        for terme_id in range(len(self)):
+            yield self._octets(terme_id).decode('utf-8')
+
+    def rang(self, mot):
+        """Nombre de termes strictement inférieurs à mot (premier id >= mot)."""
+        cle = mot.encode('utf-8')
+        bas, haut = 0, len(self)
+        while bas < haut:
+            milieu = (bas + haut) // 2
+            if self._octets(milieu) < cle:
+                bas = milieu + 1
+            else:
+                haut = milieu
+        return bas
+
+    def id(self, mot):
+        """Id du mot, ou -1 s'il n'est pas dans le dictionnaire."""
+        rang = self.rang(mot)
+        if rang < len(self) and self._octets(rang) == mot.encode('utf-8'):
+            return rang
+        return -1
+
+    def tranche(self, debut, fin):
+        """Termes d'ids debut à fin (exclu)."""
+        return [self._octets(terme_id).decode('utf-8') for terme_id in range(debut, fin)]
+
+
+class Vocabulaire(Mapping):
+    """
+    Vue « dictionnaire » sur un DictionnaireTermes et les statistiques des
+    termes, avec la même forme que MoteurRecherche.vocab :
+        mot -> {'id', 'total_occurrences', 'document_frequency'}
+    Aucun dictionnaire Python n'est construit : l'ouverture est immédiate.
+    """
+
+    def __init__(self, dictionnaire, total_occurrences, document_frequency):
+        self.dictionnaire = dictionnaire
+        self.total_occurrences = total_occurrences
+        self.document_frequency = document_frequency
+
+    def __getitem__(self, mot):
+        terme_id = self.dictionnaire.id(mot) if isinstance(mot, str) else -1
+        if terme_id < 0:
+            raise KeyError(mot)
+        return {
+            'id': terme_id,
+            'total_occurrences': int(self.total_occurrences[terme_id]),
+            'document_frequency': int(self.document_frequency[terme_id])
+        }
+
+    def __contains__(self, mot):
+        return isinstance(mot, str) and self.dictionnaire.id(mot) >= 0
+
+    def __iter__(self):
+        return iter(self.dictionnaire)
+
+    def __len__(self):
+        return len(self.dictionnaire)
+
+
+def _varbyte(n):
+    """Un entier positif en variable byte (même convention que Compression.encoder_varbyte)."""
+    octets = bytearray()
+    while n >= 0x80:
+        octets.append(n & 0x7F)
+        n >>= 7
+    octets.append(n | 0x80)
+    return octets
+
+
+def _lire_varbyte(octets, position):
+    """Lit un entier variable byte dans octets (bytes) ; retourne (valeur, position suivante)."""
+    valeur, decalage = 0, 0
+    while True:
+        octet = octets[position]
+        position += 1
+        valeur |= (octet & 0x7F) << decalage
+        if octet & 0x80:
+            return valeur, position
+        decalage += 7
+
+
+class DictionnaireFrontal:
+    """
+    Dictionnaire de termes triés avec codage frontal (front coding), même
+    interface que DictionnaireTermes mais plus compact :
+        - les termes sont groupés par blocs de taille_bloc ; le premier terme
+          d'un bloc est stocké en entier (longueur + octets UTF-8), les suivants
+          par la longueur du préfixe commun avec le terme précédent et le
+          suffixe restant (longueurs en variable byte)
+        - blob : tous les blocs bout à bout ; offsets : début de chaque bloc
+
+    La recherche d'un mot est une dichotomie sur les premiers termes des
+    blocs puis un parcours du seul bloc trouvé.
+    """
+
+    def __init__(self, blob, offsets, nb_termes, taille_bloc=16):
+        self.blob = blob
+        self.offsets = offsets
+        self.nb_termes = nb_termes
+        self.taille_bloc = taille_bloc
+        self._premiers = None    # premiers termes des blocs, décodés au premier id()
+
+    @classmethod
+    def depuis_liste(cls, termes, taille_bloc=16):
+        """Construit le dictionnaire à partir d'une liste de termes déjà triée."""
+        blob = bytearray()
+        offsets = np.zeros((len(termes) + taille_bloc - 1) // taille_bloc + 1, dtype=np.int64)
+        precedent = b''
+        for rang, terme in enumerate(termes):
+            encode = terme.encode('utf-8')
+            if rang % taille_bloc == 0:
+                offsets[rang // taille_bloc] = len(blob)
+                blob += _varbyte(len(encode))
+                blob += encode
+            else:
+                commun = 0
+                limite = min(len(encode), len(precedent))
+                while commun < limite and encode[commun] == precedent[commun]:
+                    commun += 1
+                blob += _varbyte(commun)
+                blob += _varbyte(len(encode) - commun)
+                blob += encode[commun:]
+            precedent = encode
+        offsets[-1] = len(blob)
+        return cls(np.frombuffer(bytes(blob), dtype=np.uint8), offsets, len(termes), taille_bloc)
+
+    def __len__(self):
+        return self.nb_termes
+
+    def _bloc(self, bloc):
+        """Termes (en octets) d'un bloc, décodés."""
+        octets = self.blob[self.offsets[bloc]:self.offsets[bloc + 1]].tobytes()
+        longueur, position = _lire_varbyte(octets, 0)
+        terme = octets[position:position + longueur]
+        position += longueur
+        termes = [terme]
+        while position < len(octets):
+            commun, position = _lire_varbyte(octets, position)
+            longueur, position = _lire_varbyte(octets, position)
+            terme = terme[:commun] + octets[position:position + longueur]
+            position += longueur
+            termes.append(terme)
+        return termes
+
+    def _premier(self, bloc):
+        """Premier terme (en octets) d'un bloc."""
+        debut = int(self.offsets[bloc])
+        octets = self.blob[debut:min(debut + 10, int(self.offsets[bloc + 1]))].tobytes()
+        longueur, position = _lire_varbyte(octets, 0)
+        return self.blob[debut + position:debut + position + longueur].tobytes()
+
+    def __getitem__(self, terme_id):
+        if terme_id < 0:
+            terme_id += len(self)
+        if not 0 <= terme_id < len(self):
+            raise IndexError(terme_id)
+        return self._bloc(terme_id // self.taille_bloc)[terme_id % self.taille_bloc].decode('utf-8')
+
+    def __iter__(self):
+        for bloc in range(len(self.offsets) - 1):
+            for terme in self._bloc(bloc):
+                yield terme.decode('utf-8')
+
+    def _bloc_de(self, cle):
+        """Dernier bloc dont le premier terme est <= cle (-1 si aucun)."""
+        if self._premiers is None:
+            # Un terme sur taille_bloc : la dichotomie ne décode plus rien
+            self._premiers = [self._premier(bloc) for bloc in range(len(self.offsets) - 1)]
+        return bisect_right(self._premiers, cle) - 1
+
+    def rang(self, mot):
+        """Nombre de termes strictement inférieurs à mot (premier id >= mot)."""
+        cle = mot.encode('utf-8')
+        bloc = self._bloc_de(cle)
+        if bloc < 0:
+            return 0
+        termes = self._bloc(bloc)
+        return bloc * self.taille_bloc + bisect_left(termes, cle)
+
+    def tranche(self, debut, fin):
+        """Termes d'ids debut à fin (exclu), en décodant chaque bloc une fois."""
+        if fin <= debut:
+            return []
+        premier, dernier = debut // self.taille_bloc, (fin - 1) // self.taille_bloc
+        termes = [terme for bloc in range(premier, dernier + 1) for terme in self._bloc(bloc)]
+        decalage = premier * self.taille_bloc
+        return [terme.decode('utf-8') for terme in termes[debut - decalage:fin - decalage]]
+
+    def id(self, mot):
+        """Id du mot, ou -1 s'il n'est pas dans le dictionnaire."""
+        cle = mot.encode('utf-8')
+        bloc = self._bloc_de(cle)
+        if bloc < 0:
+            return -1
+        if self._premiers[bloc] == cle:
+            return bloc * self.taille_bloc
+
+        # Parcours du bloc, arrêté dès qu'un terme dépasse cle
+        octets = self.blob[self.offsets[bloc]:self.offsets[bloc + 1]].tobytes()
+        longueur, position = _lire_varbyte(octets, 0)
+        terme = octets[position:position + longueur]
+        position += longueur
+        rang = 0
+        while position < len(octets):
+            commun, position = _lire_varbyte(octets, position)
+            longueur, position = _lire_varbyte(octets, position)
+            terme = terme[:commun] + octets[position:position + longueur]
+            position += longueur
+            rang += 1
+            if terme >= cle:
+                return bloc * self.taille_bloc + rang if terme == cle else -1
+        return -1
@@ -11,6 +11,9 @@ class Document:
 
     def convertir_date(self, date_str):
         """Convertit différents formats de date -> datetime, sinon utilise date actuelle."""
+        if isinstance(date_str, datetime):
+            # Déjà converti (chargement en masse par ChargementCSV)
+            return date_str
         if not date_str:
             return datetime.now()
         
@@ -4,12 +4,14 @@ from Document import Document, RedditDocument, ArxivDocument
 class DocumentFactory:
     @staticmethod
     def create(source, titre, auteur, date, url, texte, extra=None):
+        # La source peut venir d'un CSV ("reddit") ou d'un type ("Reddit")
+        source = str(source).lower()
 
-        if source == "Reddit":
-            return RedditDocument(titre, auteur, date, url, texte, extra)
+        if source == "reddit":
+            return RedditDocument(titre, auteur, date, url, texte, extra if extra is not None else 0)
 
-        elif source == "Arxiv":
-            return ArxivDocument(titre, auteur, date, url, texte, extra)
+        elif source == "arxiv":
+            return ArxivDocument(titre, auteur, date, url, texte, extra if extra is not None else [])
 
         else:
             return Document(titre, auteur, date, url, texte)
@@ -0,0 +1,503 @@
+from array import array
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from Author import Author
+from Document import Document, RedditDocument, ArxivDocument
+
+
+# Dates stockées en microsecondes depuis cette origine (heure naïve, UTC)
+EPOCH = datetime(1970, 1, 1)
+
+
+def date_vers_entier(date):
+    """datetime -> microsecondes depuis EPOCH (les dates avec fuseau passent en UTC)."""
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = date - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def entier_vers_date(valeur):
+    return EPOCH + timedelta(microseconds=int(valeur))
+
+
+class TableInternee:
+    """Valeurs distinctes d'une colonne : chaque valeur n'est stockée qu'une fois."""
+
+    def __init__(self):
+        self.valeurs = []
+        self.codes = {}
+
+    def code(self, valeur):
+        code = self.codes.get(valeur)
+        if code is None:
+            code = len(self.valeurs)
+            self.codes[valeur] = code
+            self.valeurs.append(valeur)
+        return code
+
+    def __len__(self):
+        return len(self.valeurs)
+
+    def reduire(self, codes):
+        """
+        Ne garde que les valeurs des codes donnés (dans leur ordre actuel) ;
+        retourne les codes renumérotés.
+        """
+        utilises = sorted(set(codes))
+        nouveaux = {ancien: nouveau for nouveau, ancien in enumerate(utilises)}
+        self.valeurs = [self.valeurs[code] for code in utilises]
+        self.codes = {valeur: code for code, valeur in enumerate(self.valeurs)}
+        return [nouveaux[code] for code in codes]
+
+
+class TamponTextes:
+    """
+    Textes UTF-8 mis bout à bout dans un seul bytearray ; chaque entrée est
+    repérée par ses positions de début et de fin. Remplacer un texte l'ajoute
+    en fin de tampon (l'ancien emplacement est récupéré par compacter()).
+    """
+
+    def __init__(self):
+        self.octets = bytearray()
+        self.debuts = array('q')
+        self.fins = array('q')
+        self.perdus = 0  # octets des textes remplacés ou supprimés
+
+    def __setstate__(self, state):
+        # Tampons picklés avant le compte des octets perdus
+        state.setdefault('perdus', 0)
+        self.__dict__.update(state)
+
+    def ajouter(self, texte):
+        self.debuts.append(len(self.octets))
+        self.octets += texte.encode('utf-8')
+        self.fins.append(len(self.octets))
+
+    def remplacer(self, position, texte):
+        self.liberer(position)
+        self.debuts[position] = len(self.octets)
+        self.octets += texte.encode('utf-8')
+        self.fins[position] = len(self.octets)
+
+    def lire(self, position):
+        return self.octets[self.debuts[position]:self.fins[position]].decode('utf-8')
+
+    def liberer(self, position):
+        """Compte l'emplacement de position comme perdu (texte remplacé ou supprimé)."""
+        self.perdus += self.fins[position] - self.debuts[position]
+
+    def compacter(self, positions):
+        """
+        Recopie les seules entrées encore utilisées dans un nouveau tampon :
+        l'entrée positions[i] devient l'entrée i.
+        """
+        octets = bytearray()
+        debuts, fins = array('q'), array('q')
+        for position in positions:
+            debuts.append(len(octets))
+            octets += self.octets[self.debuts[position]:self.fins[position]]
+            fins.append(len(octets))
+        self.octets, self.debuts, self.fins = octets, debuts, fins
+        self.perdus = 0
+
+
+def _chaine(valeur):
+    return '' if valeur is None else str(valeur)
+
+
+class DocumentStore:
+    """
+    Stockage en colonnes des documents d'un corpus :
+        - auteur, url et type : codes vers des tables de valeurs internées
+        - date : entier 64 bits (microsecondes depuis 1970)
+        - titre et texte : un tampon UTF-8 contigu chacun + positions
+        - champs propres à Reddit / Arxiv : seulement s'ils diffèrent du défaut
+
+    Chaque document a une position (un remplacement réécrit la même
+    position) ; une suppression laisse une ligne morte, retirée par
+    compacter(), qui renumérote alors les positions. id2doc et authors du
+    Corpus sont des vues sur ce stockage ; une vue repère son document par
+    doc_id. Les affectations faites sur les vues passent par le Corpus
+    propriétaire (attribut corpus), qui prévient ses index.
+    """
+
+    def __init__(self):
+        self.doc_ids = []       # position -> doc_id (None si supprimé)
+        self.positions = {}     # doc_id -> position, dans l'ordre d'ajout
+        self.types = array('i')
+        self.auteurs = array('i')
+        self.urls = array('i')
+        self.dates = array('q')
+        self.titres = TamponTextes()
+        self.textes = TamponTextes()
+        self.table_types = TableInternee()
+        self.table_auteurs = TableInternee()
+        self.table_urls = TableInternee()
+        self.nb_par_auteur = array('q')  # documents vivants par code d'auteur
+        self.nb_auteurs = 0     # auteurs ayant au moins un document vivant
+        self.extras = {}        # position -> {'nb_commentaires': ..., 'coauthors': ...}
+        self._par_auteur = None  # code d'auteur -> positions vivantes, construit au premier besoin
+        self.corpus = None      # Corpus propriétaire (None : store utilisé seul)
+
+        self.documents = VueDocuments(self)
+        self.vue_auteurs = VueAuteurs(self)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['corpus'] = None      # rattaché de nouveau par Corpus.__setstate__
+        state['_par_auteur'] = None  # reconstruit au premier besoin
+        return state
+
+    def __setstate__(self, state):
+        # Stores picklés avant ces attributs
+        state.setdefault('_par_auteur', None)
+        state.setdefault('corpus', None)
+        self.__dict__.update(state)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def ajouter(self, doc_id, document):
+        """Ajoute (ou remplace, à la même position) un document."""
+        type_doc = self.table_types.code(getattr(document, 'type', 'Document'))
+        auteur = self.table_auteurs.code(document.auteur)
+        url = self.table_urls.code(document.url)
+        date = date_vers_entier(document.date)
+        titre, texte = _chaine(document.titre), _chaine(document.texte)
+
+        extras = {}
+        nb_commentaires = getattr(document, 'nb_commentaires', 0)
+        if nb_commentaires:
+            extras['nb_commentaires'] = nb_commentaires
+        coauthors = getattr(document, 'coauthors', None)
+        if coauthors:
+            extras['coauthors'] = list(coauthors)
+
+        if auteur >= len(self.nb_par_auteur):
+            self.nb_par_auteur.extend([0] * (auteur + 1 - len(self.nb_par_auteur)))
+
+        position = self.positions.get(doc_id)
+        if position is None:
+            position = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.positions[doc_id] = position
+            self.types.append(type_doc)
+            self.auteurs.append(auteur)
+            self.urls.append(url)
+            self.dates.append(date)
+            self.titres.ajouter(titre)
+            self.textes.ajouter(texte)
+        else:
+            self._retirer_position(position)
+            self.types[position] = type_doc
+            self.auteurs[position] = auteur
+            self.urls[position] = url
+            self.dates[position] = date
+            self.titres.remplacer(position, titre)
+            self.textes.remplacer(position, texte)
+
+        if self.nb_par_auteur[auteur] == 0:
+            self.nb_auteurs += 1
+        self.nb_par_auteur[auteur] += 1
+        if self._par_auteur is not None:
+            self._par_auteur.setdefault(auteur, set()).add(position)
+        if extras:
+            self.extras[position] = extras
+        else:
+            self.extras.pop(position, None)
+
+    def supprimer(self, doc_id):
+        position = self.positions.pop(doc_id)
+        self.doc_ids[position] = None
+        self._retirer_position(position)
+        self.extras.pop(position, None)
+        self.titres.liberer(position)
+        self.textes.liberer(position)
+
+    def _retirer_position(self, position):
+        """Retire le document de position des comptes de son auteur."""
+        code = self.auteurs[position]
+        self.nb_par_auteur[code] -= 1
+        if self.nb_par_auteur[code] == 0:
+            self.nb_auteurs -= 1
+        if self._par_auteur is not None:
+            self._par_auteur[code].discard(position)
+
+    def ecrire(self, doc_id, document):
+        """
+        Ajout ou remplacement demandé par une vue : par le Corpus propriétaire
+        s'il y en a un (génération, cache d'analyse et index abonnés à jour).
+        """
+        if self.corpus is not None:
+            self.corpus.add_document_obj(doc_id, document)
+        else:
+            self.ajouter(doc_id, document)
+
+    def a_compacter(self):
+        """Vrai quand les lignes mortes ou les textes perdus occupent plus que les vivants."""
+        mortes = len(self.doc_ids) - len(self.positions)
+        return (mortes > 0 and mortes >= len(self.positions)) or any(
+            tampon.perdus > 0 and 2 * tampon.perdus >= len(tampon.octets) for tampon in (self.titres, self.textes)
+        )
+
+    def compacter(self):
+        """
+        Retire les lignes des documents supprimés et libère la place des
+        textes remplacés : les documents vivants sont renumérotés dans l'ordre
+        d'ajout, et les tables d'auteurs, d'URL et de types ne gardent que les
+        valeurs encore utilisées (codes renumérotés).
+
+        Retourne la renumérotation (tableau numpy : ancienne position ->
+        nouvelle, -1 pour une ligne retirée).
+        """
+        anciennes = list(self.positions.values())
+        renumerotation = np.full(len(self.doc_ids), -1, dtype=np.int64)
+        renumerotation[anciennes] = np.arange(len(anciennes))
+
+        self.doc_ids = [self.doc_ids[position] for position in anciennes]
+        self.positions = {doc_id: position for position, doc_id in enumerate(self.doc_ids)}
+        self.types = array('i', self.table_types.reduire([self.types[p] for p in anciennes]))
+        self.auteurs = array('i', self.table_auteurs.reduire([self.auteurs[p] for p in anciennes]))
+        self.urls = array('i', self.table_urls.reduire([self.urls[p] for p in anciennes]))
+        self.dates = array('q', [self.dates[p] for p in anciennes])
+        self.titres.compacter(anciennes)
+        self.textes.compacter(anciennes)
+        self.extras = {int(renumerotation[position]): extras for position, extras in self.extras.items()}
+
+        self.nb_par_auteur = array('q', np.bincount(np.array(self.auteurs, dtype=np.int64),
+                                                    minlength=len(self.table_auteurs)).tolist())
+        self.nb_auteurs = len(self.table_auteurs)
+        self._par_auteur = None
+        return renumerotation
+
+    def vue(self, position):
+        classe = VUES.get(self.table_types.valeurs[self.types[position]], DocumentVue)
+        return classe(self, self.doc_ids[position])
+
+    def positions_auteur(self, code):
+        """Positions des documents vivants d'un auteur, dans l'ordre d'ajout."""
+        if self._par_auteur is None:
+            # Index auteur -> positions construit une fois, puis tenu à jour
+            self._par_auteur = {}
+            for position in self.positions.values():
+                self._par_auteur.setdefault(self.auteurs[position], set()).add(position)
+        return sorted(self._par_auteur.get(code, ()))
+
+    def tableau_dates(self):
+        """Copie numpy des dates (microsecondes depuis 1970) par position."""
+        return np.array(self.dates, dtype=np.int64)
+
+
+class DocumentVue:
+    """
+    Vue légère (__slots__) sur un document du DocumentStore, avec les mêmes
+    attributs et méthodes que Document. Le document est repéré par son doc_id
+    (sa position peut changer quand le store est compacté). Une affectation
+    remplace le document par le Corpus propriétaire (voir DocumentStore.ecrire) :
+    comme add_document_obj, elle met à jour les index et les recherches du corpus.
+    """
+
+    __slots__ = ('_store', '_doc_id')
+
+    def __init__(self, store, doc_id):
+        self._store = store
+        self._doc_id = doc_id
+
+    @property
+    def _position(self):
+        return self._store.positions[self._doc_id]
+
+    def _mettre_a_jour(self, **champs):
+        store = self._store
+        valeurs = {
+            'titre': self.titre, 'auteur': self.auteur, 'date': self.date,
+            'url': self.url, 'texte': self.texte, 'type': self.type,
+            'nb_commentaires': store.extras.get(self._position, {}).get('nb_commentaires', 0),
+            'coauthors': store.extras.get(self._position, {}).get('coauthors', []),
+        }
+        valeurs.update(champs)
+        store.ecrire(self._doc_id, _Valeurs(valeurs))
+
+    @property
+    def titre(self):
+        return self._store.titres.lire(self._position)
+
+    @titre.setter
+    def titre(self, valeur):
+        self._mettre_a_jour(titre=valeur)
+
+    @property
+    def auteur(self):
+        return self._store.table_auteurs.valeurs[self._store.auteurs[self._position]]
+
+    @auteur.setter
+    def auteur(self, valeur):
+        self._mettre_a_jour(auteur=valeur)
+
+    @property
+    def date(self):
+        return entier_vers_date(self._store.dates[self._position])
+
+    @date.setter
+    def date(self, valeur):
+        self._mettre_a_jour(date=valeur)
+
+    @property
+    def url(self):
+        return self._store.table_urls.valeurs[self._store.urls[self._position]]
+
+    @url.setter
+    def url(self, valeur):
+        self._mettre_a_jour(url=valeur)
+
+    @property
+    def texte(self):
+        return self._store.textes.lire(self._position)
+
+    @texte.setter
+    def texte(self, valeur):
+        self._mettre_a_jour(texte=valeur)
+
+    @property
+    def type(self):
+        return self._store.table_types.valeurs[self._store.types[self._position]]
+
+    @type.setter
+    def type(self, valeur):
+        self._mettre_a_jour(type=valeur)
+
+    def __eq__(self, autre):
+        return (isinstance(autre, DocumentVue) and autre._store is self._store
+                and autre._doc_id == self._doc_id)
+
+    def __hash__(self):
+        return hash((id(self._store), self._doc_id))
+
+    afficher_infos = Document.afficher_infos
+    getType = Document.getType
+    __str__ = Document.__str__
+
+
+class RedditDocumentVue(DocumentVue):
+    __slots__ = ()
+
+    @property
+    def nb_commentaires(self):
+        return self._store.extras.get(self._position, {}).get('nb_commentaires', 0)
+
+    @nb_commentaires.setter
+    def nb_commentaires(self, valeur):
+        self._mettre_a_jour(nb_commentaires=valeur)
+
+    getNbCommentaires = RedditDocument.getNbCommentaires
+    setNbCommentaires = RedditDocument.setNbCommentaires
+    __str__ = RedditDocument.__str__
+
+
+class ArxivDocumentVue(DocumentVue):
+    __slots__ = ()
+
+    @property
+    def coauthors(self):
+        return self._store.extras.get(self._position, {}).get('coauthors', [])
+
+    @coauthors.setter
+    def coauthors(self, valeur):
+        self._mettre_a_jour(coauthors=valeur)
+
+    getCoauthors = ArxivDocument.getCoauthors
+    setCoauthors = ArxivDocument.setCoauthors
+    __str__ = ArxivDocument.__str__
+
+
+VUES = {'Document': DocumentVue, 'Reddit': RedditDocumentVue, 'Arxiv': ArxivDocumentVue}
+
+
+class _Valeurs:
+    """Document minimal (attributs seulement) utilisé pour réécrire une position."""
+
+    def __init__(self, valeurs):
+        self.__dict__.update(valeurs)
+
+
+class VueDocuments(MutableMapping):
+    """id2doc : doc_id -> vue du document, dans l'ordre d'ajout."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, doc_id):
+        return self._store.vue(self._store.positions[doc_id])
+
+    def __setitem__(self, doc_id, document):
+        self._store.ajouter(doc_id, document)
+
+    def __delitem__(self, doc_id):
+        self._store.supprimer(doc_id)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._store.positions
+
+    def __iter__(self):
+        return iter(self._store.positions)
+
+    def __len__(self):
+        return len(self._store.positions)
+
+    def __repr__(self):
+        return f"<VueDocuments {len(self)} document(s)>"
+
+
+class AuteurVue(Author):
+    """Author calculé à partir de la colonne auteur du store (pas de dict de productions)."""
+
+    def __init__(self, store, code):
+        self._store = store
+        self._code = code
+        self.name = store.table_auteurs.valeurs[code]
+
+    @property
+    def ndoc(self):
+        return self._store.nb_par_auteur[self._code]
+
+    @property
+    def productions(self):
+        store = self._store
+        return {store.doc_ids[p]: store.vue(p) for p in store.positions_auteur(self._code)}
+
+    def add(self, doc_id, document):
+        # Les productions découlent de la colonne auteur : ajouter le document au store
+        self._store.ecrire(doc_id, document)
+
+
+class VueAuteurs(Mapping):
+    """authors : nom -> AuteurVue, pour les auteurs ayant au moins un document."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, nom):
+        code = self._store.table_auteurs.codes.get(nom)
+        if code is None or self._store.nb_par_auteur[code] == 0:
+            raise KeyError(nom)
+        return AuteurVue(self._store, code)
+
+    def __contains__(self, nom):
+        code = self._store.table_auteurs.codes.get(nom)
+        return code is not None and self._store.nb_par_auteur[code] > 0
+
+    def __iter__(self):
+        store = self._store
+        for code, nom in enumerate(store.table_auteurs.valeurs):
+            if store.nb_par_auteur[code] > 0:
+                yield nom
+
+    def __len__(self):
+        return self._store.nb_auteurs
+
+    def __repr__(self):
+        return f"<VueAuteurs {len(self)} auteur(s)>"
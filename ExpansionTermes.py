@@ -0,0 +1,116 @@
+import re
+
+import numpy as np
+
+from DictionnaireTermes import DictionnaireTermes
+from TopK import selection_top_k
+
+# Caractère joker des requêtes (« ame* », « *tion », « c*ate »)
+JOKER = '*'
+
+# En dessous de ce nombre de termes, l'intervalle du préfixe est parcouru
+# directement plutôt que de construire le dictionnaire des termes inversés
+TAILLE_SANS_INVERSES = 1024
+
+
+def successeur(prefixe):
+    """Plus petite chaîne supérieure à toutes celles qui commencent par prefixe."""
+    return prefixe[:-1] + chr(ord(prefixe[-1]) + 1)
+
+
+def nettoyer_motif(jeton):
+    """Jeton de requête -> motif en minuscules, sans ponctuation autre que le joker."""
+    return re.sub(r'[^\w*]', '', jeton.lower())
+
+
+class ExpansionTermes:
+    """
+    Expansion des préfixes et jokers et autocomplétion, sur un dictionnaire de
+    termes triés (DictionnaireTermes ou DictionnaireFrontal : l'id d'un terme
+    est son rang alphabétique) :
+        - les termes qui commencent par un préfixe forment un intervalle d'ids,
+          trouvé par deux dichotomies
+        - pour un motif qui commence par un joker (« *tion »), le suffixe est
+          cherché de la même façon dans le dictionnaire des termes inversés,
+          construit au premier besoin
+        - les autres jokers sont vérifiés par expression régulière sur les
+          seuls termes de l'intervalle le plus étroit
+
+    document_frequency, total_occurrences : statistiques par id de terme, qui
+    servent à limiter l'expansion aux termes les plus fréquents et à classer
+    les suggestions.
+    """
+
+    def __init__(self, dictionnaire, document_frequency, total_occurrences):
+        self.dictionnaire = dictionnaire
+        self.document_frequency = document_frequency
+        self.total_occurrences = total_occurrences
+        self._inverses = None       # (DictionnaireTermes des termes inversés, ids)
+
+    def intervalle(self, prefixe):
+        """Ids (debut, fin) des termes qui commencent par prefixe."""
+        if not prefixe:
+            return 0, len(self.dictionnaire)
+        return self.dictionnaire.rang(prefixe), self.dictionnaire.rang(successeur(prefixe))
+
+    def _intervalle_suffixe(self, suffixe):
+        """Positions (debut, fin) dans le dictionnaire inversé des termes finissant par suffixe."""
+        if self._inverses is None:
+            inverses = sorted((terme[::-1], terme_id) for terme_id, terme in enumerate(self.dictionnaire))
+            self._inverses = (DictionnaireTermes.depuis_liste([terme for terme, _ in inverses]),
+                              np.array([terme_id for _, terme_id in inverses], dtype=np.int64))
+        dictionnaire, _ = self._inverses
+        inverse = suffixe[::-1]
+        return dictionnaire.rang(inverse), dictionnaire.rang(successeur(inverse))
+
+    def termes(self, motif, max_termes=50):
+        """
+        Ids (triés) des termes qui correspondent au motif (« * » : toute suite
+        de caractères, éventuellement vide). Au-delà de max_termes
+        correspondances, seuls les max_termes termes de plus grande document
+        frequency sont gardés (None : pas de limite).
+        """
+        motif = nettoyer_motif(motif)
+        morceaux = motif.split(JOKER)
+        if not motif.strip(JOKER):
+            return np.zeros(0, dtype=np.int64)
+        if len(morceaux) == 1:
+            terme_id = self.dictionnaire.id(motif)
+            return np.array([terme_id] if terme_id >= 0 else [], dtype=np.int64)
+
+        prefixe, suffixe = morceaux[0], morceaux[-1]
+        debut, fin = self.intervalle(prefixe)
+        if len(morceaux) == 2 and not suffixe:
+            # Préfixe seul : tout l'intervalle correspond
+            ids = np.arange(debut, fin, dtype=np.int64)
+        else:
+            expression = re.compile('.*'.join(re.escape(morceau) for morceau in morceaux))
+            debut_inv = fin_inv = None
+            if suffixe and (not prefixe or fin - debut > TAILLE_SANS_INVERSES):
+                debut_inv, fin_inv = self._intervalle_suffixe(suffixe)
+            if debut_inv is not None and fin_inv - debut_inv < fin - debut:
+                # Le suffixe est plus sélectif : candidats lus dans le dictionnaire inversé
+                inverses, ids_inverses = self._inverses
+                candidats = ids_inverses[debut_inv:fin_inv].tolist()
+                ids = np.sort(np.array([terme_id for terme_id, inverse in
+                                        zip(candidats, inverses.tranche(debut_inv, fin_inv))
+                                        if expression.fullmatch(inverse[::-1])], dtype=np.int64))
+            else:
+                ids = np.array([debut + rang for rang, terme in enumerate(self.dictionnaire.tranche(debut, fin))
+                                if expression.fullmatch(terme)], dtype=np.int64)
+
+        if max_termes is not None and len(ids) > max_termes:
+            gardes = selection_top_k(np.asarray(self.document_frequency[ids], dtype=np.int64), max_termes)
+            ids = np.sort(ids[gardes])
+        return ids
+
+    def suggerer(self, prefixe, k=10):
+        """
+        Les k termes les plus fréquents (total des occurrences) qui commencent
+        par prefixe, du plus fréquent au moins fréquent.
+        """
+        debut, fin = self.intervalle(re.sub(r'[^\w]', '', prefixe.lower()))
+        if fin <= debut or k <= 0:
+            return []
+        meilleurs = selection_top_k(np.asarray(self.total_occurrences[debut:fin], dtype=np.int64), k)
+        return [self.dictionnaire[debut + int(rang)] for rang in meilleurs]
@@ -0,0 +1,111 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from DocumentStore import date_vers_entier
+
+
+def _valeurs(valeur):
+    """Une valeur seule ou une liste de valeurs -> liste."""
+    if isinstance(valeur, str):
+        return [valeur]
+    return list(valeur)
+
+
+def _entier_date(valeur, fin_de_journee=False):
+    """
+    datetime, date ou chaîne -> microsecondes depuis 1970 (comme le DocumentStore).
+    Une chaîne sans heure (« 2016-12-31 ») est une date : en fin de filtre,
+    elle inclut toute la journée, comme un objet date.
+    """
+    if isinstance(valeur, str):
+        horodatage = pd.Timestamp(valeur)
+        valeur = horodatage.date() if ':' not in valeur else horodatage.to_pydatetime()
+    elif isinstance(valeur, pd.Timestamp):
+        valeur = valeur.to_pydatetime()
+    if isinstance(valeur, date) and not isinstance(valeur, datetime):
+        valeur = datetime(valeur.year, valeur.month, valeur.day)
+        if fin_de_journee:
+            # Une date de fin seule inclut toute la journée
+            return date_vers_entier(valeur) + 86400 * 1000000 - 1
+    return date_vers_entier(valeur)
+
+
+class FiltresDocuments:
+    """
+    Métadonnées des lignes d'une matrice Documents x Termes (ordre doc_ids),
+    précalculées depuis les colonnes du DocumentStore du corpus :
+        - auteur et type : pour chaque valeur, les lignes triées qui l'ont
+        - date : les lignes triées par date et le tableau des dates triées
+    lignes() combine les filtres demandés en un tableau trié de lignes, que
+    la recherche applique avant la sélection du top k.
+
+    Les documents qui ne sont plus dans le corpus ne passent aucun filtre.
+    """
+
+    def __init__(self, corpus, doc_ids):
+        store = corpus.store
+        self.generation = corpus.generation
+        self.store = store
+
+        positions = np.array([store.positions.get(doc_id, -1) for doc_id in doc_ids], dtype=np.int64)
+        vivantes = np.flatnonzero(positions >= 0)
+        positions_vivantes = positions[vivantes]
+
+        self.lignes_auteur = self._postings(vivantes, np.array(store.auteurs, dtype=np.int64)[positions_vivantes])
+        self.lignes_type = self._postings(vivantes, np.array(store.types, dtype=np.int64)[positions_vivantes])
+
+        dates = store.tableau_dates()[positions_vivantes]
+        ordre = np.argsort(dates, kind='stable')
+        self.dates_triees = dates[ordre]
+        self.lignes_par_date = vivantes[ordre]
+
+    @staticmethod
+    def _postings(lignes, codes):
+        """code -> lignes triées ayant ce code."""
+        ordre = np.argsort(codes, kind='stable')
+        codes_tries = codes[ordre]
+        lignes_triees = lignes[ordre]
+        debuts = np.flatnonzero(np.r_[True, codes_tries[1:] != codes_tries[:-1]]) if len(codes) else []
+        fins = list(debuts[1:]) + [len(codes)]
+        return {int(codes_tries[d]): lignes_triees[d:f] for d, f in zip(debuts, fins)}
+
+    def _union(self, postings, codes):
+        parties = [postings[code] for code in codes if code in postings]
+        if not parties:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(parties))
+
+    def lignes(self, auteurs=None, types=None, date_debut=None, date_fin=None):
+        """
+        Lignes (triées) des documents qui passent tous les filtres donnés,
+        ou None si aucun filtre n'est demandé.
+            - auteurs : un nom ou une liste de noms
+            - types : 'Reddit', 'Arxiv', 'Document' ou une liste (casse ignorée)
+            - date_debut, date_fin : bornes incluses (datetime, date ou chaîne)
+        """
+        selections = []
+        if auteurs is not None:
+            codes = self.store.table_auteurs.codes
+            selections.append(self._union(self.lignes_auteur, [codes[a] for a in _valeurs(auteurs) if a in codes]))
+        if types is not None:
+            voulus = {t.lower() for t in _valeurs(types)}
+            codes = [code for code, valeur in enumerate(self.store.table_types.valeurs)
+                     if str(valeur).lower() in voulus]
+            selections.append(self._union(self.lignes_type, codes))
+        if date_debut is not None or date_fin is not None:
+            debut, fin = 0, len(self.dates_triees)
+            if date_debut is not None:
+                debut = np.searchsorted(self.dates_triees, _entier_date(date_debut), side='left')
+            if date_fin is not None:
+                fin = np.searchsorted(self.dates_triees, _entier_date(date_fin, fin_de_journee=True), side='right')
+            selections.append(np.sort(self.lignes_par_date[debut:max(debut, fin)]))
+
+        if not selections:
+            return None
+        selections.sort(key=len)
+        resultat = selections[0]
+        for selection in selections[1:]:
+            resultat = np.intersect1d(resultat, selection, assume_unique=True)
+        return resultat
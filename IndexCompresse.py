@@ -0,0 +1,187 @@
+import numpy as np
+from scipy.sparse import csc_matrix
+
+from Compression import PostingsCompresses, decoder_varbyte
+from IndexInverse import IndexInverse
+from StockageIndex import ecrire_tableau, lire_tableau
+
+# Niveaux des poids quantifiés (un octet par posting)
+NIVEAUX = 255
+
+
+def _entiers_compacts(tableau):
+    """Tableau d'entiers en int32 si ses valeurs le permettent (sinon int64)."""
+    tableau = np.asarray(tableau)
+    if len(tableau) == 0 or int(tableau.max()) < 2 ** 31:
+        return tableau.astype(np.int32)
+    return tableau.astype(np.int64)
+
+
+class IndexCompresse(IndexInverse):
+    """
+    Index inversé compressé, même interface (et même élagage MaxScore) que
+    IndexInverse :
+        - documents de chaque terme : écarts encodés en variable byte par
+          blocs de taille_bloc (Compression.PostingsCompresses), décodés bloc
+          par bloc par top_k : les blocs d'un terme non essentiel qui précèdent
+          le document cherché (bloc_dernier) et les blocs sans document
+          autorisé par les filtres ne sont jamais décodés
+        - poids : quantifiés sur un octet par posting, avec une échelle par
+          terme : poids ≈ q * bornes[t] / 255 ; la borne reste donc un majorant
+          exact pour MaxScore
+        - TF optionnels (un entier compact par posting, en général un octet) :
+          la matrice TF se reconstruit à partir de l'index (matrice_tf), le
+          moteur n'a pas à garder ses matrices creuses
+    Environ 2 à 3 octets par posting au lieu de 8 (indice int32 + poids float32).
+    Les scores sont ceux de IndexInverse à l'erreur de quantification près
+    (au plus bornes[t] / 510 par terme).
+    """
+
+    FICHIERS = ('compresse_octets', 'compresse_bloc_debut', 'compresse_bloc_dernier', 'compresse_bloc_taille',
+                'compresse_premier_bloc', 'compresse_comptes', 'compresse_impacts', 'compresse_bornes')
+    FICHIER_TF = 'compresse_tf'
+
+    def __init__(self, postings, impacts, bornes, nb_docs, tf=None):
+        self.postings_docs = postings
+        self.impacts = impacts
+        self.bornes = bornes
+        self.nb_docs = nb_docs
+        self.tf = tf  # TF de chaque posting (même ordre que impacts) ou None
+        # Début des impacts de chaque terme
+        self.indptr = _entiers_compacts(np.r_[0, np.cumsum(postings.comptes, dtype=np.int64)])
+
+    @classmethod
+    def depuis_matrice(cls, matrice, taille_bloc=128, tf=None):
+        """
+        Construit l'index à partir d'une matrice creuse Documents x Termes.
+        tf : matrice TF de mêmes entrées que matrice, dont les comptes sont
+        gardés avec les postings (voir matrice_tf).
+        """
+        csc = matrice.tocsc()
+        csc.sort_indices()
+        nb_termes = csc.shape[1]
+        comptes = np.diff(csc.indptr)
+
+        comptes_tf = None
+        if tf is not None:
+            tf_csc = tf.tocsc()
+            tf_csc.sort_indices()
+            if tf_csc.shape != csc.shape or not np.array_equal(tf_csc.indptr, csc.indptr):
+                raise ValueError("La matrice TF doit avoir les mêmes entrées que la matrice des poids")
+            comptes_tf = np.rint(tf_csc.data).astype(np.int64)
+            maximum = int(comptes_tf.max()) if len(comptes_tf) else 0
+            comptes_tf = comptes_tf.astype(np.min_scalar_type(maximum))
+
+        bornes = np.zeros(nb_termes, dtype=np.float32)
+        non_vides = np.flatnonzero(comptes > 0)
+        if len(non_vides) > 0:
+            bornes[non_vides] = np.maximum.reduceat(csc.data, csc.indptr[non_vides])
+        termes = np.repeat(np.arange(nb_termes), comptes)
+        postings = PostingsCompresses.depuis_tableaux(termes, csc.indices, nb_termes, taille_bloc)
+        # Tables de sauts et tables par terme en int32 quand c'est possible
+        for nom in ('bloc_debut', 'bloc_dernier', 'premier_bloc', 'comptes'):
+            setattr(postings, nom, _entiers_compacts(getattr(postings, nom)))
+        if taille_bloc <= np.iinfo(np.uint8).max:
+            postings.bloc_taille = postings.bloc_taille.astype(np.uint8)
+
+        # Quantification relative à la borne du terme (arrondi au plus proche)
+        diviseurs = np.repeat(bornes, comptes).astype(np.float64)
+        impacts = np.rint(csc.data / np.where(diviseurs > 0, diviseurs, 1.0) * NIVEAUX).astype(np.uint8)
+        return cls(postings, impacts, bornes, csc.shape[0], comptes_tf)
+
+    def sauvegarder(self, dossier, fichiers):
+        """Écrit les tableaux de l'index dans dossier (descriptions ajoutées à fichiers)."""
+        p = self.postings_docs
+        tableaux = (p.octets, p.bloc_debut, p.bloc_dernier, p.bloc_taille, p.premier_bloc, p.comptes,
+                    self.impacts, self.bornes)
+        for nom, tableau in zip(self.FICHIERS, tableaux):
+            ecrire_tableau(dossier, nom, tableau, fichiers)
+        if self.tf is not None:
+            ecrire_tableau(dossier, self.FICHIER_TF, self.tf, fichiers)
+
+    @classmethod
+    def ouvrir(cls, dossier, fichiers, nb_docs, verifier=False):
+        """Relit un index écrit par sauvegarder, tableaux projetés en mémoire."""
+        octets, bloc_debut, bloc_dernier, bloc_taille, premier_bloc, comptes, impacts, bornes = (
+            lire_tableau(dossier, nom, fichiers, verifier=verifier) for nom in cls.FICHIERS
+        )
+        postings = PostingsCompresses(octets, bloc_debut, bloc_dernier, bloc_taille, premier_bloc, comptes)
+        tf = lire_tableau(dossier, cls.FICHIER_TF, fichiers, verifier=verifier) if cls.FICHIER_TF in fichiers else None
+        return cls(postings, impacts, bornes, nb_docs, tf)
+
+    def postings(self, terme_id):
+        """Retourne (docs, poids) pour un terme, décompressés."""
+        p = self.postings_docs
+        premier, dernier = int(p.premier_bloc[terme_id]), int(p.premier_bloc[terme_id + 1])
+        # Les blocs d'un terme sont contigus : un seul décodage variable byte,
+        # puis les premières valeurs (absolues) des blocs suivants redeviennent
+        # des écarts avec la dernière valeur du bloc précédent
+        ecarts = decoder_varbyte(p.octets[p.bloc_debut[premier]:p.bloc_debut[dernier]]).astype(np.int64)
+        if dernier - premier > 1:
+            ecarts[int(p.bloc_taille[premier])::int(p.bloc_taille[premier])] -= p.bloc_dernier[premier:dernier - 1]
+        docs = np.cumsum(ecarts)
+        debut, fin = self.indptr[terme_id], self.indptr[terme_id + 1]
+        poids = self.impacts[debut:fin].astype(np.float32) * (self.bornes[terme_id] / np.float32(NIVEAUX))
+        return docs, poids
+
+    def _filtre_blocs(self, autorises):
+        """Masque des documents autorisés et ses sommes cumulées (nombre d'autorisés avant chaque document)."""
+        if autorises is None:
+            return None
+        return autorises, np.r_[0, np.cumsum(autorises, dtype=np.int64)]
+
+    def _blocs_terme(self, terme_id, filtre):
+        """
+        Blocs d'un terme pour top_k (voir IndexInverse._blocs_terme) :
+            - sans filtre, chaque bloc est décodé seul, au premier accès
+            - avec un filtre, les blocs dont l'intervalle de documents ne
+              contient aucun document autorisé ne sont pas décodés ; les
+              autres le sont ensemble et, une fois filtrés, forment un seul
+              bloc (liste courte)
+        """
+        p = self.postings_docs
+        premier, dernier = int(p.premier_bloc[terme_id]), int(p.premier_bloc[terme_id + 1])
+        taille_bloc = int(p.bloc_taille[premier]) if dernier > premier else 0
+        debut_terme = int(self.indptr[terme_id])
+        echelle = self.bornes[terme_id] / np.float32(NIVEAUX)
+        derniers = np.asarray(p.bloc_dernier[premier:dernier], dtype=np.int64)
+
+        if filtre is not None:
+            autorises, cumul = filtre
+            # Le bloc j couvre les documents derniers[j - 1] + 1 .. derniers[j]
+            debuts = np.r_[0, derniers[:-1] + 1]
+            blocs = premier + np.flatnonzero(cumul[derniers + 1] > cumul[debuts])
+            docs = p.blocs(blocs)
+            tailles = np.asarray(p.bloc_taille[blocs], dtype=np.int64)
+            positions = np.repeat(debut_terme + (blocs - premier) * taille_bloc - (np.cumsum(tailles) - tailles),
+                                  tailles) + np.arange(len(docs))
+            gardes = autorises[docs]
+            docs = docs[gardes]
+            if len(docs) == 0:
+                return [], None
+            listes = (docs.tolist(), (self.impacts[positions[gardes]].astype(np.float32) * echelle).tolist())
+            return [int(docs[-1])], lambda j: listes
+
+        def charger(j):
+            docs = p.bloc(premier + j)
+            debut = debut_terme + j * taille_bloc
+            return docs, (self.impacts[debut:debut + len(docs)].astype(np.float32) * echelle).tolist()
+
+        return derniers.tolist(), charger
+
+    def matrice_tf(self):
+        """
+        Matrice TF (CSR float32, Documents x Termes) reconstruite en décodant
+        tous les postings ; ValueError si l'index a été construit sans TF.
+        """
+        if self.tf is None:
+            raise ValueError("Index compressé construit sans TF : matrice TF non reconstructible")
+        p = self.postings_docs
+        csc = csc_matrix((self.tf.astype(np.float32), p.toutes(), self.indptr),
+                         shape=(self.nb_docs, p.nb_termes()))
+        return csc.tocsr()
+
+    def taille_octets(self):
+        """Mémoire occupée par les tableaux de l'index."""
+        return int(self.postings_docs.taille_octets() + self.impacts.nbytes + self.bornes.nbytes
+                   + self.indptr.nbytes + (self.tf.nbytes if self.tf is not None else 0))
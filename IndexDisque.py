@@ -0,0 +1,403 @@
+import heapq
+import json
+import os
+import shutil
+from array import array
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+
+from Corpus import MOT, nettoyer
+from DictionnaireTermes import DictionnaireTermes
+from IndexInverse import IndexInverse
+from StockageIndex import EcrivainTableau, ecrire_tableau, lire_tableau
+
+# Format des index écrits par IndexeurSPIMI
+FORMAT_INDEX_DISQUE = 'IndexDisque'
+VERSION_INDEX_DISQUE = 1
+
+# Pondérations disponibles (mêmes formules que MoteurRecherche)
+PONDERATIONS_DISQUE = ('tfidf', 'bm25', 'bm25+')
+
+# Estimation grossière de la place d'un nouveau terme dans le run en mémoire
+# (entrée du dict, chaîne, deux array vides), en octets
+OCTETS_PAR_TERME = 250
+
+
+class IndexeurSPIMI:
+    """
+    Construction d'un index inversé plus gros que la mémoire (méthode SPIMI).
+
+    Les documents arrivent un par un (ajouter) ou par lots (ajouter_lot, par
+    exemple les lots de lire_documents_csv). Leurs postings (terme -> doc, tf)
+    s'accumulent en mémoire ; dès que l'estimation de la place occupée dépasse
+    budget_memoire octets, le « run » est écrit trié sur disque et vidé.
+    terminer() fusionne les runs (fusion k-voies, terme par terme, par
+    morceaux bornés) puis calcule les poids par passes successives sur les
+    fichiers projetés en mémoire : la mémoire reste bornée quelle que soit la
+    taille du corpus (hors vocabulaire, qui grandit beaucoup moins vite).
+
+    Les documents sont numérotés dans leur ordre d'arrivée. L'index obtenu
+    s'ouvre avec IndexDisque.ouvrir.
+    """
+
+    def __init__(self, dossier, budget_memoire=256 * 2**20, ponderation='tfidf',
+                 k1=1.2, b=0.75, delta=1.0):
+        if ponderation not in PONDERATIONS_DISQUE:
+            raise ValueError(
+                f"Pondération inconnue : {ponderation} (attendu : {', '.join(PONDERATIONS_DISQUE)})"
+            )
+        if budget_memoire <= 0:
+            raise ValueError("budget_memoire doit être strictement positif")
+
+        self.dossier = dossier
+        self.budget_memoire = budget_memoire
+        self.ponderation = ponderation
+        self.k1 = k1
+        self.b = b
+        self.delta = delta
+        # Taille des morceaux lus ou écrits lors des passes sur disque
+        self.taille_morceau = max(2**14, budget_memoire // 64)
+
+        self.temporaire = dossier.rstrip(os.sep) + '.tmp'
+        if os.path.exists(self.temporaire):
+            shutil.rmtree(self.temporaire)
+        os.makedirs(os.path.join(self.temporaire, 'runs'))
+        self.fichiers = {}
+
+        self.nb_docs = 0
+        self.doc_ids_entiers = True
+        self.doc_ids = EcrivainTableau(self.temporaire, 'doc_ids', np.int64)
+        self.doc_ids_texte = open(os.path.join(self.temporaire, 'doc_ids.jsonl'), 'w', encoding='utf-8')
+        self.longueurs = EcrivainTableau(self.temporaire, 'longueurs_docs', np.float32)
+        self.somme_longueurs = 0
+
+        self.runs = []          # dossiers des runs écrits
+        self.postings = {}      # run courant : terme -> (array docs, array tf)
+        self.octets = 0
+
+    # --- Lecture des documents ---
+
+    def ajouter(self, doc_id, texte):
+        """Indexe un document (texte brut, nettoyé comme dans Corpus)."""
+        frequences = {}
+        mots = MOT.findall(nettoyer(texte))
+        for mot in mots:
+            frequences[mot] = frequences.get(mot, 0) + 1
+
+        doc = self.nb_docs
+        for mot, tf in frequences.items():
+            listes = self.postings.get(mot)
+            if listes is None:
+                listes = self.postings[mot] = (array('i'), array('i'))
+                self.octets += OCTETS_PAR_TERME + len(mot)
+            listes[0].append(doc)
+            listes[1].append(tf)
+        self.octets += 8 * len(frequences)
+
+        if self.doc_ids_entiers and isinstance(doc_id, (int, np.integer)):
+            self.doc_ids.ajouter([doc_id])
+        else:
+            self.doc_ids_entiers = False
+        self.doc_ids_texte.write(json.dumps(doc_id, ensure_ascii=False, default=str) + '\n')
+        self.longueurs.ajouter([len(mots)])
+        self.somme_longueurs += len(mots)
+        self.nb_docs += 1
+
+        if self.octets >= self.budget_memoire:
+            self._ecrire_run()
+
+    def ajouter_lot(self, lot):
+        """Indexe une liste de (doc_id, document ou texte)."""
+        for doc_id, document in lot:
+            self.ajouter(doc_id, getattr(document, 'texte', document))
+
+    def _ecrire_run(self):
+        """Écrit le run courant (termes triés, postings contigus) et le vide."""
+        if not self.postings:
+            return
+        dossier_run = os.path.join(self.temporaire, 'runs', str(len(self.runs)))
+        os.makedirs(dossier_run)
+
+        termes = sorted(self.postings)
+        fichiers = {}
+        dictionnaire = DictionnaireTermes.depuis_liste(termes)
+        ecrire_tableau(dossier_run, 'termes_blob', dictionnaire.blob, fichiers)
+        ecrire_tableau(dossier_run, 'termes_offsets', dictionnaire.offsets, fichiers)
+
+        indptr = np.zeros(len(termes) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(self.postings[t][0]) for t in termes])
+        ecrire_tableau(dossier_run, 'indptr', indptr, fichiers)
+        docs = EcrivainTableau(dossier_run, 'docs', np.int32)
+        tf = EcrivainTableau(dossier_run, 'tf', np.int32)
+        for terme in termes:
+            listes = self.postings.pop(terme)
+            docs.ajouter(np.frombuffer(listes[0], dtype=np.int32))
+            tf.ajouter(np.frombuffer(listes[1], dtype=np.int32))
+        docs.fermer(fichiers)
+        tf.fermer(fichiers)
+
+        with open(os.path.join(dossier_run, 'entete.json'), 'w', encoding='utf-8') as f:
+            json.dump({'fichiers': fichiers}, f)
+        self.runs.append(dossier_run)
+        self.postings = {}
+        self.octets = 0
+
+    # --- Fusion des runs et calcul des poids ---
+
+    def terminer(self):
+        """Fusionne les runs, écrit l'index final dans dossier et le retourne."""
+        self._ecrire_run()
+        self.longueurs.fermer(self.fichiers)
+        self.doc_ids_texte.close()
+        self.doc_ids.fermer(self.fichiers)
+        if not self.doc_ids_entiers:
+            del self.fichiers['doc_ids']
+            os.remove(os.path.join(self.temporaire, 'doc_ids.bin'))
+        else:
+            os.remove(os.path.join(self.temporaire, 'doc_ids.jsonl'))
+
+        self._fusionner_runs()
+        shutil.rmtree(os.path.join(self.temporaire, 'runs'))
+        self._calculer_poids()
+
+        entete = {
+            'format': FORMAT_INDEX_DISQUE,
+            'version': VERSION_INDEX_DISQUE,
+            'ponderation': self.ponderation,
+            'k1': self.k1,
+            'b': self.b,
+            'delta': self.delta,
+            'nb_docs': self.nb_docs,
+            'nb_termes': self.nb_termes,
+            'longueur_moyenne': self.somme_longueurs / self.nb_docs if self.nb_docs else 0.0,
+            'doc_ids_entiers': self.doc_ids_entiers,
+            'fichiers': self.fichiers
+        }
+        with open(os.path.join(self.temporaire, 'entete.json'), 'w', encoding='utf-8') as f:
+            json.dump(entete, f, indent=1)
+
+        if os.path.exists(self.dossier):
+            shutil.rmtree(self.dossier)
+        os.replace(self.temporaire, self.dossier)
+        return self.dossier
+
+    def _fusionner_runs(self):
+        """
+        Fusion k-voies des runs : les termes de chaque run sont déjà triés, un
+        tas ne garde que le terme courant de chaque run. Les postings d'un terme
+        sont recopiés run après run (les documents y sont déjà croissants).
+        """
+        runs = []
+        for dossier_run in self.runs:
+            with open(os.path.join(dossier_run, 'entete.json'), encoding='utf-8') as f:
+                fichiers = json.load(f)['fichiers']
+            runs.append({nom: lire_tableau(dossier_run, nom, fichiers) for nom in fichiers})
+
+        def termes_du_run(numero):
+            run = runs[numero]
+            dictionnaire = DictionnaireTermes(run['termes_blob'], run['termes_offsets'])
+            for terme_id, terme in enumerate(dictionnaire):
+                yield terme, numero, terme_id
+
+        sorties = {
+            nom: EcrivainTableau(self.temporaire, nom, dtype) for nom, dtype in (
+                ('termes_blob', np.uint8), ('termes_offsets', np.int64),
+                ('index_indptr', np.int64), ('index_docs', np.int32), ('tf', np.float32),
+                ('document_frequency', np.int64), ('total_occurrences', np.int64)
+            )
+        }
+        sorties['termes_offsets'].ajouter([0])
+        sorties['index_indptr'].ajouter([0])
+        fin_blob, fin_postings, nb_termes = 0, 0, 0
+
+        fusion = heapq.merge(*(termes_du_run(numero) for numero in range(len(runs))))
+        for terme, entrees in groupby(fusion, key=lambda entree: entree[0]):
+            df, total = 0, 0
+            for _, numero, terme_id in entrees:
+                run = runs[numero]
+                debut, fin = run['indptr'][terme_id], run['indptr'][terme_id + 1]
+                docs, tf = run['docs'][debut:fin], run['tf'][debut:fin]
+                sorties['index_docs'].ajouter(docs)
+                sorties['tf'].ajouter(tf)
+                df += len(docs)
+                total += int(tf.sum())
+
+            octets = terme.encode('utf-8')
+            sorties['termes_blob'].ajouter(np.frombuffer(octets, dtype=np.uint8))
+            fin_blob += len(octets)
+            fin_postings += df
+            nb_termes += 1
+            sorties['termes_offsets'].ajouter([fin_blob])
+            sorties['index_indptr'].ajouter([fin_postings])
+            sorties['document_frequency'].ajouter([df])
+            sorties['total_occurrences'].ajouter([total])
+
+        for sortie in sorties.values():
+            sortie.fermer(self.fichiers)
+        self.nb_termes = nb_termes
+        del runs
+
+    def _morceaux(self, taille):
+        for debut in range(0, taille, self.taille_morceau):
+            yield debut, min(debut + self.taille_morceau, taille)
+
+    def _calculer_poids(self):
+        """
+        Passes par morceaux sur les postings fusionnés :
+            - tfidf : tf * idf, normes L2 des documents (np.memmap), puis division
+            - bm25 / bm25+ : saturation du tf et normalisation par la longueur
+        Les bornes par terme (pour MaxScore) sont calculées au passage.
+        """
+        def lire(nom):
+            return lire_tableau(self.temporaire, nom, self.fichiers)
+
+        indptr, docs, tf = lire('index_indptr'), lire('index_docs'), lire('tf')
+        df = np.asarray(lire('document_frequency'), dtype=np.float64)
+        nb_postings = len(docs)
+        nb_docs = self.nb_docs
+
+        def termes_du_morceau(debut, fin):
+            return np.searchsorted(indptr, np.arange(debut, fin), side='right') - 1
+
+        if self.ponderation == 'tfidf':
+            idf = np.zeros(len(df), dtype=np.float32)
+            presents = df > 0
+            idf[presents] = np.log(nb_docs / df[presents])
+            ecrire_tableau(self.temporaire, 'idf', idf, self.fichiers)
+
+            # Somme des carrés par document, accumulée dans un fichier projeté
+            carres = np.memmap(os.path.join(self.temporaire, 'carres.tmp'), dtype=np.float64,
+                               mode='w+', shape=(max(nb_docs, 1),))
+            carres[:] = 0.0
+            for debut, fin in self._morceaux(nb_postings):
+                valeurs = np.asarray(tf[debut:fin]) * idf[termes_du_morceau(debut, fin)]
+                np.add.at(carres, np.asarray(docs[debut:fin]), valeurs.astype(np.float64) ** 2)
+
+            normes = EcrivainTableau(self.temporaire, 'normes', np.float32)
+            for debut, fin in self._morceaux(nb_docs):
+                normes.ajouter(np.sqrt(carres[debut:fin]).astype(np.float32))
+            normes.fermer(self.fichiers)
+            del carres
+            os.remove(os.path.join(self.temporaire, 'carres.tmp'))
+            normes = lire('normes')
+        else:
+            idf = np.log1p((nb_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+            ecrire_tableau(self.temporaire, 'idf', idf, self.fichiers)
+            longueurs = lire('longueurs_docs')
+            moyenne = self.somme_longueurs / nb_docs if nb_docs else 0.0
+
+        poids = EcrivainTableau(self.temporaire, 'index_poids', np.float32)
+        bornes = np.zeros(len(df), dtype=np.float32)
+        for debut, fin in self._morceaux(nb_postings):
+            termes = termes_du_morceau(debut, fin)
+            docs_morceau = np.asarray(docs[debut:fin])
+            tf_morceau = np.asarray(tf[debut:fin])
+            if self.ponderation == 'tfidf':
+                inverses = np.zeros(len(docs_morceau), dtype=np.float64)
+                normes_morceau = np.asarray(normes[docs_morceau], dtype=np.float64)
+                non_nuls = normes_morceau > 0
+                inverses[non_nuls] = 1.0 / normes_morceau[non_nuls]
+                valeurs = (tf_morceau * idf[termes]) * inverses.astype(np.float32)
+            else:
+                if moyenne > 0:
+                    relatives = np.asarray(longueurs[docs_morceau]) / moyenne
+                else:
+                    relatives = np.ones(len(docs_morceau), dtype=np.float32)
+                normalisation = self.k1 * (1 - self.b + self.b * relatives)
+                saturation = tf_morceau * (self.k1 + 1) / (tf_morceau + normalisation)
+                if self.ponderation == 'bm25+':
+                    saturation = saturation + self.delta
+                valeurs = saturation * idf[termes]
+            valeurs = valeurs.astype(np.float32)
+            poids.ajouter(valeurs)
+            np.maximum.at(bornes, termes, valeurs)
+        poids.fermer(self.fichiers)
+        ecrire_tableau(self.temporaire, 'index_bornes', bornes, self.fichiers)
+
+
+def indexer_lots(lots, dossier, **options):
+    """
+    Construit un index sur disque à partir d'un générateur de lots de
+    (doc_id, document), par exemple lire_documents_csv(chemin).
+    Les options sont celles d'IndexeurSPIMI.
+    """
+    indexeur = IndexeurSPIMI(dossier, **options)
+    for lot in lots:
+        indexeur.ajouter_lot(lot)
+    return IndexDisque.ouvrir(indexeur.terminer())
+
+
+class IndexDisque:
+    """
+    Index construit par IndexeurSPIMI, ouvert sans rien charger : postings,
+    dictionnaire et statistiques sont projetés en mémoire. La recherche passe
+    par IndexInverse.top_k (MaxScore), comme le backend 'index' de
+    MoteurRecherche.
+    """
+
+    def __init__(self, dossier, entete, corpus=None, verifier=False):
+        self.dossier = dossier
+        self.corpus = corpus
+        self.ponderation = entete['ponderation']
+        self.nb_docs = entete['nb_docs']
+        fichiers = entete['fichiers']
+
+        def lire(nom):
+            return lire_tableau(dossier, nom, fichiers, verifier=verifier)
+
+        self.dictionnaire = DictionnaireTermes(lire('termes_blob'), lire('termes_offsets'))
+        self.document_frequency = lire('document_frequency')
+        self.total_occurrences = lire('total_occurrences')
+        self.idf = lire('idf')
+        self.index_inverse = IndexInverse.ouvrir(dossier, fichiers, self.nb_docs, verifier)
+
+        if entete['doc_ids_entiers']:
+            self.doc_ids = lire('doc_ids')
+        else:
+            with open(os.path.join(dossier, 'doc_ids.jsonl'), encoding='utf-8') as f:
+                self.doc_ids = [json.loads(ligne) for ligne in f]
+
+    @classmethod
+    def ouvrir(cls, dossier, corpus=None, verifier=False):
+        """corpus (optionnel) sert seulement à afficher titre et auteur des résultats."""
+        with open(os.path.join(dossier, 'entete.json'), encoding='utf-8') as f:
+            entete = json.load(f)
+        if entete.get('format') != FORMAT_INDEX_DISQUE or entete.get('version') != VERSION_INDEX_DISQUE:
+            raise ValueError(
+                f"Index {dossier} au format {entete.get('format')} v{entete.get('version')}, "
+                f"attendu {FORMAT_INDEX_DISQUE} v{VERSION_INDEX_DISQUE}"
+            )
+        return cls(dossier, entete, corpus, verifier)
+
+    def search(self, mots_clefs, nb_docs=10):
+        """
+        Mêmes arguments et même DataFrame (doc_id, titre, auteur, score) que
+        MoteurRecherche.search ; seuls les documents de score non nul sont renvoyés.
+        """
+        colonnes = ['doc_id', 'titre', 'auteur', 'score']
+        comptes = {}
+        for mot in MOT.findall(nettoyer(mots_clefs)):
+            terme_id = self.dictionnaire.id(mot)
+            if terme_id >= 0:
+                comptes[terme_id] = comptes.get(terme_id, 0) + 1
+        if not comptes or nb_docs <= 0:
+            return pd.DataFrame(columns=colonnes)
+
+        termes_ids = np.array(sorted(comptes), dtype=np.int64)
+        poids = np.array([comptes[t] for t in termes_ids], dtype=np.float32)
+        if self.ponderation == 'tfidf':
+            poids = poids / np.linalg.norm(poids)
+        indices, scores = self.index_inverse.top_k(termes_ids, poids, nb_docs)
+
+        doc_ids, titres, auteurs = [], [], []
+        for indice in indices:
+            doc_id = self.doc_ids[indice]
+            doc_id = doc_id.item() if isinstance(doc_id, np.generic) else doc_id
+            doc = self.corpus.id2doc.get(doc_id) if self.corpus is not None else None
+            doc_ids.append(doc_id)
+            titres.append(doc.titre if doc is not None else None)
+            auteurs.append(doc.auteur if doc is not None else None)
+        return pd.DataFrame({'doc_id': doc_ids, 'titre': titres, 'auteur': auteurs, 'score': scores},
+                            columns=colonnes)
@@ -0,0 +1,374 @@
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, vstack
+
+from Corpus import MOT
+from TopK import selection_top_k
+
+
+class Segment:
+    """
+    Segment immuable de l'index incrémental : une matrice TF Documents x Termes
+    dont les colonnes sont les ids du dictionnaire partagé du corpus.
+
+    Une suppression ne modifie pas le segment : elle produit une copie avec une
+    pierre tombale (ligne marquée supprimée) et des document frequencies mises
+    à jour. Une recherche qui a déjà pris le segment en main n'est pas affectée.
+    """
+
+    def __init__(self, doc_ids, mat_TF, df, supprimes=None):
+        self.doc_ids = doc_ids
+        self.positions = {doc_id: ligne for ligne, doc_id in enumerate(doc_ids)}
+        self.mat_TF = mat_TF
+        self.df = df
+        if supprimes is None:
+            supprimes = np.zeros(len(doc_ids), dtype=bool)
+        self.supprimes = supprimes
+        self.nb_vivants = len(doc_ids) - int(supprimes.sum())
+        self._carres = None          # TF² en colonnes (CSC), construit au premier calcul de normes
+        self._sommes = None          # (df de référence, sommes par ligne, voir normes)
+        self._normes = (None, None)  # (clé de l'IDF, normes TFxIDF des lignes)
+
+    @classmethod
+    def depuis_tokens(cls, doc_ids, tokens, largeur):
+        """Construit un segment à partir des tableaux d'ids de mots des documents."""
+        longueurs = np.array([len(t) for t in tokens], dtype=np.int64)
+        lignes = np.repeat(np.arange(len(tokens), dtype=np.int64), longueurs)
+        cols = np.concatenate(tokens) if tokens else np.zeros(0, dtype=np.int32)
+        data = np.ones(len(cols), dtype=np.float32)
+
+        mat_TF = csr_matrix((data, (lignes, cols)), shape=(len(doc_ids), largeur))
+        mat_TF.sum_duplicates()
+        df = np.bincount(mat_TF.indices, minlength=largeur).astype(np.int64)
+        return cls(list(doc_ids), mat_TF, df)
+
+    @classmethod
+    def fusionner(cls, segments, largeur):
+        """Fusionne des segments en un seul, sans les lignes supprimées."""
+        doc_ids, blocs = [], []
+        df = np.zeros(largeur, dtype=np.int64)
+        for segment in segments:
+            vivantes = np.flatnonzero(~segment.supprimes)
+            bloc = segment.mat_TF[vivantes]
+            bloc.resize((len(vivantes), largeur))
+            blocs.append(bloc)
+            doc_ids.extend(segment.doc_ids[i] for i in vivantes)
+            df[:len(segment.df)] += segment.df
+
+        mat_TF = vstack(blocs, format='csr') if blocs else csr_matrix((0, largeur), dtype=np.float32)
+        return cls(doc_ids, mat_TF.astype(np.float32), df)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def vivant(self, doc_id):
+        ligne = self.positions.get(doc_id)
+        return ligne is not None and not self.supprimes[ligne]
+
+    def supprimer(self, doc_id):
+        """Retourne une copie du segment où doc_id porte une pierre tombale."""
+        ligne = self.positions[doc_id]
+        supprimes = self.supprimes.copy()
+        supprimes[ligne] = True
+        df = self.df.copy()
+        debut, fin = self.mat_TF.indptr[ligne], self.mat_TF.indptr[ligne + 1]
+        df[self.mat_TF.indices[debut:fin]] -= 1
+
+        copie = Segment.__new__(Segment)
+        copie.doc_ids = self.doc_ids
+        copie.positions = self.positions
+        copie.mat_TF = self.mat_TF
+        copie.df = df
+        copie.supprimes = supprimes
+        copie.nb_vivants = self.nb_vivants - 1
+        copie._carres = self._carres
+        copie._sommes = self._sommes
+        copie._normes = self._normes
+        return copie
+
+    def normes(self, df, nb_docs, cle):
+        """
+        Normes des lignes TFxIDF. Avec idf = log N - log df, le carré de la
+        norme d'une ligne vaut A log²N - 2 B log N + C, où A = somme des tf²,
+        B = somme des tf² log df et C = somme des tf² log² df. A ne change
+        jamais ; B et C ne sont corrigés que sur les colonnes des termes dont
+        la df a changé : ajouter un document ne coûte que les postings de ses
+        termes, pas un passage sur tout le segment.
+        """
+        cle_cache, normes = self._normes
+        if cle_cache == cle:
+            return normes
+
+        largeur = self.mat_TF.shape[1]
+        df = df[:largeur]
+        # Les termes de df nulle n'apparaissent que dans des lignes supprimées
+        log_df = np.log(np.maximum(df, 1).astype(np.float64))
+        if self._sommes is None:
+            self._carres = self.mat_TF.multiply(self.mat_TF).tocsc().astype(np.float64)
+            carres = self._carres
+            sommes = np.asarray(carres.sum(axis=1), dtype=np.float64).ravel()
+            self._sommes = (df.copy(), sommes, carres @ log_df, carres @ (log_df ** 2))
+        else:
+            df_reference, sommes, b, c = self._sommes
+            changes = np.flatnonzero(df_reference != df)
+            if len(changes) > 0:
+                # Nouveaux tableaux (pas de modification en place) : une autre
+                # recherche peut lire le même segment au même moment
+                ancien = np.log(np.maximum(df_reference[changes], 1).astype(np.float64))
+                colonnes = self._carres[:, changes]
+                b = b + colonnes @ (log_df[changes] - ancien)
+                c = c + colonnes @ (log_df[changes] ** 2 - ancien ** 2)
+                df_reference = df_reference.copy()
+                df_reference[changes] = df[changes]
+                self._sommes = (df_reference, sommes, b, c)
+        _, sommes, b, c = self._sommes
+
+        log_n = np.log(nb_docs) if nb_docs > 0 else 0.0
+        normes = np.sqrt(np.maximum(sommes * log_n ** 2 - 2 * log_n * b + c, 0.0))
+        self._normes = (cle, normes)
+        return normes
+
+    def scores(self, requete_idf, df, nb_docs, cle):
+        """Cosinus (non divisé par la norme de la requête) de chaque ligne."""
+        largeur = self.mat_TF.shape[1]
+        produits = self.mat_TF.dot(requete_idf[:largeur])
+        normes = self.normes(df, nb_docs, cle)
+        scores = np.zeros(len(self.doc_ids), dtype=np.float64)
+        valides = (normes > 0) & ~self.supprimes
+        scores[valides] = produits[valides] / normes[valides]
+        return scores
+
+
+class IndexIncremental:
+    """
+    Index TFxIDF tenu à jour au fil des ajouts, remplacements et suppressions
+    de documents dans un Corpus, sans reconstruction complète.
+
+    - Les nouveaux documents vont dans un petit tampon en mémoire (taille_tampon).
+    - Un tampon plein devient un segment immuable.
+    - Les segments de même palier de taille (facteur_fusion segments de taille
+      comparable) sont fusionnés, par défaut dans un thread d'arrière-plan.
+    - Suppressions et remplacements passent par des pierres tombales, purgées
+      à la fusion suivante.
+    - L'IDF n'est recalculée qu'au moment d'une recherche, si l'index a changé.
+
+    Les scores sont les cosinus TFxIDF de MoteurRecherche (pondération 'tfidf').
+    Une recherche travaille sur une photo (segments + tampon) prise sous verrou :
+    elle voit tous les segments dans un état cohérent, même pendant une fusion.
+    """
+
+    def __init__(self, corpus, taille_tampon=1000, facteur_fusion=4, fusion_en_arriere_plan=True,
+                 cache=None):
+        self.corpus = corpus
+        self.cache = cache         # CacheRequetes optionnel
+        self.taille_tampon = taille_tampon
+        self.facteur_fusion = facteur_fusion
+        self.fusion_en_arriere_plan = fusion_en_arriere_plan
+
+        self.generation = 0        # incrémenté à chaque modification de l'index
+        self._segments = []        # segments immuables (remplacés, jamais modifiés)
+        self._tampon = {}          # doc_id -> tokens des documents pas encore en segment
+        self._segment_tampon = (None, None)  # (génération, segment du tampon)
+        self._idf = (None, None, None, 0)  # (génération, idf, df, nombre de documents)
+        self._verrou = threading.RLock()
+        self._fusion = None        # thread de fusion en cours
+
+        # Indexation initiale : tout le corpus en un segment
+        doc_ids = list(corpus.id2doc.keys())
+        if doc_ids:
+            tokens = [corpus.tokens_document(doc_id) for doc_id in doc_ids]
+            largeur = len(corpus.liste_termes())
+            self._segments.append(Segment.depuis_tokens(doc_ids, tokens, largeur))
+
+        corpus.abonner(self)
+
+    # --- Notifications du corpus ---
+
+    def document_ajoute(self, doc_id):
+        tokens = self.corpus.tokens_document(doc_id)
+        with self._verrou:
+            self._tampon[doc_id] = tokens
+            self.generation += 1
+            if len(self._tampon) >= self.taille_tampon:
+                self._vider_tampon()
+
+    def document_supprime(self, doc_id):
+        with self._verrou:
+            if self._tampon.pop(doc_id, None) is not None:
+                self.generation += 1
+                return
+            for i, segment in enumerate(self._segments):
+                if segment.vivant(doc_id):
+                    self._segments[i] = segment.supprimer(doc_id)
+                    self.generation += 1
+                    return
+
+    # --- Segments et fusions ---
+
+    def _vider_tampon(self):
+        """Transforme le tampon en segment (appelé sous verrou)."""
+        if not self._tampon:
+            return
+        doc_ids = list(self._tampon.keys())
+        tokens = list(self._tampon.values())
+        largeur = len(self.corpus.liste_termes())
+        self._segments.append(Segment.depuis_tokens(doc_ids, tokens, largeur))
+        self._tampon = {}
+        self._planifier_fusion()
+
+    def _palier(self, segment):
+        """Palier de taille d'un segment : log base facteur_fusion de sa taille."""
+        taille = max(len(segment), 1) / max(self.taille_tampon, 1)
+        if taille <= 1:
+            return 0
+        return int(math.log(taille, self.facteur_fusion))
+
+    def _planifier_fusion(self):
+        """Lance une fusion si un palier contient assez de segments (sous verrou)."""
+        if self._fusion is not None and self._fusion.is_alive():
+            return
+
+        paliers = {}
+        for segment in self._segments:
+            paliers.setdefault(self._palier(segment), []).append(segment)
+
+        for palier in sorted(paliers):
+            groupe = paliers[palier]
+            if len(groupe) >= self.facteur_fusion:
+                sources = groupe[:self.facteur_fusion]
+                if self.fusion_en_arriere_plan:
+                    self._fusion = threading.Thread(target=self._fusionner, args=(sources,), daemon=True)
+                    self._fusion.start()
+                else:
+                    self._fusionner(sources)
+                return
+
+    def _fusionner(self, sources):
+        """Fusionne les segments sources puis les remplace dans la liste."""
+        largeur = max(segment.mat_TF.shape[1] for segment in sources)
+        fusion = Segment.fusionner(sources, largeur)
+
+        with self._verrou:
+            # Les sources ont pu recevoir des pierres tombales pendant la fusion
+            actuels = []
+            for source in sources:
+                for segment in self._segments:
+                    if segment.doc_ids is source.doc_ids:
+                        actuels.append(segment)
+                        break
+            for source, actuel in zip(sources, actuels):
+                for ligne in np.flatnonzero(actuel.supprimes & ~source.supprimes):
+                    fusion = fusion.supprimer(source.doc_ids[ligne])
+
+            rang = self._segments.index(actuels[0])
+            restants = [s for s in self._segments if not any(s is a for a in actuels)]
+            restants.insert(min(rang, len(restants)), fusion)
+            self._segments = restants
+            self._fusion = None
+            self._planifier_fusion()
+
+    def attendre_fusions(self):
+        """Bloque jusqu'à la fin des fusions en arrière-plan."""
+        while True:
+            with self._verrou:
+                fusion = self._fusion
+            if fusion is None or not fusion.is_alive():
+                return
+            fusion.join()
+
+    def nb_segments(self):
+        with self._verrou:
+            return len(self._segments)
+
+    # --- Recherche ---
+
+    def _photo(self):
+        """Segments, segment du tampon et IDF cohérents entre eux (sous verrou)."""
+        with self._verrou:
+            largeur = len(self.corpus.liste_termes())
+            segments = list(self._segments)
+
+            generation_tampon, segment_tampon = self._segment_tampon
+            if generation_tampon != self.generation:
+                segment_tampon = None
+                if self._tampon:
+                    segment_tampon = Segment.depuis_tokens(
+                        list(self._tampon.keys()), list(self._tampon.values()), largeur
+                    )
+                self._segment_tampon = (self.generation, segment_tampon)
+            if segment_tampon is not None:
+                segments.append(segment_tampon)
+
+            generation_idf, idf, df, nb_docs = self._idf
+            if generation_idf != self.generation or len(idf) < largeur:
+                # IDF mise à jour paresseusement, à partir des df des segments
+                df = np.zeros(largeur, dtype=np.int64)
+                nb_docs = 0
+                for segment in segments:
+                    df[:len(segment.df)] += segment.df
+                    nb_docs += segment.nb_vivants
+                idf = np.zeros(largeur, dtype=np.float64)
+                presents = df > 0
+                idf[presents] = np.log(nb_docs / df[presents])
+                self._idf = (self.generation, idf, df, nb_docs)
+
+            return segments, idf, df, nb_docs, self.generation
+
+    def search(self, mots_clefs, nb_docs=10):
+        """
+        Même interface que MoteurRecherche.search : DataFrame (doc_id, titre,
+        auteur, score) des nb_docs meilleurs documents de score non nul.
+        Avec un cache, toute modification de l'index (generation) le périme.
+        """
+        if self.cache is None:
+            return self._rechercher(mots_clefs, nb_docs)
+
+        cle = self.cache.cle(MOT.findall(self.corpus.nettoyer_text(mots_clefs)))
+        generation = self.generation
+        resultats = self.cache.obtenir(cle, generation, nb_docs)
+        if resultats is None:
+            profondeur = max(nb_docs, self.cache.profondeur)
+            resultats = self._rechercher(mots_clefs, profondeur)
+            self.cache.ranger(cle, generation, resultats, profondeur)
+            resultats = resultats.head(nb_docs).reset_index(drop=True)
+        return resultats
+
+    def _rechercher(self, mots_clefs, nb_docs):
+        """Recherche sans cache (voir search)."""
+        colonnes = ['doc_id', 'titre', 'auteur', 'score']
+        segments, idf, df, nb_total, generation = self._photo()
+
+        requete = np.zeros(len(idf), dtype=np.float64)
+        for mot in MOT.findall(self.corpus.nettoyer_text(mots_clefs)):
+            terme_id = self.corpus.id_terme(mot)
+            if terme_id is not None and terme_id < len(requete):
+                requete[terme_id] += 1
+
+        norme_requete = np.linalg.norm(requete)
+        if norme_requete == 0 or nb_docs <= 0:
+            return pd.DataFrame(columns=colonnes)
+        requete_idf = requete * idf / norme_requete
+
+        # Top-k de chaque segment, puis top-k global parmi ces candidats
+        candidats_ids, candidats_scores = [], []
+        for segment in segments:
+            scores = segment.scores(requete_idf, df, nb_total, generation)
+            meilleurs = selection_top_k(scores, nb_docs)
+            meilleurs = meilleurs[scores[meilleurs] > 0]
+            candidats_ids.extend(segment.doc_ids[i] for i in meilleurs)
+            candidats_scores.append(scores[meilleurs])
+
+        if not candidats_ids:
+            return pd.DataFrame(columns=colonnes)
+        scores = np.concatenate(candidats_scores).astype(np.float32)
+        meilleurs = selection_top_k(scores, nb_docs)
+
+        lignes = []
+        for i in meilleurs:
+            doc_id = candidats_ids[i]
+            doc = self.corpus.id2doc[doc_id]
+            lignes.append({'doc_id': doc_id, 'titre': doc.titre, 'auteur': doc.auteur, 'score': scores[i]})
+        return pd.DataFrame(lignes, columns=colonnes)
@@ -0,0 +1,231 @@
+import heapq
+from bisect import bisect_left
+
+import numpy as np
+
+from TopK import selection_top_k
+from StockageIndex import ecrire_tableau, lire_tableau
+
+
+class IndexInverse:
+    """
+    Index inversé : pour chaque terme, la liste (postings) des documents qui le
+    contiennent avec leur poids, plus une borne supérieure du poids par terme.
+
+    Les postings sont rangés en colonnes, comme une matrice CSC :
+        - indptr[t]:indptr[t+1] délimite les postings du terme t
+        - docs : indices de ligne des documents (triés pour chaque terme)
+        - poids : poids du terme dans chaque document
+        - bornes : poids maximal de chaque terme (pour l'élagage MaxScore)
+    """
+
+    def __init__(self, indptr, docs, poids, bornes, nb_docs):
+        self.indptr = indptr
+        self.docs = docs
+        self.poids = poids
+        self.bornes = bornes
+        self.nb_docs = nb_docs
+
+    @classmethod
+    def depuis_matrice(cls, matrice):
+        """Construit l'index à partir d'une matrice creuse Documents x Termes."""
+        csc = matrice.tocsc()
+        csc.sort_indices()
+
+        nb_termes = csc.shape[1]
+        bornes = np.zeros(nb_termes, dtype=np.float32)
+        non_vides = np.flatnonzero(np.diff(csc.indptr) > 0)
+        if len(non_vides) > 0:
+            bornes[non_vides] = np.maximum.reduceat(csc.data, csc.indptr[non_vides])
+
+        return cls(csc.indptr, csc.indices, csc.data.astype(np.float32), bornes, csc.shape[0])
+
+    # Noms des fichiers de l'index dans un dossier d'index sauvegardé
+    FICHIERS = ('index_indptr', 'index_docs', 'index_poids', 'index_bornes')
+
+    def sauvegarder(self, dossier, fichiers):
+        """Écrit les tableaux de l'index dans dossier (descriptions ajoutées à fichiers)."""
+        for nom, tableau in zip(self.FICHIERS, (self.indptr, self.docs, self.poids, self.bornes)):
+            ecrire_tableau(dossier, nom, tableau, fichiers)
+
+    @classmethod
+    def ouvrir(cls, dossier, fichiers, nb_docs, verifier=False):
+        """Relit un index écrit par sauvegarder, tableaux projetés en mémoire."""
+        indptr, docs, poids, bornes = (
+            lire_tableau(dossier, nom, fichiers, verifier=verifier) for nom in cls.FICHIERS
+        )
+        return cls(indptr, docs, poids, bornes, nb_docs)
+
+    def nb_termes(self):
+        return len(self.bornes)
+
+    def postings(self, terme_id):
+        """Retourne (docs, poids) pour un terme."""
+        debut, fin = self.indptr[terme_id], self.indptr[terme_id + 1]
+        return self.docs[debut:fin], self.poids[debut:fin]
+
+    def _filtre_blocs(self, autorises):
+        """Filtre passé à _blocs_terme, préparé une fois par requête."""
+        return autorises
+
+    def _blocs_terme(self, terme_id, filtre):
+        """
+        Postings d'un terme vus comme une suite de blocs par top_k : retourne
+        (derniers, charger), derniers[j] étant le plus grand document du bloc j
+        et charger(j) les listes Python (docs, poids) du bloc, restreintes aux
+        documents autorisés. Ici un seul bloc ; IndexCompresse décode ses
+        postings bloc par bloc.
+        """
+        docs, poids = self.postings(terme_id)
+        if filtre is not None:
+            gardes = filtre[docs]
+            docs, poids = docs[gardes], poids[gardes]
+        if len(docs) == 0:
+            return [], None
+        listes = (docs.tolist(), poids.tolist())
+        return [int(docs[-1])], lambda j: listes
+
+    def top_k(self, termes_ids, poids_requete, k, autorises=None):
+        """
+        Les k meilleurs documents pour une requête (termes + poids) avec
+        l'élagage dynamique MaxScore.
+
+        Les termes sont triés par contribution maximale croissante. Tant que la
+        somme des contributions maximales des premiers termes reste sous le
+        score du k-ième document, ces termes sont « non essentiels » : on ne
+        parcourt que les postings des termes essentiels et on ne consulte les
+        autres que si le document peut encore entrer dans le top k.
+
+        Les postings sont lus bloc par bloc (voir _blocs_terme) : pour un terme
+        non essentiel, seul le bloc qui peut contenir le document cherché est
+        chargé, les blocs intermédiaires sont sautés.
+
+        Retourne (indices, scores) triés par score décroissant ; à score égal,
+        le plus petit indice de document passe en premier. Seuls les documents
+        partageant au moins un terme avec la requête sont renvoyés.
+
+        autorises : masque booléen optionnel (un par document) ; les postings
+        sont d'abord restreints à ces documents.
+        """
+        vide = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if k <= 0:
+            return vide
+
+        requete = [(int(terme_id), float(poids_terme)) for terme_id, poids_terme in zip(termes_ids, poids_requete)
+                   if poids_terme > 0 and self.indptr[terme_id + 1] > self.indptr[terme_id]]
+        if not requete:
+            return vide
+
+        if len(requete) == 1:
+            # Un seul terme : le classement est celui de ses postings
+            terme_id, poids_terme = requete[0]
+            docs, poids = self.postings(terme_id)
+            if autorises is not None:
+                gardes = autorises[docs]
+                docs, poids = docs[gardes], poids[gardes]
+            scores = poids.astype(np.float64) * poids_terme
+            meilleurs = selection_top_k(scores, k)
+            return np.asarray(docs)[meilleurs].astype(np.int64), scores[meilleurs].astype(np.float32)
+
+        filtre = self._filtre_blocs(autorises)
+        termes = []
+        for terme_id, poids_terme in requete:
+            derniers, charger = self._blocs_terme(terme_id, filtre)
+            if len(derniers) == 0:
+                continue
+            borne = poids_terme * float(self.bornes[terme_id])
+            termes.append((borne, poids_terme, derniers, charger))
+        if not termes:
+            return vide
+
+        termes.sort(key=lambda t: t[0])
+        nb_termes = len(termes)
+        bornes = [t[0] for t in termes]
+        facteurs = [t[1] for t in termes]
+        derniers = [t[2] for t in termes]
+        chargeurs = [t[3] for t in termes]
+        blocs = [0] * nb_termes
+        listes_docs = [None] * nb_termes
+        listes_poids = [None] * nb_termes
+        longueurs = [0] * nb_termes
+        curseurs = [0] * nb_termes
+
+        def charger(i, j):
+            # Premier bloc non vide à partir du bloc j (terme épuisé s'il n'y en a plus)
+            docs, poids = [], []
+            while j < len(derniers[i]):
+                docs, poids = chargeurs[i](j)
+                if docs:
+                    break
+                j += 1
+            blocs[i] = j
+            listes_docs[i] = docs
+            listes_poids[i] = poids
+            longueurs[i] = len(docs)
+            curseurs[i] = 0
+
+        for i in range(nb_termes):
+            charger(i, 0)
+
+        # cumul[i] = somme des contributions maximales des termes 0..i
+        cumul = []
+        total = 0.0
+        for borne in bornes:
+            total += borne
+            cumul.append(total)
+
+        tas = []            # (score, -doc) : le pire résultat est en tête
+        seuil = -1.0
+        premier_essentiel = 0
+        fin = float('inf')
+
+        while True:
+            # Prochain document candidat : le plus petit parmi les termes essentiels
+            doc = fin
+            for i in range(premier_essentiel, nb_termes):
+                c = curseurs[i]
+                if c < longueurs[i] and listes_docs[i][c] < doc:
+                    doc = listes_docs[i][c]
+            if doc == fin:
+                break
+
+            score = 0.0
+            for i in range(premier_essentiel, nb_termes):
+                c = curseurs[i]
+                if c < longueurs[i] and listes_docs[i][c] == doc:
+                    score += facteurs[i] * listes_poids[i][c]
+                    if c + 1 < longueurs[i]:
+                        curseurs[i] = c + 1
+                    else:
+                        charger(i, blocs[i] + 1)
+
+            # Termes non essentiels, du plus fort au plus faible, tant que utile
+            for i in range(premier_essentiel - 1, -1, -1):
+                if score + cumul[i] < seuil:
+                    break
+                if longueurs[i] and listes_docs[i][-1] < doc:
+                    # Document après le bloc courant : saut au seul bloc qui peut le contenir
+                    charger(i, bisect_left(derniers[i], doc, blocs[i] + 1))
+                c = bisect_left(listes_docs[i], doc, curseurs[i], longueurs[i])
+                curseurs[i] = c
+                if c < longueurs[i] and listes_docs[i][c] == doc:
+                    score += facteurs[i] * listes_poids[i][c]
+                    curseurs[i] = c + 1
+
+            candidat = (score, -doc)
+            if len(tas) < k:
+                heapq.heappush(tas, candidat)
+            elif candidat > tas[0]:
+                heapq.heapreplace(tas, candidat)
+            else:
+                continue
+
+            if len(tas) == k:
+                seuil = tas[0][0]
+                while premier_essentiel < nb_termes and cumul[premier_essentiel] < seuil:
+                    premier_essentiel += 1
+
+        tas.sort(reverse=True)
+        indices = np.array([-d for _, d in tas], dtype=np.int64)
+        scores = np.array([s for s, _ in tas], dtype=np.float32)
+        return indices, scores
@@ -0,0 +1,180 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+from DictionnaireTermes import DictionnaireTermes
+from StockageIndex import ecrire_tableau, lire_tableau
+
+
+def trigrammes(texte):
+    """Ensemble des sous-chaînes de 3 caractères d'un texte."""
+    return {texte[i:i + 3] for i in range(len(texte) - 2)}
+
+
+class IndexTrigrammes:
+    """
+    Index des trigrammes du titre et du texte (en minuscules) de chaque
+    document, pour la recherche de sous-chaînes de Corpus.search.
+
+    Une sous-chaîne d'au moins 3 caractères n'apparaît que dans les documents
+    contenant tous ses trigrammes : on intersecte leurs postings puis on vérifie
+    seulement ces candidats. Les postings contiennent les positions du
+    DocumentStore (un remplacement garde sa position ; DocumentStore.compacter
+    les renumérote dans le même ordre), donc l'ordre des résultats est celui
+    de id2doc.
+
+    L'index suit le corpus (ajouts et remplacements). Les postings figés par
+    figer() ou relus par ouvrir() sont des tableaux projetables en mémoire ;
+    les ajouts ultérieurs vont dans des postings en mémoire à côté.
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self.dictionnaire = DictionnaireTermes.depuis_liste([])  # trigrammes figés
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.positions = np.zeros(0, dtype=np.int32)
+        self.ajouts = {}     # trigramme -> array('i') des positions ajoutées depuis
+
+        for position, doc_id in enumerate(corpus.store.doc_ids):
+            if doc_id is not None:
+                self._indexer(position)
+        corpus.abonner(self)
+
+    def _indexer(self, position):
+        store = self.corpus.store
+        texte = store.titres.lire(position).lower() + '\n' + store.textes.lire(position).lower()
+        for trigramme in trigrammes(texte):
+            postings = self.ajouts.get(trigramme)
+            if postings is None:
+                postings = self.ajouts[trigramme] = array('i')
+            postings.append(position)
+
+    # --- Notifications du corpus ---
+
+    def document_ajoute(self, doc_id):
+        # Les trigrammes de l'ancienne version restent : la vérification les écarte
+        self._indexer(self.corpus.store.positions[doc_id])
+
+    def document_supprime(self, doc_id):
+        # Rien à faire : une position supprimée est écartée à la vérification
+        pass
+
+    def positions_renumerotees(self, renumerotation):
+        """Après DocumentStore.compacter : postings renumérotés, lignes retirées écartées."""
+        nouvelles = renumerotation[np.asarray(self.positions, dtype=np.int64)]
+        garder = nouvelles >= 0
+        cumul = np.r_[0, np.cumsum(garder, dtype=np.int64)]
+        self.offsets = cumul[self.offsets]
+        self.positions = nouvelles[garder].astype(np.int32)
+
+        ajouts = {}
+        for trigramme, postings in self.ajouts.items():
+            positions = np.unique(renumerotation[np.frombuffer(postings, dtype=np.int32)])
+            positions = positions[positions >= 0]
+            if len(positions):
+                ajouts[trigramme] = array('i', positions.astype(np.int32).tobytes())
+        self.ajouts = ajouts
+
+    # --- Recherche ---
+
+    def _postings(self, trigramme):
+        parties = []
+        terme_id = self.dictionnaire.id(trigramme)
+        if terme_id >= 0:
+            parties.append(np.asarray(self.positions[self.offsets[terme_id]:self.offsets[terme_id + 1]]))
+        ajouts = self.ajouts.get(trigramme)
+        if ajouts is not None:
+            parties.append(np.frombuffer(ajouts, dtype=np.int32).copy())
+        if not parties:
+            return np.zeros(0, dtype=np.int32)
+        return np.concatenate(parties) if len(parties) > 1 else parties[0]
+
+    def candidats(self, motif):
+        """Positions (triées) pouvant contenir motif, déjà en minuscules."""
+        store = self.corpus.store
+        if len(motif) < 3:
+            return [p for p, doc_id in enumerate(store.doc_ids) if doc_id is not None]
+
+        listes = sorted((self._postings(t) for t in trigrammes(motif)), key=len)
+        resultat = np.unique(listes[0])
+        for postings in listes[1:]:
+            if len(resultat) == 0:
+                break
+            resultat = np.intersect1d(resultat, postings)
+        return resultat.tolist()
+
+    def rechercher(self, keyword):
+        """doc_id des documents dont le texte ou le titre contient keyword."""
+        store = self.corpus.store
+        motif = keyword.lower()
+        resultats = []
+        for position in self.candidats(motif):
+            doc_id = store.doc_ids[position]
+            if doc_id is None:
+                continue
+            if motif in store.textes.lire(position).lower() or motif in store.titres.lire(position).lower():
+                resultats.append(doc_id)
+        return resultats
+
+    # --- Postings figés et fichiers ---
+
+    def figer(self):
+        """Fusionne tous les postings en tableaux triés (forme sauvegardable)."""
+        tous = {}
+        for terme_id, trigramme in enumerate(self.dictionnaire):
+            tous[trigramme] = [self.positions[self.offsets[terme_id]:self.offsets[terme_id + 1]]]
+        for trigramme, ajouts in self.ajouts.items():
+            tous.setdefault(trigramme, []).append(np.frombuffer(ajouts, dtype=np.int32))
+
+        cles = sorted(tous)
+        blocs = [np.unique(np.concatenate(tous[cle])) for cle in cles]
+        offsets = np.zeros(len(cles) + 1, dtype=np.int64)
+        if blocs:
+            offsets[1:] = np.cumsum([len(b) for b in blocs])
+        self.dictionnaire = DictionnaireTermes.depuis_liste(cles)
+        self.offsets = offsets
+        self.positions = np.concatenate(blocs).astype(np.int32) if blocs else np.zeros(0, dtype=np.int32)
+        self.ajouts = {}
+
+    def sauvegarder(self, dossier):
+        """Écrit l'index figé dans dossier (fichiers bruts + entete.json)."""
+        self.figer()
+        os.makedirs(dossier, exist_ok=True)
+        fichiers = {}
+        ecrire_tableau(dossier, 'trigrammes_blob', self.dictionnaire.blob, fichiers)
+        ecrire_tableau(dossier, 'trigrammes_offsets', self.dictionnaire.offsets, fichiers)
+        ecrire_tableau(dossier, 'offsets', self.offsets, fichiers)
+        ecrire_tableau(dossier, 'positions', self.positions, fichiers)
+        entete = {
+            'format': 'IndexTrigrammes',
+            'version': 1,
+            'empreinte_corpus': self.corpus.empreinte(),
+            'fichiers': fichiers
+        }
+        with open(os.path.join(dossier, 'entete.json'), 'w', encoding='utf-8') as f:
+            json.dump(entete, f, indent=1)
+
+    @classmethod
+    def ouvrir(cls, dossier, corpus):
+        """Relit un index sauvegardé (tableaux projetés en mémoire) pour ce corpus."""
+        with open(os.path.join(dossier, 'entete.json'), encoding='utf-8') as f:
+            entete = json.load(f)
+        if entete.get('format') != 'IndexTrigrammes' or entete.get('version') != 1:
+            raise ValueError(f"Index de trigrammes {dossier} au format inconnu")
+        if entete['empreinte_corpus'] != corpus.empreinte():
+            raise ValueError(f"Index de trigrammes {dossier} périmé : il n'a pas été construit sur ce corpus")
+
+        fichiers = entete['fichiers']
+        index = cls.__new__(cls)
+        index.corpus = corpus
+        index.dictionnaire = DictionnaireTermes(
+            lire_tableau(dossier, 'trigrammes_blob', fichiers),
+            lire_tableau(dossier, 'trigrammes_offsets', fichiers)
+        )
+        index.offsets = lire_tableau(dossier, 'offsets', fichiers)
+        index.positions = lire_tableau(dossier, 'positions', fichiers)
+        index.ajouts = {}
+        corpus.abonner(index)
+        return index
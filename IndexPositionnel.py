@@ -0,0 +1,106 @@
+import re
+from array import array
+
+import numpy as np
+
+
+# Mots tels que les délimite \b dans une regex : suites maximales de \w
+MOT = re.compile(r'\w+')
+
+
+class IndexPositionnel:
+    """
+    Index positionnel du texte des documents : mot (en minuscules) -> toutes
+    ses occurrences, chacune avec
+        - l'entrée du document (voir plus bas)
+        - le rang du mot dans le texte (0, 1, 2, ...)
+        - le caractère de début de l'occurrence dans le texte
+
+    Chaque indexation d'un document crée une nouvelle « entrée » ; supprimer ou
+    remplacer un document rend simplement son ancienne entrée obsolète, sans
+    toucher aux postings. Les occurrences obsolètes sont écartées à la lecture.
+    """
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self.postings = {}               # mot -> (entrées, rangs, débuts)
+        self.position_entree = array('i')  # entrée -> position dans le DocumentStore
+        self.entree_courante = {}        # position -> entrée à jour
+
+        for position, doc_id in enumerate(corpus.store.doc_ids):
+            if doc_id is not None:
+                self._indexer(position)
+        corpus.abonner(self)
+
+    def _indexer(self, position):
+        entree = len(self.position_entree)
+        self.position_entree.append(position)
+        self.entree_courante[position] = entree
+
+        texte = self.corpus.store.textes.lire(position)
+        for rang, match in enumerate(MOT.finditer(texte)):
+            mot = match.group().lower()
+            listes = self.postings.get(mot)
+            if listes is None:
+                listes = self.postings[mot] = (array('i'), array('i'), array('q'))
+            listes[0].append(entree)
+            listes[1].append(rang)
+            listes[2].append(match.start())
+
+    # --- Notifications du corpus ---
+
+    def document_ajoute(self, doc_id):
+        self._indexer(self.corpus.store.positions[doc_id])
+
+    def document_supprime(self, doc_id):
+        self.entree_courante.pop(self.corpus.store.positions[doc_id], None)
+
+    def positions_renumerotees(self, renumerotation):
+        """
+        Après DocumentStore.compacter : les occurrences obsolètes sont retirées
+        des postings et les entrées à jour renumérotées sur les nouvelles positions.
+        """
+        courantes = np.array(sorted(self.entree_courante.values()), dtype=np.int64)
+        nouvelles = np.full(len(self.position_entree), -1, dtype=np.int64)
+        nouvelles[courantes] = np.arange(len(courantes))
+        positions = renumerotation[np.array(self.position_entree, dtype=np.int64)[courantes]]
+        self.position_entree = array('i', positions.astype(np.int32).tobytes())
+        self.entree_courante = {int(position): entree for entree, position in enumerate(positions.tolist())}
+
+        postings = {}
+        for mot, (entrees, rangs, debuts) in self.postings.items():
+            entrees = nouvelles[np.frombuffer(entrees, dtype=np.int32)]
+            garder = entrees >= 0
+            if garder.any():
+                postings[mot] = (array('i', entrees[garder].astype(np.int32).tobytes()),
+                                 array('i', np.frombuffer(rangs, dtype=np.int32)[garder].tobytes()),
+                                 array('q', np.frombuffer(debuts, dtype=np.int64)[garder].tobytes()))
+        self.postings = postings
+
+    # --- Lecture ---
+
+    def occurrences(self, mot):
+        """
+        Occurrences à jour de mot, triées par position du document puis dans
+        le texte : trois tableaux numpy (positions, rangs, débuts).
+        """
+        listes = self.postings.get(mot.lower())
+        if listes is None:
+            vide = np.zeros(0, dtype=np.int64)
+            return vide, vide, vide
+
+        entrees = np.array(listes[0], dtype=np.int64)
+        rangs = np.array(listes[1], dtype=np.int64)
+        debuts = np.array(listes[2], dtype=np.int64)
+        positions = np.array(self.position_entree, dtype=np.int64)[entrees]
+
+        courantes = np.full(len(self.position_entree), False)
+        courantes[np.fromiter(self.entree_courante.values(), dtype=np.int64)] = True
+        garder = courantes[entrees]
+        positions, rangs, debuts = positions[garder], rangs[garder], debuts[garder]
+
+        ordre = np.lexsort((debuts, positions))
+        return positions[ordre], rangs[ordre], debuts[ordre]
+
+    def nb_occurrences(self, mot):
+        return len(self.occurrences(mot)[0])
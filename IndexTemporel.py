@@ -0,0 +1,298 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix, coo_matrix
+
+from Corpus import MOT, nettoyer
+
+# Fréquences des périodes (mêmes codes que pandas / TD9)
+FREQUENCES = ('M', 'Q', 'Y')
+
+# Première période de chaque fréquence : les périodes sont numérotées depuis 1970
+ORIGINES = {'M': pd.Period('1970-01', freq='M'), 'Q': pd.Period('1970Q1', freq='Q'),
+            'Y': pd.Period('1970', freq='Y')}
+
+
+def periodes(dates, frequence):
+    """Dates (microsecondes depuis 1970, comme le DocumentStore) -> numéros de période."""
+    mois = np.asarray(dates, dtype=np.int64).astype('datetime64[us]').astype('datetime64[M]').astype(np.int64)
+    if frequence == 'Q':
+        return np.floor_divide(mois, 3)
+    if frequence == 'Y':
+        return np.floor_divide(mois, 12)
+    return mois
+
+
+class IndexTemporel:
+    """
+    Comptes Termes x Périodes (mois, trimestre ou année) sur la matrice TF
+    d'un MoteurRecherche :
+        - occurrences[t, p] : nombre d'occurrences du terme t sur la période p
+        - documents[t, p] : nombre de documents de la période p contenant t
+        - docs_par_periode, mots_par_periode : totaux pour normaliser
+    Les termes sont les colonnes de moteur.mat_TF (ids du vocabulaire du
+    moteur), suivies des mots apparus depuis dans le corpus. Comme pour
+    MoteurRecherche.agreger, un document remplacé dans le corpus avant la
+    construction de l'index y garde le texte vu par le moteur.
+
+    Les matrices sont obtenues une fois par produit creux entre la matrice TF
+    (Documents x Termes) et la matrice indicatrice Documents x Périodes. La
+    présence des termes par document est gardée en colonnes : pour un
+    ensemble de mots, un document est compté une fois, s'il contient au moins
+    un des mots.
+
+    L'index est tenu à jour par abonnement au corpus : les ajouts et
+    suppressions vont dans un petit tampon, replié dans les matrices quand il
+    atteint taille_tampon entrées. Une suppression retire exactement ce qui a
+    été compté pour le document (sa ligne TF du moteur, ou ses termes lus à
+    l'ajout) et à sa période d'origine, même si le corpus a changé depuis.
+
+    documents : doc_ids à compter (par exemple les seuls documents datés),
+    None pour tous les documents du moteur. Les documents ajoutés ensuite au
+    corpus sont toujours comptés.
+    """
+
+    def __init__(self, moteur, frequence='M', documents=None, taille_tampon=10000):
+        if frequence not in FREQUENCES:
+            raise ValueError(f"Fréquence inconnue : {frequence} (attendu : {', '.join(FREQUENCES)})")
+        if moteur.corpus is None:
+            raise ValueError("L'index temporel demande le corpus (open_index(..., corpus=corpus))")
+        corpus = moteur.corpus
+        self.corpus = corpus
+        self.vocab = moteur.vocab
+        self.frequence = frequence
+        self.taille_tampon = taille_tampon
+
+        # Lignes de la matrice TF des documents comptés, encore dans le corpus
+        store = corpus.store
+        gardes = None if documents is None else set(documents)
+        lignes_tf = [ligne for ligne, doc_id in enumerate(moteur.doc_ids)
+                     if doc_id in store.positions and (gardes is None or doc_id in gardes)]
+        doc_ids = [moteur.doc_ids[ligne] for ligne in lignes_tf]
+        positions = np.array([store.positions[doc_id] for doc_id in doc_ids], dtype=np.int64)
+        periodes_docs = periodes(store.tableau_dates()[positions], frequence)
+        self.origine = int(periodes_docs.min()) if len(doc_ids) else 0
+        colonnes = periodes_docs - self.origine
+        nb_periodes = int(colonnes.max()) + 1 if len(doc_ids) else 0
+
+        # Comptes entiers (la matrice TF du moteur est en float32)
+        tf = csr_matrix(moteur.mat_TF[lignes_tf], dtype=np.float64)
+        tf.data = np.rint(tf.data)
+        tf = tf.astype(np.int64)
+        presence = tf.copy()
+        presence.data[:] = 1
+        indicatrice = csr_matrix((np.ones(len(doc_ids), dtype=np.int64), (np.arange(len(doc_ids)), colonnes)),
+                                 shape=(len(doc_ids), nb_periodes))
+
+        self.occurrences = (tf.T @ indicatrice).tocsr()
+        self.documents = (presence.T @ indicatrice).tocsr()
+        self.docs_par_periode = np.bincount(colonnes, minlength=nb_periodes).astype(np.int64)
+        longueurs = np.asarray(tf.sum(axis=1), dtype=np.int64).ravel()
+        self.mots_par_periode = np.bincount(colonnes, weights=longueurs, minlength=nb_periodes).astype(np.int64)
+
+        # Documents comptés : ligne -> période et état, présence des termes en colonnes
+        self.lignes = {doc_id: ligne for ligne, doc_id in enumerate(doc_ids)}
+        self.periodes_lignes = array('q', periodes_docs.tolist())
+        self.vivantes = bytearray(b'\x01' * len(doc_ids))
+        self.presence = presence.astype(np.int8).tocsc()
+        # Comptes retirés à la suppression : lignes TF du moteur, puis (colonnes, comptes) des ajouts
+        self.tf_lignes = tf.astype(np.int32)
+        self._ajouts = {}
+
+        self._largeur = tf.shape[1]  # colonnes du vocabulaire du moteur
+        self._nouveaux = {}          # mot absent du vocabulaire du moteur -> colonne
+        self._colonnes = np.full(0, -1, dtype=np.int64)  # id de terme du corpus -> colonne
+        self._tampon = {}            # (colonne, période) -> [occurrences, documents]
+        self._tampon_periodes = {}   # période -> [documents, mots]
+        self._lignes_tampon = {}     # ligne -> colonnes de ses termes (pas encore dans presence)
+
+        # Documents ajoutés au corpus après la construction du moteur
+        if documents is None:
+            connus = set(moteur.doc_ids)
+            for doc_id in list(corpus.id2doc.keys()):
+                if doc_id not in connus:
+                    self._compter(doc_id, 1)
+        corpus.abonner(self)
+
+    # --- Notifications du corpus ---
+
+    def document_ajoute(self, doc_id):
+        self._compter(doc_id, 1)
+
+    def document_supprime(self, doc_id):
+        # Appelé avant le retrait : date et tokens sont encore disponibles
+        self._compter(doc_id, -1)
+
+    def _colonnes_termes(self, termes):
+        """Ids de termes du corpus -> colonnes de l'index (nouvelles colonnes pour les mots inconnus)."""
+        liste = self.corpus.liste_termes()
+        if len(self._colonnes) < len(liste):
+            self._colonnes = np.concatenate([self._colonnes,
+                                             np.full(len(liste) - len(self._colonnes), -1, dtype=np.int64)])
+        for terme_id in termes[self._colonnes[termes] < 0].tolist():
+            mot = liste[terme_id]
+            info = self.vocab.get(mot)
+            if info is not None:
+                self._colonnes[terme_id] = info['id']
+            else:
+                self._colonnes[terme_id] = self._nouveaux.setdefault(mot, self._largeur + len(self._nouveaux))
+        return self._colonnes[termes]
+
+    def _colonne(self, mot):
+        """Colonne d'un mot, None s'il n'a jamais été vu."""
+        info = self.vocab.get(mot)
+        return info['id'] if info is not None else self._nouveaux.get(mot)
+
+    def _compter(self, doc_id, signe):
+        if signe > 0:
+            store = self.corpus.store
+            ligne = len(self.periodes_lignes)
+            periode = int(periodes([store.dates[store.positions[doc_id]]], self.frequence)[0])
+            termes, comptes = np.unique(self.corpus.tokens_document(doc_id), return_counts=True)
+            colonnes = self._colonnes_termes(termes)
+            self.lignes[doc_id] = ligne
+            self.periodes_lignes.append(periode)
+            self.vivantes.append(1)
+            self._lignes_tampon[ligne] = np.sort(colonnes)
+            self._ajouts[ligne] = (colonnes, comptes)
+        else:
+            ligne = self.lignes.pop(doc_id, None)
+            if ligne is None:
+                return  # document non compté (voir documents)
+            # Ce qui a été compté pour la ligne, pas le texte actuel du corpus
+            periode = self.periodes_lignes[ligne]
+            if ligne < self.tf_lignes.shape[0]:
+                debut, fin = self.tf_lignes.indptr[ligne], self.tf_lignes.indptr[ligne + 1]
+                colonnes, comptes = self.tf_lignes.indices[debut:fin], self.tf_lignes.data[debut:fin]
+            else:
+                colonnes, comptes = self._ajouts.pop(ligne)
+            self.vivantes[ligne] = 0
+            self._lignes_tampon.pop(ligne, None)
+
+        for colonne, compte in zip(colonnes.tolist(), comptes.tolist()):
+            entree = self._tampon.setdefault((colonne, periode), [0, 0])
+            entree[0] += signe * compte
+            entree[1] += signe
+        totaux = self._tampon_periodes.setdefault(periode, [0, 0])
+        totaux[0] += signe
+        totaux[1] += signe * int(comptes.sum())
+        if len(self._tampon) >= self.taille_tampon:
+            self._replier()
+
+    def _replier(self):
+        """Ajoute le tampon aux matrices (en les agrandissant si besoin)."""
+        if not self._tampon and not self._tampon_periodes:
+            return
+        connues = list(self._tampon_periodes) + [p for _, p in self._tampon]
+        debut = min([self.origine] + connues)
+        fin = max([self.origine + len(self.docs_par_periode) - 1] + connues)
+        decalage = self.origine - debut
+        nb_periodes = fin - debut + 1
+        nb_termes = max(self.occurrences.shape[0], self._largeur + len(self._nouveaux))
+
+        cles = list(self._tampon)
+        termes = np.array([t for t, _ in cles], dtype=np.int64)
+        colonnes = np.array([p - debut for _, p in cles], dtype=np.int64)
+        valeurs = np.array(list(self._tampon.values()), dtype=np.int64).reshape(-1, 2)
+
+        def agrandir(matrice, ajouts):
+            coo = matrice.tocoo()
+            lignes = np.concatenate([coo.row, termes])
+            cols = np.concatenate([coo.col + decalage, colonnes])
+            data = np.concatenate([coo.data, ajouts])
+            resultat = coo_matrix((data, (lignes, cols)), shape=(nb_termes, nb_periodes)).tocsr()
+            resultat.sum_duplicates()
+            resultat.eliminate_zeros()
+            return resultat
+
+        self.occurrences = agrandir(self.occurrences, valeurs[:, 0])
+        self.documents = agrandir(self.documents, valeurs[:, 1])
+
+        for nom in ('docs_par_periode', 'mots_par_periode'):
+            nouveau = np.zeros(nb_periodes, dtype=np.int64)
+            ancien = getattr(self, nom)
+            nouveau[decalage:decalage + len(ancien)] = ancien
+            setattr(self, nom, nouveau)
+        for periode, (documents, mots) in self._tampon_periodes.items():
+            self.docs_par_periode[periode - debut] += documents
+            self.mots_par_periode[periode - debut] += mots
+
+        # Présence des termes des documents ajoutés
+        coo = self.presence.tocoo()
+        lignes = [coo.row] + [np.full(len(c), ligne, dtype=np.int64) for ligne, c in self._lignes_tampon.items()]
+        cols = [coo.col] + list(self._lignes_tampon.values())
+        self.presence = coo_matrix(
+            (np.ones(sum(len(c) for c in cols), dtype=np.int8), (np.concatenate(lignes), np.concatenate(cols))),
+            shape=(len(self.periodes_lignes), nb_termes)
+        ).tocsc()
+
+        self.origine = debut
+        self._tampon = {}
+        self._tampon_periodes = {}
+        self._lignes_tampon = {}
+
+    # --- Séries ---
+
+    def _documents_union(self, colonnes, debut, taille):
+        """Nombre de documents par période contenant au moins un des termes colonnes."""
+        indptr, indices = self.presence.indptr, self.presence.indices
+        parties = [indices[indptr[c]:indptr[c + 1]] for c in colonnes if c < self.presence.shape[1]]
+        parties.append(np.array([ligne for ligne, cols in self._lignes_tampon.items()
+                                 if np.isin(cols, list(colonnes)).any()], dtype=np.int64))
+        lignes = np.unique(np.concatenate(parties).astype(np.int64))
+        lignes = lignes[np.frombuffer(self.vivantes, dtype=np.uint8)[lignes] == 1]
+        periodes_docs = np.frombuffer(self.periodes_lignes, dtype=np.int64)[lignes]
+        return np.bincount(periodes_docs - debut, minlength=taille).astype(np.float64)
+
+    def serie(self, mots, mesure='documents', normaliser=False):
+        """
+        Série temporelle (pd.Series indexée par période, de la première à la
+        dernière période du corpus) d'un mot ou d'une liste de mots :
+            - mesure='documents' : nombre de documents contenant le mot (pour
+              plusieurs mots, chaque document compte une fois)
+            - mesure='occurrences' : nombre d'occurrences des mots
+        normaliser : divise par le nombre de documents (ou de mots) de la période.
+        """
+        if mesure not in ('documents', 'occurrences'):
+            raise ValueError(f"Mesure inconnue : {mesure} (attendu : documents, occurrences)")
+        if isinstance(mots, str):
+            mots = [mots]
+        termes = set()
+        for texte in mots:
+            for mot in MOT.findall(nettoyer(texte)):
+                colonne = self._colonne(mot)
+                if colonne is not None:
+                    termes.add(colonne)
+
+        colonne = 0 if mesure == 'occurrences' else 1
+        connues = list(self._tampon_periodes) + [p for t, p in self._tampon if t in termes]
+        debut = min([self.origine] + connues)
+        fin = max([self.origine + len(self.docs_par_periode) - 1] + connues)
+        valeurs = np.zeros(max(fin - debut + 1, 0), dtype=np.float64)
+        totaux = np.zeros(len(valeurs), dtype=np.float64)
+
+        decalage = self.origine - debut
+        if mesure == 'documents' and len(termes) > 1:
+            valeurs += self._documents_union(termes, debut, len(valeurs))
+        else:
+            matrice = self.occurrences if mesure == 'occurrences' else self.documents
+            lignes = [t for t in termes if t < matrice.shape[0]]
+            if lignes:
+                somme = np.asarray(matrice[lignes].sum(axis=0), dtype=np.float64).ravel()
+                valeurs[decalage:decalage + len(somme)] += somme
+            for (terme_id, periode), compte in self._tampon.items():
+                if terme_id in termes:
+                    valeurs[periode - debut] += compte[colonne]
+        totaux_base = self.mots_par_periode if mesure == 'occurrences' else self.docs_par_periode
+        totaux[decalage:decalage + len(totaux_base)] += totaux_base
+        for periode, compte in self._tampon_periodes.items():
+            totaux[periode - debut] += compte[1 if mesure == 'occurrences' else 0]
+
+        if normaliser:
+            valeurs = np.divide(valeurs, totaux, out=np.zeros_like(valeurs), where=totaux > 0)
+        else:
+            valeurs = valeurs.astype(np.int64)
+        index = pd.period_range(start=ORIGINES[self.frequence] + debut, periods=len(valeurs),
+                                freq=self.frequence)
+        return pd.Series(valeurs, index=index, name=' '.join(mots))
@@ -0,0 +1,354 @@
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from DocumentFactory import DocumentFactory
+
+# Colonnes du CSV du corpus (celles écrites depuis le TD 3)
+COLONNES_CSV = ['id', 'titre', 'auteur', 'date', 'url', 'texte', 'source']
+
+# Codes HTTP pour lesquels une requête est réessayée
+CODES_A_REESSAYER = (429, 500, 502, 503, 504)
+
+# Espaces de noms du flux Atom d'Arxiv
+ATOM = '{http://www.w3.org/2005/Atom}'
+OPENSEARCH = '{http://a9.com/-/spec/opensearch/1.1/}'
+
+
+class LimiteurDebit:
+    """Espace les requêtes vers un même service d'au moins intervalle secondes."""
+
+    def __init__(self, intervalle):
+        self.intervalle = intervalle
+        self._prochaine = 0.0
+        self._verrou = asyncio.Lock()
+
+    async def attendre(self):
+        async with self._verrou:
+            maintenant = time.monotonic()
+            if maintenant < self._prochaine:
+                await asyncio.sleep(self._prochaine - maintenant)
+                maintenant = time.monotonic()
+            self._prochaine = maintenant + self.intervalle
+
+
+class ClientHTTP:
+    """
+    Client HTTP asynchrone minimal : chaque requête (urllib, bloquante) part
+    dans un thread, après le limiteur de débit. Les erreurs réseau et les
+    codes 429 / 5xx sont réessayés nb_essais fois, avec un délai exponentiel
+    (et un peu d'aléa) ou le délai Retry-After donné par le serveur.
+    """
+
+    def __init__(self, intervalle=1.0, nb_essais=4, delai_initial=0.5, delai_max=30.0,
+                 timeout=30, en_tetes=None):
+        if nb_essais < 1:
+            raise ValueError("nb_essais doit être au moins 1")
+        self.limiteur = LimiteurDebit(intervalle)
+        self.nb_essais = nb_essais
+        self.delai_initial = delai_initial
+        self.delai_max = delai_max
+        self.timeout = timeout
+        self.en_tetes = dict(en_tetes or {})
+        self.nb_requetes = 0
+        self.nb_reessais = 0
+
+    def _ouvrir(self, url, donnees, en_tetes, traitement):
+        requete = urllib.request.Request(url, data=donnees, headers={**self.en_tetes, **(en_tetes or {})})
+        with urllib.request.urlopen(requete, timeout=self.timeout) as reponse:
+            # traitement lit la réponse au fil de l'eau (XML) ; sinon on la lit en entier
+            return traitement(reponse) if traitement is not None else reponse.read()
+
+    async def lire(self, url, donnees=None, en_tetes=None, traitement=None):
+        """Contenu de url (octets), ou résultat de traitement(réponse)."""
+        for essai in range(self.nb_essais):
+            await self.limiteur.attendre()
+            self.nb_requetes += 1
+            try:
+                return await asyncio.to_thread(self._ouvrir, url, donnees, en_tetes, traitement)
+            except urllib.error.HTTPError as erreur:
+                if erreur.code not in CODES_A_REESSAYER or essai == self.nb_essais - 1:
+                    raise
+                delai = self._delai(essai, erreur.headers.get('Retry-After'))
+            except (urllib.error.URLError, TimeoutError, ConnectionError):
+                if essai == self.nb_essais - 1:
+                    raise
+                delai = self._delai(essai)
+            self.nb_reessais += 1
+            await asyncio.sleep(delai)
+
+    def _delai(self, essai, retry_after=None):
+        if retry_after is not None and str(retry_after).strip().isdigit():
+            return min(float(retry_after), self.delai_max)
+        delai = self.delai_initial * 2 ** essai
+        return min(delai + random.uniform(0, delai / 2), self.delai_max)
+
+    async def lire_json(self, url, donnees=None, en_tetes=None):
+        return json.loads(await self.lire(url, donnees, en_tetes))
+
+
+class SourceReddit:
+    """
+    Recherche Reddit par pages de taille_page posts (curseur « after » de
+    l'API JSON). Avec client_id / client_secret, un jeton OAuth est demandé
+    une fois et les requêtes passent par oauth.reddit.com.
+    Les posts sans texte sont ignorés, comme dans app.py.
+    """
+
+    nom = 'reddit'
+
+    def __init__(self, mot_clef, limite=100, taille_page=100, client_id=None, client_secret=None,
+                 user_agent='MoteurRechercheInfoMaison', url_base=None, url_jeton=None, client=None):
+        self.mot_clef = mot_clef
+        self.limite = limite
+        self.taille_page = min(taille_page, 100)
+        self.client_id = client_id
+        self.client_secret = client_secret
+        oauth = client_id is not None and client_secret is not None
+        self.url_base = url_base or ('https://oauth.reddit.com' if oauth else 'https://www.reddit.com')
+        self.url_jeton = url_jeton or 'https://www.reddit.com/api/v1/access_token'
+        # API Reddit : 100 requêtes par minute avec OAuth
+        self.client = client or ClientHTTP(intervalle=0.6 if oauth else 2.0, en_tetes={'User-Agent': user_agent})
+
+    async def _jeton(self):
+        identifiants = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+        reponse = await self.client.lire_json(
+            self.url_jeton, donnees=b'grant_type=client_credentials',
+            en_tetes={'Authorization': f'Basic {identifiants}',
+                      'Content-Type': 'application/x-www-form-urlencoded'}
+        )
+        return reponse['access_token']
+
+    async def pages(self):
+        """Produit les pages de documents (listes de dictionnaires)."""
+        en_tetes = {}
+        if self.client_id is not None and self.client_secret is not None:
+            en_tetes['Authorization'] = f'Bearer {await self._jeton()}'
+
+        apres, nb_vus = None, 0
+        while nb_vus < self.limite:
+            parametres = {'q': self.mot_clef, 'limit': min(self.taille_page, self.limite - nb_vus),
+                          'sort': 'new', 'raw_json': 1}
+            if apres is not None:
+                parametres['after'] = apres
+            url = f"{self.url_base}/r/all/search.json?{urllib.parse.urlencode(parametres)}"
+            donnees = (await self.client.lire_json(url, en_tetes=en_tetes))['data']
+
+            posts = [enfant['data'] for enfant in donnees.get('children', [])]
+            nb_vus += len(posts)
+            page = [self._document(post) for post in posts if post.get('selftext')]
+            if page:
+                yield page
+            apres = donnees.get('after')
+            if not posts or apres is None:
+                break
+
+    @staticmethod
+    def _document(post):
+        return {
+            'titre': post.get('title', ''),
+            'auteur': post.get('author') or 'inconnu',
+            'date': datetime.fromtimestamp(post.get('created_utc', 0), tz=timezone.utc).strftime('%Y-%m-%d'),
+            'url': post.get('url', ''),
+            'texte': post['selftext'].replace('\n', ' '),
+            'source': 'reddit',
+            'extra': post.get('num_comments', 0),
+        }
+
+
+class SourceArxiv:
+    """
+    Recherche Arxiv par pages de taille_page articles (paramètre start de
+    l'API). Chaque page est analysée au fil de l'eau (iterparse) : un article
+    est converti puis libéré dès sa balise fermée, sans arbre XML complet.
+    La première page donne le nombre total de résultats ; les suivantes sont
+    demandées en parallèle (au plus simultanees), au rythme du limiteur.
+    """
+
+    nom = 'arxiv'
+
+    def __init__(self, mot_clef, limite=100, taille_page=100, simultanees=2,
+                 url_base='http://export.arxiv.org/api/query', client=None):
+        self.mot_clef = mot_clef
+        self.limite = limite
+        self.taille_page = taille_page
+        self.simultanees = simultanees
+        self.url_base = url_base
+        # Arxiv demande 3 secondes entre deux requêtes
+        self.client = client or ClientHTTP(intervalle=3.0)
+
+    def _url(self, debut, nombre):
+        parametres = {'search_query': f'all:{self.mot_clef}', 'start': debut, 'max_results': nombre}
+        return f"{self.url_base}?{urllib.parse.urlencode(parametres)}"
+
+    @staticmethod
+    def analyser_flux(flux):
+        """Flux Atom -> (documents, nombre total de résultats annoncé)."""
+        documents, total = [], None
+        for _, element in ET.iterparse(flux, events=('end',)):
+            if element.tag == OPENSEARCH + 'totalResults':
+                total = int(element.text or 0)
+            elif element.tag == ATOM + 'entry':
+                documents.append(SourceArxiv._document(element))
+                element.clear()
+        return documents, total
+
+    @staticmethod
+    def _document(entree):
+        def texte(balise):
+            return (entree.findtext(ATOM + balise) or '').strip()
+
+        auteurs = [nom.strip() for nom in
+                   (a.findtext(ATOM + 'name') or '' for a in entree.findall(ATOM + 'author')) if nom.strip()]
+        return {
+            'titre': ' '.join(texte('title').split()),
+            'auteur': ', '.join(auteurs) if auteurs else 'inconnu',
+            'date': texte('published')[:10],
+            'url': texte('id'),
+            'texte': texte('summary').replace('\n', ' '),
+            'source': 'arxiv',
+            'extra': auteurs[1:],
+        }
+
+    async def _page(self, debut, nombre):
+        return await self.client.lire(self._url(debut, nombre), traitement=self.analyser_flux)
+
+    async def pages(self):
+        """Produit les pages de documents (listes de dictionnaires), dans l'ordre."""
+        premiere, total = await self._page(0, min(self.taille_page, self.limite))
+        if premiere:
+            yield premiere
+        if len(premiere) < min(self.taille_page, self.limite):
+            return
+        fin = self.limite if total is None else min(self.limite, total)
+
+        debuts = list(range(self.taille_page, fin, self.taille_page))
+        semaphore = asyncio.Semaphore(self.simultanees)
+
+        async def page(debut):
+            async with semaphore:
+                return await self._page(debut, min(self.taille_page, fin - debut))
+
+        taches = [asyncio.create_task(page(debut)) for debut in debuts]
+        try:
+            for tache in taches:
+                documents, _ = await tache
+                if documents:
+                    yield documents
+        finally:
+            for tache in taches:
+                tache.cancel()
+
+
+class PipelineIngestion:
+    """
+    Ingestion concurrente de plusieurs sources dans un Corpus :
+        - chaque source parcourt ses pages dans sa propre tâche asyncio et les
+          dépose dans une file bornée (une source rapide attend que les
+          documents soient consommés)
+        - les documents sont créés par DocumentFactory et ajoutés au corpus
+          par lots de taille_lot
+        - chaque lot est ajouté à la fin de chemin_csv (en-tête écrit
+          seulement si le fichier n'existe pas) : rien n'est réécrit
+    Les URL déjà présentes dans le corpus sont ignorées (dedoublonner).
+    """
+
+    def __init__(self, corpus, sources, chemin_csv=None, taille_lot=500, longueur_min=0,
+                 dedoublonner=True, taille_file=8):
+        self.corpus = corpus
+        self.sources = list(sources)
+        self.chemin_csv = chemin_csv
+        self.taille_lot = taille_lot
+        self.longueur_min = longueur_min
+        self.dedoublonner = dedoublonner
+        self.taille_file = taille_file
+        self.nb_ajoutes = {}       # source -> documents ajoutés au corpus
+        self.nb_ignores = 0        # doublons et textes trop courts
+        self.erreurs = {}          # source -> exception qui l'a arrêtée
+
+    def _prochain_id(self):
+        ids = [doc_id for doc_id in self.corpus.id2doc if isinstance(doc_id, int)]
+        prochain = max(ids, default=-1) + 1
+        if self.chemin_csv is not None and os.path.exists(self.chemin_csv) and os.path.getsize(self.chemin_csv) > 0:
+            for morceau in pd.read_csv(self.chemin_csv, usecols=['id'], chunksize=100000):
+                if len(morceau):
+                    prochain = max(prochain, int(morceau['id'].max()) + 1)
+        return prochain
+
+    async def _produire(self, source, file):
+        try:
+            async for page in source.pages():
+                await file.put(page)
+        except Exception as erreur:
+            # Une source en échec n'arrête pas les autres
+            self.erreurs[source.nom] = erreur
+        finally:
+            await file.put(None)
+
+    def _ecrire_lot(self, lignes):
+        if self.chemin_csv is None or not lignes:
+            return
+        en_tete = not os.path.exists(self.chemin_csv) or os.path.getsize(self.chemin_csv) == 0
+        pd.DataFrame(lignes, columns=COLONNES_CSV).to_csv(self.chemin_csv, mode='a', header=en_tete, index=False)
+
+    def _ajouter_lot(self, lot, prochain_id):
+        lignes = []
+        for enregistrement in lot:
+            document = DocumentFactory.create(
+                enregistrement['source'], enregistrement['titre'], enregistrement['auteur'],
+                enregistrement['date'], enregistrement['url'], enregistrement['texte'],
+                enregistrement.get('extra')
+            )
+            self.corpus.add_document_obj(prochain_id, document)
+            lignes.append([prochain_id] + [enregistrement[c] for c in COLONNES_CSV[1:]])
+            self.nb_ajoutes[enregistrement['source']] = self.nb_ajoutes.get(enregistrement['source'], 0) + 1
+            prochain_id += 1
+        self._ecrire_lot(lignes)
+        return prochain_id
+
+    async def executer(self):
+        """Lance toutes les sources et retourne le nombre de documents ajoutés."""
+        file = asyncio.Queue(maxsize=self.taille_file)
+        producteurs = [asyncio.create_task(self._produire(source, file)) for source in self.sources]
+
+        urls = {document.url for document in self.corpus.id2doc.values()} if self.dedoublonner else set()
+        prochain_id = self._prochain_id()
+        lot, restants = [], len(producteurs)
+        while restants:
+            page = await file.get()
+            if page is None:
+                restants -= 1
+                continue
+            for enregistrement in page:
+                if len(str(enregistrement['texte'])) < self.longueur_min or (
+                        self.dedoublonner and enregistrement['url'] in urls):
+                    self.nb_ignores += 1
+                    continue
+                urls.add(enregistrement['url'])
+                lot.append(enregistrement)
+                if len(lot) >= self.taille_lot:
+                    prochain_id = self._ajouter_lot(lot, prochain_id)
+                    lot = []
+        self._ajouter_lot(lot, prochain_id)
+        await asyncio.gather(*producteurs)
+        return sum(self.nb_ajoutes.values())
+
+
+def ingerer(corpus, sources, chemin_csv=None, **options):
+    """
+    Version bloquante de PipelineIngestion(...).executer() pour les scripts
+    (dans un notebook, où une boucle tourne déjà : await pipeline.executer()).
+    """
+    pipeline = PipelineIngestion(corpus, sources, chemin_csv, **options)
+    asyncio.run(pipeline.executer())
+    return pipeline
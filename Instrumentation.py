@@ -0,0 +1,251 @@
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+
+
+class StatistiquesMemoire:
+    """
+    Sortie qui garde en mémoire, pour chaque étape chronométrée, le nombre
+    d'appels, la durée totale, le minimum, le maximum et les taille_echantillon
+    dernières durées (pour les percentiles) ; et la valeur de chaque compteur.
+    """
+
+    def __init__(self, taille_echantillon=1000):
+        self.taille_echantillon = taille_echantillon
+        self.etapes = {}     # nom -> [nb, total, min, max, deque des dernières durées]
+        self.compteurs = Counter()
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, nom, duree):
+        with self._verrou:
+            etape = self.etapes.get(nom)
+            if etape is None:
+                etape = self.etapes[nom] = [0, 0.0, duree, duree, deque(maxlen=self.taille_echantillon)]
+            etape[0] += 1
+            etape[1] += duree
+            etape[2] = min(etape[2], duree)
+            etape[3] = max(etape[3], duree)
+            etape[4].append(duree)
+
+    def compter(self, nom, valeur):
+        with self._verrou:
+            self.compteurs[nom] += valeur
+
+    def vider(self):
+        with self._verrou:
+            self.etapes.clear()
+            self.compteurs.clear()
+
+    def resume(self):
+        """DataFrame d'une ligne par étape (durées en millisecondes)."""
+        colonnes = ['etape', 'nb', 'total_ms', 'moyenne_ms', 'min_ms', 'max_ms', 'p50_ms', 'p95_ms', 'p99_ms']
+        with self._verrou:
+            lignes = []
+            for nom, (nb, total, minimum, maximum, durees) in sorted(self.etapes.items()):
+                p50, p95, p99 = np.percentile(np.array(durees), [50, 95, 99]) * 1000
+                lignes.append((nom, nb, total * 1000, total / nb * 1000, minimum * 1000, maximum * 1000, p50, p95, p99))
+        return pd.DataFrame(lignes, columns=colonnes)
+
+    def prometheus(self, prefixe='moteur', etiquettes=None):
+        """
+        Export au format texte de Prometheus (résumés par étape et compteurs).
+        etiquettes : dictionnaire d'étiquettes ajoutées à chaque ligne (par
+        exemple {'processus': pid}).
+        """
+        extra = ''.join(f',{cle}="{valeur}"' for cle, valeur in (etiquettes or {}).items())
+        lignes = [f'# TYPE {prefixe}_etape_secondes summary']
+        with self._verrou:
+            for nom, (nb, total, _, _, durees) in sorted(self.etapes.items()):
+                for quantile in (0.5, 0.95, 0.99):
+                    valeur = float(np.quantile(np.array(durees), quantile))
+                    lignes.append(f'{prefixe}_etape_secondes{{etape="{nom}",quantile="{quantile}"{extra}}} {valeur:.9g}')
+                lignes.append(f'{prefixe}_etape_secondes_sum{{etape="{nom}"{extra}}} {total:.9g}')
+                lignes.append(f'{prefixe}_etape_secondes_count{{etape="{nom}"{extra}}} {nb}')
+            lignes.append(f'# TYPE {prefixe}_compteur_total counter')
+            for nom, valeur in sorted(self.compteurs.items()):
+                lignes.append(f'{prefixe}_compteur_total{{nom="{nom}"{extra}}} {valeur}')
+        return '\n'.join(lignes) + '\n'
+
+
+class SortieLogging:
+    """Sortie qui écrit chaque mesure dans un logger (niveau DEBUG par défaut)."""
+
+    def __init__(self, logger=None, niveau=logging.DEBUG):
+        self.logger = logger or logging.getLogger('moteur')
+        self.niveau = niveau
+
+    def enregistrer(self, nom, duree):
+        self.logger.log(self.niveau, "%s : %.3f ms", nom, duree * 1000)
+
+    def compter(self, nom, valeur):
+        self.logger.log(self.niveau, "%s += %s", nom, valeur)
+
+
+class _Chrono:
+    """Contexte qui mesure la durée d'une étape et la transmet aux sorties."""
+
+    __slots__ = ('sorties', 'nom', 'debut')
+
+    def __init__(self, sorties, nom):
+        self.sorties = sorties
+        self.nom = nom
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        duree = time.perf_counter() - self.debut
+        for sortie in self.sorties:
+            sortie.enregistrer(self.nom, duree)
+        return False
+
+
+class _Inactif:
+    """Contexte vide partagé : une étape non mesurée ne coûte qu'un appel."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+
+_INACTIF = _Inactif()
+
+
+class Instrumentation:
+    """
+    Chronomètres par étape, compteurs et suivi de progression, transmis à des
+    sorties interchangeables (StatistiquesMemoire, SortieLogging ou tout objet
+    avec enregistrer(nom, duree) et compter(nom, valeur)).
+
+        stats = StatistiquesMemoire()
+        moteur = MoteurRecherche(corpus, instrumentation=Instrumentation([stats]))
+        ...
+        stats.resume()
+
+    progression : fonction optionnelle appelée avec (etape, fait, total) pendant
+    les traitements longs (total vaut None s'il n'est pas connu à l'avance).
+    Sans sortie ni progression, l'instrumentation ne fait rien.
+    """
+
+    def __init__(self, sorties=None, progression=None):
+        self.sorties = list(sorties or [])
+        self.progression = progression
+
+    @property
+    def actif(self):
+        return bool(self.sorties)
+
+    def etape(self, nom):
+        """Contexte qui chronomètre l'étape nom."""
+        if not self.sorties:
+            return _INACTIF
+        return _Chrono(self.sorties, nom)
+
+    def compter(self, nom, valeur=1):
+        for sortie in self.sorties:
+            sortie.compter(nom, valeur)
+
+    def progresser(self, etape, fait, total=None):
+        if self.progression is not None:
+            self.progression(etape, fait, total)
+
+
+# Instrumentation par défaut : aucune mesure
+INACTIVE = Instrumentation()
+
+
+class Profileur:
+    """
+    Profilage à la demande d'un bloc de code :
+        - mode='cprofile' : profil déterministe (chaque appel de fonction)
+        - mode='echantillonnage' : un thread relève la pile du thread profilé
+          toutes les intervalle secondes ; coût faible et indépendant du
+          nombre d'appels, adapté aux boucles chaudes. Le thread d'échantillonnage
+          doit reprendre le GIL : les échantillons tombent plus souvent là où
+          le code le rend (allocations numpy, E/S), à croiser avec cProfile
+
+        with Profileur('echantillonnage') as profil:
+            moteur.search_many(requetes)
+        print(profil.rapport(20))
+    """
+
+    MODES = ('cprofile', 'echantillonnage')
+
+    def __init__(self, mode='cprofile', intervalle=0.001):
+        if mode not in self.MODES:
+            raise ValueError(f"Mode de profilage inconnu : {mode} (attendu : {', '.join(self.MODES)})")
+        self.mode = mode
+        self.intervalle = intervalle
+        self.profil = None
+        self.propres = Counter()     # fonction en haut de pile -> nombre d'échantillons
+        self.cumules = Counter()     # fonction présente dans la pile -> nombre d'échantillons
+        self.nb_echantillons = 0
+        self._arret = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.mode == 'cprofile':
+            self.profil = cProfile.Profile()
+            self.profil.enable()
+        else:
+            cible = threading.get_ident()
+            self._arret.clear()
+            self._thread = threading.Thread(target=self._echantillonner, args=(cible,), daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exception):
+        if self.mode == 'cprofile':
+            self.profil.disable()
+        else:
+            self._arret.set()
+            self._thread.join()
+        return False
+
+    def _echantillonner(self, cible):
+        while not self._arret.wait(self.intervalle):
+            cadre = sys._current_frames().get(cible)
+            if cadre is None:
+                continue
+            self.nb_echantillons += 1
+            vues = set()
+            premier = True
+            while cadre is not None:
+                code = cadre.f_code
+                fonction = f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+                if premier:
+                    self.propres[fonction] += 1
+                    premier = False
+                if fonction not in vues:
+                    # Une fonction récursive ne compte qu'une fois par échantillon
+                    vues.add(fonction)
+                    self.cumules[fonction] += 1
+                cadre = cadre.f_back
+
+    def rapport(self, n=20, tri='cumulative'):
+        """
+        Les n fonctions les plus coûteuses : texte de pstats (cprofile) ou
+        DataFrame (fonction, propre, cumule, en parts des échantillons).
+        """
+        if self.mode == 'cprofile':
+            flux = io.StringIO()
+            pstats.Stats(self.profil, stream=flux).sort_stats(tri).print_stats(n)
+            return flux.getvalue()
+        total = max(self.nb_echantillons, 1)
+        cle = self.propres if tri == 'propre' else self.cumules
+        lignes = [(fonction, self.propres[fonction] / total, self.cumules[fonction] / total)
+                  for fonction, _ in cle.most_common(n)]
+        return pd.DataFrame(lignes, columns=['fonction', 'propre', 'cumule'])
@@ -1,25 +1,175 @@
 import pandas as pd
 import numpy as np
 import re
+import os
+import json
+import shutil
 from scipy.sparse import csr_matrix
 from Corpus import Corpus
+from TopK import selection_top_k
+from IndexInverse import IndexInverse
+from IndexCompresse import IndexCompresse
+from DictionnaireTermes import DictionnaireTermes, DictionnaireFrontal, Vocabulaire
+from StockageIndex import ecrire_tableau, lire_tableau
+from FiltresDocuments import FiltresDocuments
+from RequetesBooleennes import IndexBooleen, analyser_requete, mots_positifs
+from AgregationGroupes import AgregationGroupes, MESURES, mesures_comparaison
+from RechercheSemantique import EspaceSemantique
+from ExpansionTermes import ExpansionTermes, JOKER, nettoyer_motif
+from Instrumentation import INACTIVE
+
+# Backends de recherche disponibles derrière search()
+BACKENDS = ('matrice', 'index', 'compresse')
+
+# Pondérations disponibles pour le calcul des scores
+PONDERATIONS = ('tfidf', 'bm25', 'bm25+')
+
+# Nombre maximal de termes d'un préfixe ou joker (« ame* ») ajoutés à la requête
+MAX_EXPANSION = 50
+
+# Format des index sauvegardés par save_index (à incrémenter si la disposition change)
+FORMAT_INDEX = 'MoteurRecherche'
+VERSION_INDEX = 1
+
 
 class MoteurRecherche:
-    def __init__(self, corpus: Corpus):
+    def __init__(self, corpus: Corpus, backend='matrice', ponderation='tfidf',
+                 k1=1.2, b=0.75, delta=1.0, nb_processus=1, cache=None, instrumentation=None):
         """
         Initialisation du moteur de recherche avec un corpus généré dans corpus.csv
         et construction automatique de la matrice Documents x Termes.
+
+        backend :
+            - 'matrice' : produit matrice-vecteur sur tous les documents
+            - 'index' : index inversé avec élagage MaxScore (seuls les
+              documents partageant un terme avec la requête sont évalués)
+            - 'compresse' : même recherche sur un index compressé (postings
+              en variable byte, poids sur un octet, voir IndexCompresse) et
+              vocabulaire à codage frontal au lieu du dictionnaire Python
+
+        ponderation :
+            - 'tfidf' : cosinus entre la requête et les lignes TFxIDF
+            - 'bm25' : Okapi BM25 (k1 règle la saturation du TF, b la
+              normalisation par la longueur du document)
+            - 'bm25+' : BM25 avec un plancher delta pour les documents longs
+
+        nb_processus : nombre de processus pour tokeniser les documents pas
+        encore analysés (1 : séquentiel, None : un par cœur). Les matrices
+        obtenues sont identiques quel que soit ce nombre.
+
+        cache : CacheRequetes optionnel (un par moteur) pour les requêtes répétées
+
+        instrumentation : Instrumentation optionnelle (durée de chaque étape de
+        la construction et de la recherche, progression)
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend inconnu : {backend} (attendu : {', '.join(BACKENDS)})")
+        if ponderation not in PONDERATIONS:
+            raise ValueError(f"Pondération inconnue : {ponderation} (attendu : {', '.join(PONDERATIONS)})")
+
         self.corpus = corpus
+        self.backend = backend
+        self.ponderation = ponderation
+        self.k1 = k1
+        self.b = b
+        self.delta = delta
+        self.nb_processus = nb_processus
         self.vocab = {}          # Dictionnaire du vocabulaire 
         self.mat_TF = None       # Matrice Term Frequency
         self.mat_TFxIDF = None   # Matrice TFxIDF
         self.idf = None          # Vecteur IDF (optionnel)
+        self.doc_ids = []        # doc_id de chaque ligne des matrices
+        self.mat_normalisee = None  # Lignes TFxIDF normalisées (norme L2)
+        self.normes = None          # Normes L2 des lignes TFxIDF
+        self.mat_BM25 = None        # Poids BM25 précalculés
+        self.longueurs_docs = None  # Nombre de mots de chaque document
+        self.longueur_moyenne = 0.0
+        self.mat_scores = None      # Matrice utilisée par search()
+        self.index_inverse = None   # Index inversé (backends 'index' et 'compresse')
+        self.cache = cache          # Cache des résultats (CacheRequetes ou None)
+        self.filtres = None         # Métadonnées pour les filtres (construites au besoin)
+        self.index_booleen = None   # Index positionnel compressé (search_booleen)
+        self.agregations = {}       # Matrices Groupes x Termes par clé (agreger)
+        self.semantique = None      # Espace latent (construire_semantique)
+        self.expansion = None       # Préfixes, jokers et suggestions (construits au besoin)
+        self.max_expansion = MAX_EXPANSION
+        self.instrumentation = instrumentation if instrumentation is not None else INACTIVE
+        mesure = self.instrumentation.etape
 
         # Construction du vocabulaire et des matrices
-        self._build_vocabulary()
-        self._build_TF_matrix()
-        self._build_TFxIDF_matrix()
+        with mesure('construction'):
+            self._build_vocabulary()
+            self._build_TF_matrix()
+            with mesure('construction.idf'):
+                self._build_TFxIDF_matrix()
+            with mesure('construction.normalisation'):
+                self._build_normalized_matrix()
+
+            if self.ponderation == 'tfidf':
+                self.mat_scores = self.mat_normalisee
+            else:
+                with mesure('construction.bm25'):
+                    self._build_BM25_matrix()
+                self.mat_scores = self.mat_BM25
+
+            if self.backend == 'index':
+                with mesure('construction.index_inverse'):
+                    self.index_inverse = IndexInverse.depuis_matrice(self.mat_scores)
+            elif self.backend == 'compresse':
+                with mesure('construction.index_inverse'):
+                    self.index_inverse = IndexCompresse.depuis_matrice(self.mat_scores, tf=self.mat_TF)
+                    # Les matrices sont construites : le vocabulaire peut être compacté
+                    termes, total_occurrences, document_frequency = self._termes_vocabulaire()
+                    self.vocab = Vocabulaire(DictionnaireFrontal.depuis_liste(termes),
+                                             total_occurrences, document_frequency)
+                    # Les matrices creuses ne sont plus gardées : l'index suffit à
+                    # search et search_many, et elles se reconstruisent au besoin
+                    self.mat_TF = self.mat_TFxIDF = self.mat_scores = None
+                    self.mat_normalisee = self.mat_BM25 = None
+
+    def _matrices_dans_index(self):
+        """Vrai si les matrices ne sont pas gardées mais reconstruites depuis l'index ('compresse')."""
+        return self.backend == 'compresse' and getattr(getattr(self, 'index_inverse', None), 'tf', None) is not None
+
+    @property
+    def mat_TF(self):
+        """
+        Matrice TF (nb_docs x nb_mots). Avec le backend 'compresse', elle n'est
+        pas gardée en mémoire : chaque accès la reconstruit à partir des TF de
+        l'index (agreger, construire_semantique, save_index, IndexTemporel).
+        """
+        if self._mat_TF is None and self._matrices_dans_index():
+            return self.index_inverse.matrice_tf()
+        return self._mat_TF
+
+    @mat_TF.setter
+    def mat_TF(self, matrice):
+        self._mat_TF = matrice
+
+    @property
+    def mat_TFxIDF(self):
+        """Matrice TFxIDF ; reconstruite à chaque accès avec le backend 'compresse' (voir mat_TF)."""
+        if self._mat_TFxIDF is None and self._matrices_dans_index():
+            return self._ponderer_idf(self.index_inverse.matrice_tf())
+        return self._mat_TFxIDF
+
+    @mat_TFxIDF.setter
+    def mat_TFxIDF(self, matrice):
+        self._mat_TFxIDF = matrice
+
+    @property
+    def mat_scores(self):
+        """Matrice des poids de search ; reconstruite à chaque accès avec le backend 'compresse' (voir mat_TF)."""
+        if self._mat_scores is None and self._matrices_dans_index():
+            tf = self.index_inverse.matrice_tf()
+            if self.ponderation == 'tfidf':
+                return self._normaliser_lignes(self._ponderer_idf(tf))[0]
+            return self._ponderer_bm25(tf)
+        return self._mat_scores
+
+    @mat_scores.setter
+    def mat_scores(self, matrice):
+        self._mat_scores = matrice
     
     def nettoyer_text(self, text):
         """Nettoyage du texte du corpus"""
@@ -33,82 +183,85 @@ class MoteurRecherche:
     
     def _build_vocabulary(self):
         """
-        Construction du vocabulaire :
-        - On fait un découpage par  les textes en mots
+        Construction du vocabulaire à partir du cache d'analyse du corpus
+        (chaque document n'est tokenisé qu'une fois) :
         - retrait des doublons
         - tri alphabétique
         - stockage de l'id unique, du total d'occurrences
         """
-        all_words = []
-        word_to_count = {}  #  nb de mot total d'occurrences
-        
-        for doc_id, doc in self.corpus.id2doc.items():
-            texte_net = self.nettoyer_text(doc.texte)
-            mots = re.findall(r'\b\w+\b', texte_net)
-            all_words.extend(mots)
-            
-            for mot in mots:
-                word_to_count[mot] = word_to_count.get(mot, 0) + 1
-        
+        # Ordre des lignes des matrices : doc_id triés
+        self.doc_ids = sorted(self.corpus.id2doc.keys())
+        with self.instrumentation.etape('construction.nettoyage'):
+            # Nettoyage et tokenisation des documents pas encore analysés
+            self.corpus.analyser(self.doc_ids, self.nb_processus,
+                                 progression=self.instrumentation.progression)
+        with self.instrumentation.etape('construction.vocabulaire'):
+            self._construire_vocabulaire()
+
+    def _construire_vocabulaire(self):
+        self._lignes, self._termes_cache = self.corpus.tokens_concatenes(self.doc_ids)
+
+        liste_termes = self.corpus.liste_termes()
+        word_to_count = np.bincount(self._termes_cache, minlength=len(liste_termes))
+
         # Mots uniques triés
-        mots_uniques = sorted(set(all_words))
+        presents = np.flatnonzero(word_to_count)
+        mots_uniques = sorted((liste_termes[i], i) for i in presents)
+
+        # Correspondance id du cache -> id du vocabulaire (ordre alphabétique)
+        self._cache_vers_vocab = np.full(len(liste_termes), -1, dtype=np.int64)
         
         # Dictionnaire vocab : mot -> infos
-        for idx, mot in enumerate(mots_uniques):
+        for idx, (mot, terme_cache) in enumerate(mots_uniques):
+            self._cache_vers_vocab[terme_cache] = idx
             self.vocab[mot] = {
                 'id': idx,
-                'total_occurrences': word_to_count[mot],
+                'total_occurrences': int(word_to_count[terme_cache]),
                 'document_frequency': 0
             }
     
+    def _termes_vocabulaire(self):
+        """
+        Termes du vocabulaire dans l'ordre des ids (alphabétique) et tableaux
+        total_occurrences, document_frequency correspondants.
+        """
+        if isinstance(self.vocab, Vocabulaire):
+            return (list(self.vocab.dictionnaire), np.asarray(self.vocab.total_occurrences, dtype=np.int64),
+                    np.asarray(self.vocab.document_frequency, dtype=np.int64))
+        nb_termes = len(self.vocab)
+        termes = [None] * nb_termes
+        total_occurrences = np.zeros(nb_termes, dtype=np.int64)
+        document_frequency = np.zeros(nb_termes, dtype=np.int64)
+        for mot, info in self.vocab.items():
+            termes[info['id']] = mot
+            total_occurrences[info['id']] = info['total_occurrences']
+            document_frequency[info['id']] = info['document_frequency']
+        return termes, total_occurrences, document_frequency
+
     def _build_TF_matrix(self):
         """
         Construction de la matrice TF (Term Frequency)
         Dimensions : nb_docs x nb_mots
         """
-        nb_docs = len(self.corpus.id2doc)
+        nb_docs = len(self.doc_ids)
         nb_mots = len(self.vocab)
-        
-        rows = []
-        cols = []
-        data = []
-        
-        # Mapping doc_id par indice de ligne
-        doc_ids = sorted(self.corpus.id2doc.keys())
-        doc_id_to_index = {doc_id: idx for idx, doc_id in enumerate(doc_ids)}
-        
-        # Parcours des documents
-        for doc_id, doc in self.corpus.id2doc.items():
-            doc_idx = doc_id_to_index[doc_id]
-            texte_net = self.nettoyer_text(doc.texte)
-            mots = re.findall(r'\b\w+\b', texte_net)
-            
-            word_counts = {}
-            for mot in mots:
-                if mot in self.vocab:
-                    word_counts[mot] = word_counts.get(mot, 0) + 1
-            
-            for mot, count in word_counts.items():
-                word_id = self.vocab[mot]['id']
-                rows.append(doc_idx)
-                cols.append(word_id)
-                data.append(count)  # le nombre d'occurrences dans le doc
-        
-        # Matrice creuse CSR
-        self.mat_TF = csr_matrix((data, (rows, cols)), shape=(nb_docs, nb_mots))
 
-        # Calcul de la document frequency (df) pour chaque mot
-        doc_freq = {}  # mot - nbre de docs contenant ce mot
-        
-        for doc_id, doc in self.corpus.id2doc.items():
-            texte_net = self.nettoyer_text(doc.texte)
-            mots_doc = set(re.findall(r'\b\w+\b', texte_net))
-            for mot in mots_doc:
-                if mot in self.vocab:
-                    doc_freq[mot] = doc_freq.get(mot, 0) + 1
-        
-        for mot in self.vocab:
-            self.vocab[mot]['document_frequency'] = doc_freq.get(mot, 0)
+        with self.instrumentation.etape('construction.tf'):
+            # Une entrée par occurrence : les doublons (doc, mot) sont additionnés
+            cols = self._cache_vers_vocab[self._termes_cache]
+            data = np.ones(len(cols), dtype=np.float32)
+
+            # Matrice creuse CSR
+            self.mat_TF = csr_matrix((data, (self._lignes, cols)), shape=(nb_docs, nb_mots))
+            self.mat_TF.sum_duplicates()
+            del self._lignes, self._termes_cache, self._cache_vers_vocab
+
+        with self.instrumentation.etape('construction.df'):
+            # Calcul de la document frequency (df) : nb de lignes non nulles par colonne
+            doc_freq = np.bincount(self.mat_TF.indices, minlength=nb_mots)
+
+            for mot, info in self.vocab.items():
+                info['document_frequency'] = int(doc_freq[info['id']])
     
     def _build_TFxIDF_matrix(self):
     
@@ -131,90 +284,756 @@ class MoteurRecherche:
         self.mat_TF = self.mat_TF.astype(np.float32)
 
     
-        self.mat_TFxIDF = self.mat_TF.multiply(idf_values).tocsr()
+        self.mat_TFxIDF = self._ponderer_idf(self.mat_TF)
+
+    def _ponderer_idf(self, matrice_tf):
+        """Matrice TFxIDF calculée à partir d'une matrice TF et du vecteur IDF."""
+        return matrice_tf.multiply(self.idf).tocsr()
 
     
+    def _mots_requete(self, mots_clefs):
+        """
+        Mots de la requête après nettoyage ; un jeton qui contient le joker
+        (« ame* », « *tion ») est gardé comme motif, en minuscules.
+        """
+        if JOKER not in str(mots_clefs):
+            return re.findall(r'\b\w+\b', self.nettoyer_text(mots_clefs))
+        mots = []
+        for jeton in str(mots_clefs).split():
+            if JOKER in jeton:
+                motif = nettoyer_motif(jeton)
+                if motif.strip(JOKER):
+                    mots.append(motif)
+            else:
+                mots.extend(re.findall(r'\b\w+\b', self.nettoyer_text(jeton)))
+        return mots
+
+    def _termes_requete(self, mots_clefs):
+        """
+        Ids des termes de la requête (avec répétitions). Un motif est remplacé
+        par les termes qui lui correspondent (OU), au plus max_expansion, ceux
+        de plus grande document frequency.
+        """
+        termes = []
+        for mot in self._mots_requete(mots_clefs):
+            if JOKER in mot:
+                termes.extend(self._expansion().termes(mot, self.max_expansion).tolist())
+            else:
+                # Une seule recherche dans le vocabulaire par mot
+                info = self.vocab.get(mot)
+                if info is not None:
+                    termes.append(info['id'])
+        return termes
+
     def _query_to_vector(self, mots_clefs):
         """
         Transformation des mots-clés de la requête en vecteur dense de taille |vocab|.
         """
-        query_clean = self.nettoyer_text(mots_clefs)
-        query_words = re.findall(r'\b\w+\b', query_clean)
-
         vector = np.zeros(len(self.vocab), dtype=np.float32)
-        
-        for mot in query_words:
-            if mot in self.vocab:
-                word_id = self.vocab[mot]['id']
-                vector[word_id] += 1
-        
+        for word_id in self._termes_requete(mots_clefs):
+            vector[word_id] += 1
         return vector
+
+    def _expansion(self):
+        """ExpansionTermes sur le vocabulaire trié, construit au premier préfixe ou joker."""
+        if self.expansion is None:
+            if isinstance(self.vocab, Vocabulaire):
+                dictionnaire = self.vocab.dictionnaire
+                total_occurrences, document_frequency = self.vocab.total_occurrences, self.vocab.document_frequency
+            else:
+                termes, total_occurrences, document_frequency = self._termes_vocabulaire()
+                dictionnaire = DictionnaireTermes.depuis_liste(termes)
+            self.expansion = ExpansionTermes(dictionnaire, document_frequency, total_occurrences)
+        return self.expansion
+
+    def suggest(self, prefixe, k=10):
+        """
+        Autocomplétion : les k mots du vocabulaire les plus fréquents qui
+        commencent par prefixe (liste de chaînes, du plus fréquent au moins
+        fréquent), trouvés par dichotomie dans le vocabulaire trié.
+        """
+        return self._expansion().suggerer(prefixe, k)
     
-    def search(self, mots_clefs, nb_docs=10):
+    def _build_normalized_matrix(self):
+        """
+        Normalisation L2 des lignes de la matrice TFxIDF, faite une seule fois :
+        le cosinus avec une requête devient un simple produit matrice-vecteur.
+        """
+        self.mat_normalisee, normes = self._normaliser_lignes(self.mat_TFxIDF)
+        self.normes = normes.astype(np.float32)
+
+    def _normaliser_lignes(self, matrice_tfidf):
+        """Lignes de matrice_tfidf ramenées à une norme L2 de 1 ; retourne (matrice, normes)."""
+        matrice = matrice_tfidf.tocsr().astype(np.float32)
+        carres = matrice.multiply(matrice).sum(axis=1)
+        normes = np.sqrt(np.asarray(carres, dtype=np.float64).ravel())
+
+        # Les documents vides gardent une ligne nulle (score 0)
+        inverses = np.zeros_like(normes)
+        non_nuls = normes > 0
+        inverses[non_nuls] = 1.0 / normes[non_nuls]
+
+        # Mise à l'échelle de chaque ligne directement sur le tableau data
+        nnz_par_ligne = np.diff(matrice.indptr)
+        matrice.data = matrice.data * np.repeat(inverses, nnz_par_ligne).astype(np.float32)
+        return matrice, normes
+
+    def _build_BM25_matrix(self):
+        """
+        Précalcul des poids BM25 : la saturation du TF et la normalisation par
+        la longueur sont appliquées une fois pour toutes sur la matrice TF.
+        Le score d'une requête reste ensuite un seul produit matrice-vecteur.
+
+            poids(t, d) = idf(t) * (tf * (k1 + 1) / (tf + k1 * (1 - b + b * |d| / moy)) + delta)
+
+        avec delta = 0 pour BM25 et idf(t) = log(1 + (N - df + 0.5) / (df + 0.5)).
+        """
+        nb_docs = self.mat_TF.shape[0]
+
+        # Longueurs des documents, calculées une seule fois
+        self.longueurs_docs = np.asarray(self.mat_TF.sum(axis=1), dtype=np.float32).ravel()
+        self.longueur_moyenne = float(self.longueurs_docs.mean()) if nb_docs > 0 else 0.0
+        self.mat_BM25 = self._ponderer_bm25(self.mat_TF)
+
+    def _ponderer_bm25(self, matrice_tf):
+        """Poids BM25 d'une matrice TF (longueurs des documents déjà calculées)."""
+        nb_docs = matrice_tf.shape[0]
+        matrice = matrice_tf.tocsr().astype(np.float32)
+        doc_freq = np.diff(matrice.tocsc().indptr).astype(np.float64)
+        idf_bm25 = np.log1p((nb_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+        if self.longueur_moyenne > 0:
+            longueurs_relatives = self.longueurs_docs / self.longueur_moyenne
+        else:
+            longueurs_relatives = np.ones_like(self.longueurs_docs)
+        normalisation = self.k1 * (1 - self.b + self.b * longueurs_relatives)
+
+        tf = matrice.data
+        nnz_par_ligne = np.diff(matrice.indptr)
+        saturation = tf * (self.k1 + 1) / (tf + np.repeat(normalisation, nnz_par_ligne))
+        if self.ponderation == 'bm25+':
+            saturation = saturation + self.delta
+
+        matrice.data = (saturation * idf_bm25[matrice.indices]).astype(np.float32)
+        return matrice
+
+    def _resultats_dataframe(self, indices, scores, infos=None):
+        """
+        Construit le DataFrame de résultats (doc_id, titre, auteur, score).
+        infos : cache indice -> (doc_id, titre, auteur) partagé entre plusieurs appels.
+        """
+        if infos is None:
+            infos = {}
+        doc_ids, titres, auteurs = [], [], []
+        for idx in indices:
+            info = infos.get(idx)
+            if info is None:
+                doc_id = self.doc_ids[idx]
+                # Un index ouvert sans corpus ne connaît que les doc_id
+                doc = self.corpus.id2doc.get(doc_id) if self.corpus is not None else None
+                info = infos[idx] = (doc_id, doc.titre if doc is not None else None,
+                                     doc.auteur if doc is not None else None)
+            doc_ids.append(info[0])
+            titres.append(info[1])
+            auteurs.append(info[2])
+
+        return pd.DataFrame({
+            'doc_id': doc_ids,
+            'titre': titres,
+            'auteur': auteurs,
+            'score': scores
+        }, columns=['doc_id', 'titre', 'auteur', 'score'])
+
+    def search(self, mots_clefs, nb_docs=10, auteurs=None, types=None, date_debut=None, date_fin=None):
         """
         Fonction de recherche
         
         Arguments:
-            - mots_clefs: string contenant les mots-clés de la requête
+            - mots_clefs: string contenant les mots-clés de la requête ; un mot
+              avec le joker « * » (« ame* », « *tion ») est remplacé par les
+              mots du vocabulaire qui lui correspondent (voir max_expansion)
             - nb_docs: nombre de documents à retourner
+            - auteurs: un auteur ou une liste d'auteurs (optionnel)
+            - types: 'Reddit', 'Arxiv', 'Document' ou une liste (optionnel)
+            - date_debut, date_fin: bornes incluses sur la date (optionnel)
         
         Retourne:
             - un DataFrame pandas contenant les résultats de recherche
-              (doc_id, titre, auteur, score)
+              (doc_id, titre, auteur, score). Avec les backends 'index' et
+              'compresse', seuls les documents qui partagent un terme avec la
+              requête sont renvoyés.
+
+        Les filtres sont appliqués avant la sélection des meilleurs documents :
+        les nb_docs résultats sont les meilleurs parmi les documents filtrés.
+
+        Avec un cache (attribut cache), les résultats d'une requête déjà vue
+        sont servis sans recalcul tant que le corpus n'a pas changé.
         """
-        # Transformation de  la requête en vecteur
-        query_vector = self._query_to_vector(mots_clefs)
-        
-        # Normalisation du vecteur requête
-        query_norm = np.linalg.norm(query_vector)
-        if query_norm == 0:
-            # Aucun mot de la requête n'est dans le vocabulaire
-            return pd.DataFrame(columns=['doc_id', 'titre', 'auteur', 'score'])
-        
-        query_vector_normalized = query_vector / query_norm
-        
-        # Matrice TFxIDF
-        matrix = self.mat_TFxIDF
-        
-        from tqdm import tqdm
-        
-        scores = []
-        doc_ids = sorted(self.corpus.id2doc.keys())
-        
-        for doc_idx, doc_id in enumerate(tqdm(doc_ids, desc="Calcul des scores")):
-            # Vecteur document 
-            doc_vector = matrix[doc_idx, :].toarray().flatten()
-            
-            doc_norm = np.linalg.norm(doc_vector)
-            if doc_norm > 0:
-                doc_vector_normalized = doc_vector / doc_norm
-                score = np.dot(query_vector_normalized, doc_vector_normalized)
+        filtres = {'auteurs': auteurs, 'types': types, 'date_debut': date_debut, 'date_fin': date_fin}
+        self.instrumentation.compter('recherche.requetes')
+        if self.cache is None:
+            return self._rechercher(mots_clefs, nb_docs, filtres)
+
+        mots = self._mots_requete(mots_clefs)
+        cle = self.cache.cle(mots)
+        if any(JOKER in mot for mot in mots):
+            # Les mots qui remplacent un joker dépendent de max_expansion
+            cle = (cle, self.max_expansion)
+        if any(valeur is not None for valeur in filtres.values()):
+            cle = (cle, repr(sorted(filtres.items())))
+        generation = self.generation_cache()
+        resultats = self.cache.obtenir(cle, generation, nb_docs)
+        if resultats is not None:
+            self.instrumentation.compter('recherche.cache_succes')
+        else:
+            # On calcule assez de résultats pour servir aussi les nb_docs plus petits
+            profondeur = max(nb_docs, self.cache.profondeur)
+            resultats = self._rechercher(mots_clefs, profondeur, filtres)
+            self.cache.ranger(cle, generation, resultats, profondeur)
+            resultats = resultats.head(nb_docs).reset_index(drop=True)
+        return resultats
+
+    def generation_cache(self):
+        """
+        Génération des résultats en cache : celle du corpus (titres et auteurs
+        affichés en dépendent). Les matrices du moteur, elles, ne changent pas.
+        """
+        return self.corpus.generation if self.corpus is not None else None
+
+    def _lignes_filtrees(self, filtres):
+        """Lignes des documents qui passent les filtres (None : pas de filtre)."""
+        if all(valeur is None for valeur in filtres.values()):
+            return None
+        if self.corpus is None:
+            raise ValueError("Les filtres demandent le corpus (open_index(..., corpus=corpus))")
+        # Métadonnées précalculées une fois, refaites si le corpus a changé
+        if self.filtres is None or self.filtres.generation != self.corpus.generation:
+            self.filtres = FiltresDocuments(self.corpus, self.doc_ids)
+        return self.filtres.lignes(**filtres)
+
+    def _rechercher(self, mots_clefs, nb_docs, filtres=None):
+        """Recherche sans cache (voir search)."""
+        colonnes = ['doc_id', 'titre', 'auteur', 'score']
+        mesure = self.instrumentation.etape
+        with mesure('recherche.filtres'):
+            lignes = self._lignes_filtrees(filtres) if filtres is not None else None
+        if lignes is not None and len(lignes) == 0:
+            return pd.DataFrame(columns=colonnes)
+
+        with mesure('recherche.vectorisation'):
+            # Transformation de  la requête en vecteur
+            query_vector = self._query_to_vector(mots_clefs)
+
+            # Normalisation du vecteur requête
+            query_norm = np.linalg.norm(query_vector)
+            if query_norm == 0 or nb_docs <= 0:
+                # Aucun mot de la requête n'est dans le vocabulaire
+                return pd.DataFrame(columns=colonnes)
+
+            if self.ponderation == 'tfidf':
+                query_vector_normalized = query_vector / query_norm
             else:
-                score = 0.0
-            
-            scores.append({
-                'doc_id': doc_id,
-                'score': score
-            })
-        
-        # Tri par score décroissant
-        scores.sort(key=lambda x: x['score'], reverse=True)
-        
-        # On ne garde que les nb_docs meilleurs
-        top_scores = scores[:nb_docs]
-        
-        # Construction du DataFrame résultats
-        results = []
-        for result in top_scores:
-            doc_id = result['doc_id']
-            doc = self.corpus.id2doc[doc_id]
-            
-            results.append({
-                'doc_id': doc_id,
-                'titre': doc.titre,
-                'auteur': doc.auteur,
-                'score': result['score']
-            })
-        
-        df_results = pd.DataFrame(results)
-        return df_results
+                # BM25 : somme des poids des termes de la requête (avec répétitions)
+                query_vector_normalized = query_vector
+
+        if self.backend in ('index', 'compresse'):
+            # Seuls les postings des termes de la requête sont parcourus ;
+            # MaxScore calcule et sélectionne en même temps (une seule étape)
+            with mesure('recherche.scores'):
+                autorises = None
+                if lignes is not None:
+                    autorises = np.zeros(len(self.doc_ids), dtype=bool)
+                    autorises[lignes] = True
+                termes_ids = np.flatnonzero(query_vector_normalized)
+                top_indices, top_scores = self.index_inverse.top_k(
+                    termes_ids, query_vector_normalized[termes_ids], nb_docs, autorises
+                )
+            with mesure('recherche.dataframe'):
+                return self._resultats_dataframe(top_indices, top_scores)
+
+        with mesure('recherche.scores'):
+            if lignes is not None:
+                # Seules les lignes des documents filtrés sont évaluées
+                scores = self.mat_scores[lignes].dot(query_vector_normalized)
+            else:
+                # Un seul produit creux : score de la requête avec tous les documents
+                scores = self.mat_scores.dot(query_vector_normalized)
+
+        with mesure('recherche.selection'):
+            # Sélection partielle des nb_docs meilleurs (pas de tri complet)
+            top_indices = selection_top_k(scores, nb_docs)
+            if lignes is not None:
+                top_scores, top_indices = scores[top_indices], lignes[top_indices]
+            else:
+                top_scores = scores[top_indices]
+
+        with mesure('recherche.dataframe'):
+            return self._resultats_dataframe(top_indices, top_scores)
+
+
+    def _scores_documents(self, vecteur, lignes=None):
+        """
+        Scores (float32) d'un vecteur requête avec tous les documents, ou avec
+        les lignes données. Sans matrice des scores en mémoire (backend
+        'compresse'), ils sont accumulés sur les postings des termes du vecteur.
+        """
+        if self._mat_scores is not None or not self._matrices_dans_index():
+            matrice = self.mat_scores if lignes is None else self.mat_scores[lignes]
+            return np.asarray(matrice.dot(vecteur), dtype=np.float32)
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for terme_id in np.flatnonzero(vecteur):
+            docs, poids = self.index_inverse.postings(terme_id)
+            scores[docs] += np.float32(vecteur[terme_id]) * poids
+        return scores if lignes is None else scores[lignes]
+
+    def search_booleen(self, requete, nb_docs=10, classement=True):
+        """
+        Recherche booléenne : AND, OR, NOT, parenthèses et phrases exactes
+        entre guillemets (voir RequetesBooleennes.analyser_requete), par
+        exemple '"climate change" AND NOT hoax'.
+
+        Avec classement, les documents trouvés sont ordonnés par le score de
+        search sur les mots de la requête qui ne sont pas sous un NOT ; sinon
+        ils sont rendus dans l'ordre des doc_id, sans score.
+        nb_docs=None renvoie tous les documents trouvés.
+        """
+        colonnes = ['doc_id', 'titre', 'auteur', 'score']
+        arbre = analyser_requete(requete)
+        if self.corpus is None:
+            raise ValueError("La recherche booléenne demande le corpus (open_index(..., corpus=corpus))")
+        # Index positionnel construit au premier appel, refait si le corpus a changé
+        if self.index_booleen is None or self.index_booleen.generation != self.corpus.generation:
+            self.index_booleen = IndexBooleen(self.corpus, self.doc_ids)
+
+        lignes = self.index_booleen.executer(arbre)
+        if nb_docs is None:
+            nb_docs = len(lignes)
+        if len(lignes) == 0 or nb_docs <= 0:
+            return pd.DataFrame(columns=colonnes)
+        if not classement:
+            lignes = lignes[:nb_docs]
+            return self._resultats_dataframe(lignes, np.full(len(lignes), np.nan, dtype=np.float32))
+
+        requete_vecteur = self._query_to_vector(' '.join(mots_positifs(arbre)))
+        norme = np.linalg.norm(requete_vecteur)
+        if self.ponderation == 'tfidf' and norme > 0:
+            requete_vecteur = requete_vecteur / norme
+        scores = self._scores_documents(requete_vecteur, lignes)
+        meilleurs = selection_top_k(scores, nb_docs)
+        return self._resultats_dataframe(lignes[meilleurs], scores[meilleurs])
+
+    def _requetes_vers_matrice(self, requetes):
+        """
+        Matrice creuse Requêtes x Termes (une ligne par requête, mêmes poids que
+        search : comptes normalisés en TF-IDF, comptes bruts en BM25).
+        """
+        lignes, colonnes = [], []
+        for ligne, requete in enumerate(requetes):
+            termes = self._termes_requete(requete)
+            lignes.extend([ligne] * len(termes))
+            colonnes.extend(termes)
+
+        donnees = np.ones(len(lignes), dtype=np.float32)
+        matrice = csr_matrix((donnees, (lignes, colonnes)), shape=(len(requetes), len(self.vocab)))
+        matrice.sum_duplicates()
+
+        if self.ponderation == 'tfidf':
+            carres = np.asarray(matrice.multiply(matrice).sum(axis=1), dtype=np.float64).ravel()
+            normes = np.sqrt(carres)
+            inverses = np.zeros_like(normes)
+            inverses[normes > 0] = 1.0 / normes[normes > 0]
+            matrice.data = matrice.data * np.repeat(inverses, np.diff(matrice.indptr)).astype(np.float32)
+        return matrice
+
+    def search_many(self, requetes, nb_docs=10, format='liste', taille_bloc=1024):
+        """
+        Recherche d'un lot de requêtes en une fois.
+
+        Les requêtes forment une matrice creuse Requêtes x Termes ; chaque bloc
+        de taille_bloc requêtes est évalué par un seul produit creux avec la
+        matrice des documents, puis les nb_docs meilleurs sont sélectionnés
+        ligne par ligne parmi les seuls scores non nuls. Avec les backends
+        'index' et 'compresse', chaque ligne passe par l'index inversé (MaxScore),
+        comme dans search : mêmes poids et mêmes résultats.
+
+        format :
+            - 'liste' : une liste de DataFrames, un par requête, identiques à
+              ceux de search
+            - 'long' : un seul DataFrame (requete, rang, doc_id, titre, auteur,
+              score), requete étant la position de la requête dans la liste
+        """
+        if format not in ('liste', 'long'):
+            raise ValueError(f"Format inconnu : {format} (attendu : liste, long)")
+        if taille_bloc <= 0:
+            raise ValueError("taille_bloc doit être strictement positif")
+
+        requetes = list(requetes)
+        nb_total = len(self.doc_ids)
+        mesure = self.instrumentation.etape
+        self.instrumentation.compter('recherche.requetes', len(requetes))
+        with mesure('recherche_lot.vectorisation'):
+            matrice_requetes = self._requetes_vers_matrice(requetes)
+
+        resultats = []   # (indices, scores) par requête
+        if self.backend in ('index', 'compresse'):
+            with mesure('recherche_lot.scores'):
+                for i in range(len(requetes)):
+                    a, b = matrice_requetes.indptr[i], matrice_requetes.indptr[i + 1]
+                    if a == b or nb_docs <= 0:
+                        resultats.append((np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)))
+                    else:
+                        resultats.append(self.index_inverse.top_k(
+                            matrice_requetes.indices[a:b], matrice_requetes.data[a:b], nb_docs
+                        ))
+                    if i % taille_bloc == 0:
+                        self.instrumentation.progresser('recherche_lot', i, len(requetes))
+        else:
+            for debut in range(0, len(requetes), taille_bloc):
+                self.instrumentation.progresser('recherche_lot', debut, len(requetes))
+                bloc = matrice_requetes[debut:debut + taille_bloc]
+                with mesure('recherche_lot.scores'):
+                    # Documents x Requêtes puis transposée : une ligne de scores par requête
+                    scores_bloc = (self.mat_scores @ bloc.T).T.tocsr()
+                    scores_bloc.sort_indices()
+
+                with mesure('recherche_lot.selection'):
+                    for i in range(bloc.shape[0]):
+                        if bloc.indptr[i] == bloc.indptr[i + 1] or nb_docs <= 0:
+                            # Aucun mot de la requête dans le vocabulaire
+                            resultats.append((np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)))
+                            continue
+
+                        a, b = scores_bloc.indptr[i], scores_bloc.indptr[i + 1]
+                        docs, scores = scores_bloc.indices[a:b], scores_bloc.data[a:b]
+                        positifs = scores > 0
+                        docs, scores = docs[positifs], scores[positifs]
+                        meilleurs = selection_top_k(scores, nb_docs)
+                        indices, valeurs = docs[meilleurs].astype(np.int64), scores[meilleurs]
+
+                        if len(indices) < nb_docs:
+                            # Comme search : complété par les premiers documents de score nul
+                            manquants = min(nb_docs, nb_total) - len(indices)
+                            pris = set(docs.tolist())
+                            nuls = []
+                            doc = 0
+                            while len(nuls) < manquants:
+                                if doc not in pris:
+                                    nuls.append(doc)
+                                doc += 1
+                            indices = np.concatenate([indices, np.array(nuls, dtype=np.int64)])
+                            valeurs = np.concatenate([valeurs, np.zeros(len(nuls), dtype=valeurs.dtype)])
+                        resultats.append((indices, valeurs))
+        self.instrumentation.progresser('recherche_lot', len(requetes), len(requetes))
+
+        if format == 'liste':
+            colonnes = ['doc_id', 'titre', 'auteur', 'score']
+            infos = {}
+            with mesure('recherche_lot.dataframe'):
+                return [
+                    self._resultats_dataframe(indices.tolist(), scores, infos) if len(indices) > 0
+                    else pd.DataFrame(columns=colonnes)
+                    for indices, scores in resultats
+                ]
+
+        numeros = [np.full(len(indices), n, dtype=np.int64) for n, (indices, _) in enumerate(resultats)]
+        rangs = [np.arange(1, len(indices) + 1, dtype=np.int64) for indices, _ in resultats]
+        indices = np.concatenate([r[0] for r in resultats]) if resultats else np.zeros(0, dtype=np.int64)
+        scores = np.concatenate([r[1] for r in resultats]) if resultats else np.zeros(0, dtype=np.float32)
+        with mesure('recherche_lot.dataframe'):
+            tableau = self._resultats_dataframe(indices.tolist(), scores)
+        tableau.insert(0, 'rang', np.concatenate(rangs) if rangs else np.zeros(0, dtype=np.int64))
+        tableau.insert(0, 'requete', np.concatenate(numeros) if numeros else np.zeros(0, dtype=np.int64))
+        return tableau
+
+    def agreger(self, par='type'):
+        """
+        Sommes des lignes TF par groupe de documents : par='type' (source),
+        'auteur' ou 'annee'. Retourne un AgregationGroupes (matrice Groupes x
+        Termes), calculé une fois par clé et refait si le corpus a changé.
+        """
+        if self.corpus is None:
+            raise ValueError("L'agrégation demande le corpus (open_index(..., corpus=corpus))")
+        agregation = self.agregations.get(par)
+        if agregation is None or agregation.generation != self.corpus.generation:
+            agregation = AgregationGroupes(self.corpus, self.doc_ids, self.mat_TF, par)
+            self.agregations[par] = agregation
+        return agregation
+
+    def _mots_colonnes(self, colonnes):
+        """Mots des colonnes données des matrices."""
+        dictionnaire = getattr(self.vocab, 'dictionnaire', None)
+        if dictionnaire is not None:
+            return [dictionnaire[int(colonne)] for colonne in colonnes]
+        mots = list(self.vocab)
+        return [mots[colonne] for colonne in colonnes]
+
+    def comparer(self, groupe1, groupe2, par='type', mesure='diff', top_n=20):
+        """
+        Compare les fréquences des termes de deux groupes (ou listes de groupes)
+        de documents, par exemple comparer('reddit', 'arxiv').
+
+        mesure : colonne de classement, parmi
+            - 'diff' : tf1 - tf2
+            - 'ratio' : (tf1 + 1) / (tf2 + 1)
+            - 'log_vraisemblance', 'chi2' : spécificité (keyness) signée, positive
+              pour les termes sur-représentés dans le groupe 1
+
+        Retourne un DataFrame des top_n termes (mot, tf_<groupe1>, tf_<groupe2>
+        et toutes les mesures), par mesure décroissante.
+        """
+        if mesure not in MESURES:
+            raise ValueError(f"Mesure inconnue : {mesure} (attendu : {', '.join(MESURES)})")
+        agregation = self.agreger(par)
+        tf1 = agregation.vecteur(groupe1)
+        tf2 = agregation.vecteur(groupe2)
+        nom1 = groupe1 if isinstance(groupe1, (str, int)) else '_'.join(map(str, groupe1))
+        nom2 = groupe2 if isinstance(groupe2, (str, int)) else '_'.join(map(str, groupe2))
+        colonnes = ['mot', f'tf_{nom1}', f'tf_{nom2}', *MESURES]
+
+        # Seuls les termes présents dans l'un des deux groupes sont classés
+        presents = np.flatnonzero((tf1 + tf2) > 0)
+        if len(presents) == 0 or top_n <= 0:
+            return pd.DataFrame(columns=colonnes)
+        mesures = mesures_comparaison(tf1[presents], tf2[presents])
+        meilleurs = selection_top_k(mesures[mesure], top_n)
+
+        tableau = pd.DataFrame({
+            'mot': self._mots_colonnes(presents[meilleurs]),
+            f'tf_{nom1}': tf1[presents[meilleurs]],
+            f'tf_{nom2}': tf2[presents[meilleurs]],
+        })
+        for nom in MESURES:
+            tableau[nom] = mesures[nom][meilleurs]
+        return tableau
+
+    def construire_semantique(self, dimensions=100, methode='svd', graine=0):
+        """
+        Construit l'espace latent de search_semantique à partir de la matrice
+        TFxIDF (voir RechercheSemantique.EspaceSemantique) :
+            - methode='svd' : SVD tronquée (LSA) à dimensions composantes
+            - methode='projection' : projection aléatoire creuse
+        L'espace est sauvegardé avec l'index par save_index.
+        """
+        with self.instrumentation.etape('construction.semantique'):
+            self.semantique = EspaceSemantique.construire(self.mat_TFxIDF, dimensions, methode, graine)
+        return self.semantique
+
+    def search_semantique(self, mots_clefs, nb_docs=10, poids_lexical=0.0, auteurs=None, types=None,
+                          date_debut=None, date_fin=None, taille_bloc=65536):
+        """
+        Recherche dans l'espace latent : la requête (comptes x IDF) est
+        repliée dans l'espace et comparée (cosinus) aux plongements de tous
+        les documents, qui peuvent ne partager aucun mot avec elle.
+
+        poids_lexical : mélange avec le score de search, ramené dans [0, 1]
+        par son maximum : (1 - poids) * cosinus + poids * lexical.
+        Les filtres sont ceux de search. Retourne le même DataFrame que search.
+        """
+        colonnes = ['doc_id', 'titre', 'auteur', 'score']
+        if self.semantique is None:
+            raise ValueError("Espace sémantique absent : appeler construire_semantique() d'abord")
+        if not 0 <= poids_lexical <= 1:
+            raise ValueError(f"poids_lexical doit être entre 0 et 1 : {poids_lexical}")
+        mesure = self.instrumentation.etape
+        self.instrumentation.compter('recherche.requetes')
+
+        with mesure('recherche_semantique.filtres'):
+            filtres = {'auteurs': auteurs, 'types': types, 'date_debut': date_debut, 'date_fin': date_fin}
+            lignes = self._lignes_filtrees(filtres)
+        if lignes is not None and len(lignes) == 0:
+            return pd.DataFrame(columns=colonnes)
+
+        with mesure('recherche_semantique.vectorisation'):
+            comptes = self._query_to_vector(mots_clefs)
+            if not comptes.any() or nb_docs <= 0:
+                return pd.DataFrame(columns=colonnes)
+            requete = self.semantique.plonger(comptes * self.idf)
+
+            lexical = None
+            if poids_lexical > 0:
+                norme = np.linalg.norm(comptes)
+                vecteur = comptes / norme if self.ponderation == 'tfidf' else comptes
+                lexical = self._scores_documents(vecteur)
+                maximum = lexical.max() if len(lexical) else 0.0
+                if maximum > 0:
+                    lexical /= maximum
+
+        with mesure('recherche_semantique.scores'):
+            top_indices, top_scores = self.semantique.top_k(requete, nb_docs, lignes, lexical,
+                                                            poids_lexical, taille_bloc)
+        with mesure('recherche_semantique.dataframe'):
+            return self._resultats_dataframe(top_indices.tolist(), top_scores)
+
+
+    def save_index(self, path):
+        """
+        Sauvegarde l'index dans le dossier path :
+            - entete.json : format, version, paramètres, empreinte du corpus,
+              description et CRC32 de chaque fichier
+            - un fichier binaire brut par tableau (matrices CSR, IDF, normes,
+              dictionnaire des termes et statistiques, postings du backend
+              'index' ou 'compresse' s'il est actif), lisible par np.memmap
+        L'index est écrit dans un dossier temporaire puis renommé.
+        """
+        temporaire = path.rstrip(os.sep) + '.tmp'
+        if os.path.exists(temporaire):
+            shutil.rmtree(temporaire)
+        os.makedirs(temporaire)
+
+        fichiers = {}
+
+        def ecrire(nom, tableau):
+            ecrire_tableau(temporaire, nom, tableau, fichiers)
+
+        # Une matrice à la fois (backend 'compresse' : reconstruites tour à tour)
+        for nom, attribut in (('tf', 'mat_TF'), ('tfidf', 'mat_TFxIDF'), ('scores', 'mat_scores')):
+            matrice = getattr(self, attribut).tocsr()
+            ecrire(f'{nom}_indptr', matrice.indptr)
+            ecrire(f'{nom}_indices', matrice.indices)
+            ecrire(f'{nom}_data', matrice.data.astype(np.float32))
+
+        ecrire('idf', self.idf)
+        ecrire('normes', self.normes)
+        if self.index_inverse is not None:
+            # Postings par terme des backends 'index' et 'compresse' : rien à recalculer à l'ouverture
+            self.index_inverse.sauvegarder(temporaire, fichiers)
+        if self.longueurs_docs is not None:
+            ecrire('longueurs_docs', self.longueurs_docs)
+        semantique = None
+        if self.semantique is not None:
+            # Plongements des documents, projetés en mémoire à l'ouverture
+            semantique = self.semantique.sauvegarder(temporaire, fichiers)
+
+        # Dictionnaire des termes, dans l'ordre des ids (alphabétique)
+        termes, total_occurrences, document_frequency = self._termes_vocabulaire()
+        nb_termes = len(termes)
+        dictionnaire = DictionnaireTermes.depuis_liste(termes)
+        ecrire('termes_blob', dictionnaire.blob)
+        ecrire('termes_offsets', dictionnaire.offsets)
+        if isinstance(getattr(self.vocab, 'dictionnaire', None), DictionnaireFrontal):
+            # Version à codage frontal, relue par open_index(..., backend='compresse')
+            ecrire('frontal_blob', self.vocab.dictionnaire.blob)
+            ecrire('frontal_offsets', self.vocab.dictionnaire.offsets)
+        ecrire('total_occurrences', total_occurrences)
+        ecrire('document_frequency', document_frequency)
+
+        # doc_id entiers : tableau binaire ; sinon liste JSON
+        if all(isinstance(d, (int, np.integer)) for d in self.doc_ids):
+            ecrire('doc_ids', np.array(self.doc_ids, dtype=np.int64))
+            doc_ids_json = None
+        else:
+            doc_ids_json = list(self.doc_ids)
+
+        entete = {
+            'format': FORMAT_INDEX,
+            'version': VERSION_INDEX,
+            'ponderation': self.ponderation,
+            'k1': self.k1,
+            'b': self.b,
+            'delta': self.delta,
+            'longueur_moyenne': self.longueur_moyenne,
+            'nb_docs': len(self.doc_ids),
+            'nb_termes': nb_termes,
+            'empreinte_corpus': self.corpus.empreinte() if self.corpus is not None else None,
+            'doc_ids': doc_ids_json,
+            'semantique': semantique,
+            'fichiers': fichiers
+        }
+        with open(os.path.join(temporaire, 'entete.json'), 'w', encoding='utf-8') as f:
+            json.dump(entete, f, ensure_ascii=False, indent=1, default=str)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(temporaire, path)
+
+    @classmethod
+    def open_index(cls, path, corpus=None, backend='matrice', verifier=False, instrumentation=None):
+        """
+        Ouvre un index écrit par save_index sans rien reconstruire : les tableaux
+        sont projetés en mémoire (np.memmap, lecture seule) et partagés entre
+        processus par le cache de pages du système.
+
+        Si corpus est fourni, son empreinte doit correspondre à celle de l'index
+        (sinon l'index est périmé : ValueError). verifier=True relit tous les
+        fichiers pour contrôler leur CRC32.
+        """
+        with open(os.path.join(path, 'entete.json'), encoding='utf-8') as f:
+            entete = json.load(f)
+
+        if entete.get('format') != FORMAT_INDEX or entete.get('version') != VERSION_INDEX:
+            raise ValueError(
+                f"Index {path} au format {entete.get('format')} v{entete.get('version')}, "
+                f"attendu {FORMAT_INDEX} v{VERSION_INDEX} : il faut le reconstruire"
+            )
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend inconnu : {backend} (attendu : {', '.join(BACKENDS)})")
+        if corpus is not None and corpus.empreinte() != entete['empreinte_corpus']:
+            raise ValueError(f"Index {path} périmé : il n'a pas été construit sur ce corpus")
+
+        fichiers = entete['fichiers']
+
+        def lire(nom):
+            return lire_tableau(path, nom, fichiers, verifier=verifier)
+
+        forme = (entete['nb_docs'], entete['nb_termes'])
+
+        def matrice(nom):
+            return csr_matrix(
+                (lire(f'{nom}_data'), lire(f'{nom}_indices'), lire(f'{nom}_indptr')),
+                shape=forme, copy=False
+            )
+
+        moteur = cls.__new__(cls)
+        moteur.corpus = corpus
+        moteur.backend = backend
+        moteur.ponderation = entete['ponderation']
+        moteur.k1 = entete['k1']
+        moteur.b = entete['b']
+        moteur.delta = entete['delta']
+        moteur.nb_processus = 1
+        moteur.cache = None
+        moteur.filtres = None
+        moteur.index_booleen = None
+        moteur.agregations = {}
+        moteur.expansion = None
+        moteur.max_expansion = MAX_EXPANSION
+        moteur.instrumentation = instrumentation if instrumentation is not None else INACTIVE
+
+        moteur.mat_TF = matrice('tf')
+        moteur.mat_TFxIDF = matrice('tfidf')
+        moteur.mat_scores = matrice('scores')
+        moteur.mat_normalisee = moteur.mat_scores if moteur.ponderation == 'tfidf' else None
+        moteur.mat_BM25 = moteur.mat_scores if moteur.ponderation != 'tfidf' else None
+        moteur.idf = lire('idf')
+        moteur.normes = lire('normes')
+        moteur.longueurs_docs = lire('longueurs_docs') if 'longueurs_docs' in fichiers else None
+        moteur.longueur_moyenne = entete['longueur_moyenne']
+
+        if backend == 'compresse' and 'frontal_blob' in fichiers:
+            dictionnaire = DictionnaireFrontal(lire('frontal_blob'), lire('frontal_offsets'), entete['nb_termes'])
+        else:
+            dictionnaire = DictionnaireTermes(lire('termes_blob'), lire('termes_offsets'))
+        moteur.vocab = Vocabulaire(dictionnaire, lire('total_occurrences'), lire('document_frequency'))
+
+        if entete['doc_ids'] is None:
+            moteur.doc_ids = lire('doc_ids')
+        else:
+            moteur.doc_ids = entete['doc_ids']
+
+        moteur.index_inverse = None
+        if backend == 'index':
+            if 'index_indptr' in fichiers:
+                moteur.index_inverse = IndexInverse.ouvrir(path, fichiers, entete['nb_docs'], verifier)
+            else:
+                moteur.index_inverse = IndexInverse.depuis_matrice(moteur.mat_scores)
+        elif backend == 'compresse':
+            if 'compresse_octets' in fichiers:
+                moteur.index_inverse = IndexCompresse.ouvrir(path, fichiers, entete['nb_docs'], verifier)
+            else:
+                moteur.index_inverse = IndexCompresse.depuis_matrice(moteur.mat_scores)
+
+        moteur.semantique = None
+        if entete.get('semantique'):
+            moteur.semantique = EspaceSemantique.ouvrir(path, fichiers, entete['semantique'],
+                                                        entete['nb_docs'], entete['nb_termes'], verifier)
+        return moteur
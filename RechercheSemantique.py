@@ -0,0 +1,176 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import svds
+
+from StockageIndex import ecrire_tableau, lire_tableau
+from TopK import selection_top_k
+
+# Méthodes de réduction de dimension disponibles
+METHODES = ('svd', 'projection')
+
+
+def normaliser_lignes(matrice):
+    """Lignes d'une matrice dense divisées par leur norme L2 (les lignes nulles restent nulles)."""
+    normes = np.linalg.norm(matrice, axis=1)
+    inverses = np.divide(1.0, normes, out=np.zeros_like(normes), where=normes > 0)
+    return (matrice * inverses[:, None]).astype(np.float32)
+
+
+def projection_aleatoire(nb_termes, dimensions, graine=0):
+    """
+    Matrice Termes x dimensions de projection aléatoire creuse : chaque terme
+    a c cases non nulles de valeur ±1/sqrt(c), une par bloc de dimensions /
+    c colonnes (Kane et Nelson), avec c ~ dimensions / sqrt(nb_termes) comme
+    la densité 1/sqrt(nb_termes) d'Achlioptas et Li, mais au moins 1 : aucun
+    terme n'est perdu. Les distances entre documents sont conservées en
+    moyenne et le produit reste creux.
+    """
+    generateur = np.random.default_rng(graine)
+    c = int(np.clip(round(dimensions / np.sqrt(max(nb_termes, 1))), 1, dimensions))
+    largeur = dimensions // c
+    colonnes = generateur.integers(0, largeur, size=(nb_termes, c)) + np.arange(c) * largeur
+    signes = np.where(generateur.random((nb_termes, c)) < 0.5, -1.0, 1.0)
+    valeurs = (signes / np.sqrt(c)).astype(np.float32)
+    return csr_matrix((valeurs.ravel(), colonnes.ravel(), np.arange(0, nb_termes * c + 1, c)),
+                      shape=(nb_termes, dimensions))
+
+
+class EspaceSemantique:
+    """
+    Plongement des documents dans un espace dense de petite dimension, calculé
+    une fois à partir de la matrice TFxIDF (lignes normalisées) :
+        - methode='svd' : SVD tronquée (analyse sémantique latente) ; des mots
+          qui apparaissent dans les mêmes documents sont rapprochés
+        - methode='projection' : projection aléatoire creuse, bien plus
+          rapide à construire mais sans regroupement des synonymes
+
+    plongements : tableau Documents x dimensions (float32, lignes normalisées),
+    si bien que le score d'une requête est un cosinus obtenu par un produit
+    matrice-vecteur dense, fait par blocs de lignes.
+    projection : matrice Termes x dimensions (dense pour la SVD, creuse pour
+    la projection aléatoire) qui replie une requête dans l'espace.
+    """
+
+    def __init__(self, plongements, projection, methode):
+        self.plongements = plongements
+        self.projection = projection
+        self.methode = methode
+
+    @property
+    def dimensions(self):
+        return self.plongements.shape[1]
+
+    @classmethod
+    def construire(cls, mat_TFxIDF, dimensions=100, methode='svd', graine=0):
+        """
+        Construit l'espace à partir de la matrice TFxIDF (Documents x Termes).
+        Pour la SVD, dimensions est ramené sous min(nb_docs, nb_termes).
+        """
+        if methode not in METHODES:
+            raise ValueError(f"Méthode inconnue : {methode} (attendu : {', '.join(METHODES)})")
+        if dimensions <= 0:
+            raise ValueError(f"Nombre de dimensions invalide : {dimensions}")
+
+        matrice = mat_TFxIDF.tocsr().astype(np.float32)
+        carres = np.asarray(matrice.multiply(matrice).sum(axis=1), dtype=np.float64).ravel()
+        normes = np.sqrt(carres)
+        inverses = np.divide(1.0, normes, out=np.zeros_like(normes), where=normes > 0)
+        matrice = csr_matrix(matrice.multiply(inverses[:, None].astype(np.float32)))
+
+        if methode == 'svd':
+            limite = min(matrice.shape) - 1
+            if limite < 1:
+                raise ValueError("Corpus trop petit pour une SVD tronquée")
+            dimensions = min(dimensions, limite)
+            _, valeurs, vt = svds(matrice, k=dimensions, random_state=graine)
+            # svds rend les composantes par valeur singulière croissante
+            ordre = np.argsort(-valeurs)
+            projection = np.ascontiguousarray(vt[ordre].T, dtype=np.float32)
+        else:
+            projection = projection_aleatoire(matrice.shape[1], dimensions, graine)
+
+        plongements = matrice @ projection
+        if methode == 'projection':
+            plongements = plongements.toarray()
+        plongements = np.asarray(plongements, dtype=np.float32)
+        return cls(normaliser_lignes(plongements), projection, methode)
+
+    def plonger(self, vecteur):
+        """Vecteur requête pondéré (taille |vocab|) -> vecteur normalisé de l'espace."""
+        if self.methode == 'svd':
+            q = vecteur.astype(np.float32) @ self.projection
+        else:
+            q = self.projection.T.dot(vecteur.astype(np.float32))
+        q = np.asarray(q, dtype=np.float32).ravel()
+        norme = np.linalg.norm(q)
+        return q / norme if norme > 0 else q
+
+    def top_k(self, requete, k, lignes=None, lexical=None, poids_lexical=0.0, taille_bloc=65536):
+        """
+        Les k meilleurs documents pour une requête déjà plongée : scores
+        calculés par blocs de taille_bloc lignes, seuls les k meilleurs de
+        chaque bloc sont gardés (mémoire bornée quel que soit le corpus).
+
+        lignes : lignes autorisées (filtres), None pour tous les documents
+        lexical : scores lexicaux (un par document, dans [0, 1]) mélangés avec
+        le poids poids_lexical : (1 - poids) * cosinus + poids * lexical
+
+        Retourne (indices, scores) par score décroissant ; à score égal,
+        l'ordre des documents est conservé.
+        """
+        nb_lignes = self.plongements.shape[0] if lignes is None else len(lignes)
+        meilleurs = np.zeros(0, dtype=np.int64)
+        scores_meilleurs = np.zeros(0, dtype=np.float32)
+        if k <= 0:
+            return meilleurs, scores_meilleurs
+
+        for debut in range(0, nb_lignes, taille_bloc):
+            fin = min(debut + taille_bloc, nb_lignes)
+            if lignes is None:
+                bloc = np.arange(debut, fin)
+                scores = self.plongements[debut:fin] @ requete
+            else:
+                bloc = lignes[debut:fin]
+                scores = self.plongements[bloc] @ requete
+            if lexical is not None and poids_lexical:
+                scores = (1 - poids_lexical) * scores + poids_lexical * lexical[bloc]
+            scores = scores.astype(np.float32)
+            choisis = selection_top_k(scores, k)
+            # Les candidats précédents (lignes plus petites) restent devant à score égal
+            candidats = np.concatenate([meilleurs, bloc[choisis]])
+            scores_candidats = np.concatenate([scores_meilleurs, scores[choisis]])
+            garder = selection_top_k(scores_candidats, k)
+            meilleurs, scores_meilleurs = candidats[garder], scores_candidats[garder]
+        return meilleurs, scores_meilleurs
+
+    def sauvegarder(self, dossier, fichiers):
+        """Écrit les tableaux de l'espace dans dossier (descriptions ajoutées à fichiers)."""
+        ecrire_tableau(dossier, 'semantique_plongements', self.plongements, fichiers)
+        if self.methode == 'svd':
+            ecrire_tableau(dossier, 'semantique_projection', self.projection, fichiers)
+        else:
+            ecrire_tableau(dossier, 'semantique_projection_indptr', self.projection.indptr, fichiers)
+            ecrire_tableau(dossier, 'semantique_projection_indices', self.projection.indices, fichiers)
+            ecrire_tableau(dossier, 'semantique_projection_data', self.projection.data, fichiers)
+        return {'methode': self.methode, 'dimensions': self.dimensions}
+
+    @classmethod
+    def ouvrir(cls, dossier, fichiers, entete, nb_docs, nb_termes, verifier=False):
+        """
+        Relit un espace écrit par sauvegarder (entete : dictionnaire qu'il a
+        retourné), plongements projetés en mémoire.
+        """
+        def lire(nom):
+            return lire_tableau(dossier, nom, fichiers, verifier=verifier)
+
+        dimensions = entete['dimensions']
+        plongements = lire('semantique_plongements').reshape(nb_docs, dimensions)
+        if entete['methode'] == 'svd':
+            projection = lire('semantique_projection').reshape(nb_termes, dimensions)
+        else:
+            projection = csr_matrix(
+                (lire('semantique_projection_data'), lire('semantique_projection_indices'),
+                 lire('semantique_projection_indptr')),
+                shape=(nb_termes, dimensions), copy=False
+            )
+        return cls(plongements, projection, entete['methode'])
@@ -0,0 +1,210 @@
+import re
+
+import numpy as np
+
+from Compression import PostingsCompresses
+from Corpus import MOT, nettoyer
+
+# Jetons d'une requête : phrase entre guillemets, parenthèse ou mot
+JETON = re.compile(r'"([^"]*)"?|\(|\)|[^\s()"]+')
+
+# Opérateurs (en majuscules : « and » et « or » en minuscules restent des mots)
+OPERATEURS = ('AND', 'OR', 'NOT')
+
+# Décalage des lignes dans les clés positionnelles : clé = ligne << 32 | position
+DECALAGE = 32
+
+
+def analyser_requete(requete):
+    """
+    Transforme une requête booléenne en arbre :
+        ('mot', mot) | ('phrase', [mots]) | ('et', [enfants]) | ('ou', [enfants]) | ('non', enfant)
+
+    Syntaxe : AND, OR, NOT, parenthèses et phrases entre guillemets ; deux
+    termes côte à côte sont reliés par AND. Priorités : NOT > AND > OR.
+    Exemple : "climate change" AND NOT hoax
+    """
+    jetons = []
+    for match in JETON.finditer(requete):
+        if match.group(1) is not None or match.group().startswith('"'):
+            jetons.append(('phrase', match.group(1) or ''))
+        elif match.group() in ('(', ')') or match.group() in OPERATEURS:
+            jetons.append((match.group(), None))
+        else:
+            jetons.append(('mot', match.group()))
+    if not jetons:
+        raise ValueError("Requête vide")
+
+    position = 0
+
+    def courant():
+        return jetons[position][0] if position < len(jetons) else None
+
+    def expression_ou():
+        nonlocal position
+        enfants = [expression_et()]
+        while courant() == 'OR':
+            position += 1
+            enfants.append(expression_et())
+        return enfants[0] if len(enfants) == 1 else ('ou', enfants)
+
+    def expression_et():
+        nonlocal position
+        enfants = [expression_non()]
+        while courant() not in (None, 'OR', ')'):
+            if courant() == 'AND':
+                position += 1
+            enfants.append(expression_non())
+        return enfants[0] if len(enfants) == 1 else ('et', enfants)
+
+    def expression_non():
+        nonlocal position
+        if courant() == 'NOT':
+            position += 1
+            return ('non', expression_non())
+        return primaire()
+
+    def primaire():
+        nonlocal position
+        genre = courant()
+        if genre is None:
+            raise ValueError(f"Requête incomplète : {requete!r}")
+        if genre == '(':
+            position += 1
+            noeud = expression_ou()
+            if courant() != ')':
+                raise ValueError(f"Parenthèse non fermée dans {requete!r}")
+            position += 1
+            return noeud
+        if genre in (')', 'AND', 'OR'):
+            raise ValueError(f"{genre} inattendu dans {requete!r}")
+
+        texte = jetons[position][1]
+        position += 1
+        mots = MOT.findall(nettoyer(texte))
+        if not mots:
+            raise ValueError(f"Terme vide après nettoyage : {texte!r}")
+        # Un mot coupé en plusieurs par le nettoyage se cherche comme une phrase
+        if genre == 'mot' and len(mots) == 1:
+            return ('mot', mots[0])
+        return ('phrase', mots)
+
+    arbre = expression_ou()
+    if position < len(jetons):
+        raise ValueError(f"{jetons[position][0]} inattendu dans {requete!r}")
+    return arbre
+
+
+def mots_positifs(arbre):
+    """Mots de la requête qui ne sont pas sous un NOT (pour le classement)."""
+    genre = arbre[0]
+    if genre == 'mot':
+        return [arbre[1]]
+    if genre == 'phrase':
+        return list(arbre[1])
+    if genre == 'non':
+        return []
+    return [mot for enfant in arbre[1] for mot in mots_positifs(enfant)]
+
+
+class IndexBooleen:
+    """
+    Index positionnel compressé pour les requêtes booléennes et les phrases,
+    sur les lignes d'une matrice Documents x Termes (ordre doc_ids) :
+        - documents : pour chaque terme, les lignes qui le contiennent
+        - positions : pour chaque terme, les clés ligne << 32 | position du mot
+    Les deux sont des PostingsCompresses (écarts en variable byte par blocs,
+    table de sauts). Les termes sont ceux du cache d'analyse du corpus.
+    """
+
+    def __init__(self, corpus, doc_ids, taille_bloc=128):
+        self.corpus = corpus
+        self.generation = corpus.generation
+
+        presents = [ligne for ligne, doc_id in enumerate(doc_ids) if doc_id in corpus.id2doc]
+        self.univers = np.array(presents, dtype=np.int64)
+        lignes_locales, termes = corpus.tokens_concatenes([doc_ids[ligne] for ligne in presents])
+        lignes = self.univers[lignes_locales] if len(lignes_locales) else np.zeros(0, dtype=np.int64)
+        nb_termes = len(corpus.liste_termes())
+
+        # Position de chaque mot dans son document
+        longueurs = np.bincount(lignes_locales, minlength=len(presents))
+        rangs = np.arange(len(lignes_locales)) - np.repeat(np.cumsum(longueurs) - longueurs, longueurs)
+
+        # Tri stable par terme : lignes et positions restent croissantes
+        ordre = np.argsort(termes, kind='stable')
+        termes_tries = termes[ordre].astype(np.int64)
+        lignes_triees = lignes[ordre]
+        cles = (lignes_triees << DECALAGE) | rangs[ordre]
+        self.positions = PostingsCompresses.depuis_tableaux(termes_tries, cles, nb_termes, taille_bloc)
+
+        nouveaux = np.r_[True, (termes_tries[1:] != termes_tries[:-1]) | (lignes_triees[1:] != lignes_triees[:-1])]
+        self.documents = PostingsCompresses.depuis_tableaux(
+            termes_tries[nouveaux], lignes_triees[nouveaux], nb_termes, taille_bloc
+        )
+
+    def _terme(self, mot):
+        return self.corpus.id_terme(mot)
+
+    def _taille(self, noeud):
+        """Estimation du nombre de documents d'un nœud (pour ordonner les AND)."""
+        genre = noeud[0]
+        if genre == 'mot':
+            terme_id = self._terme(noeud[1])
+            return self.documents.taille(terme_id) if terme_id is not None else 0
+        if genre == 'phrase':
+            return min(self._taille(('mot', mot)) for mot in noeud[1])
+        if genre == 'et':
+            return min(self._taille(enfant) for enfant in noeud[1])
+        if genre == 'ou':
+            return sum(self._taille(enfant) for enfant in noeud[1])
+        return len(self.univers)
+
+    def _phrase(self, mots, candidats=None):
+        """Lignes contenant les mots consécutifs (candidats : lignes à garder)."""
+        termes = [self._terme(mot) for mot in mots]
+        if any(terme_id is None for terme_id in termes):
+            return np.zeros(0, dtype=np.int64)
+
+        # On part du mot le plus rare : clés de début de phrase possibles
+        rare = min(range(len(mots)), key=lambda i: self.positions.taille(termes[i]))
+        debuts = self.positions.liste(termes[rare]) - rare
+        if candidats is not None:
+            debuts = debuts[np.isin(debuts >> DECALAGE, candidats)]
+        for i, terme_id in enumerate(termes):
+            if i == rare or len(debuts) == 0:
+                continue
+            debuts = self.positions.intersecter(terme_id, debuts + i) - i
+        return np.unique(debuts >> DECALAGE)
+
+    def executer(self, arbre, candidats=None):
+        """Lignes (triées) des documents qui satisfont l'arbre de requête."""
+        genre = arbre[0]
+        if genre == 'mot':
+            terme_id = self._terme(arbre[1])
+            if candidats is not None:
+                return self.documents.intersecter(terme_id, candidats)
+            return self.documents.liste(terme_id)
+        if genre == 'phrase':
+            return self._phrase(arbre[1], candidats)
+        if genre == 'non':
+            base = self.univers if candidats is None else candidats
+            return np.setdiff1d(base, self.executer(arbre[1], base), assume_unique=True)
+        if genre == 'ou':
+            parties = [self.executer(enfant, candidats) for enfant in arbre[1]]
+            return np.unique(np.concatenate(parties))
+
+        # AND : les enfants positifs du plus sélectif au moins sélectif, puis
+        # chacun ne cherche que parmi les lignes qui restent
+        positifs = sorted((e for e in arbre[1] if e[0] != 'non'), key=self._taille)
+        negatifs = [e[1] for e in arbre[1] if e[0] == 'non']
+        resultat = candidats
+        for enfant in positifs:
+            resultat = self.executer(enfant, resultat)
+            if len(resultat) == 0:
+                return resultat
+        if resultat is None:
+            resultat = self.univers
+        for enfant in negatifs:
+            resultat = np.setdiff1d(resultat, self.executer(enfant, resultat), assume_unique=True)
+        return resultat
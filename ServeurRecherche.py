@@ -0,0 +1,534 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+from Corpus import Corpus
+from MoteurRecherche import MoteurRecherche
+from Instrumentation import Instrumentation, StatistiquesMemoire
+
+logger = logging.getLogger('moteur')
+
+# Fichier de la racine qui désigne la génération d'index servie
+POINTEUR = 'COURANT'
+
+# Préfixe des dossiers de génération (generation-000001, ...)
+PREFIXE_GENERATION = 'generation-'
+
+
+# --- Publication des générations ---
+
+def generations(racine):
+    """Noms des générations publiées dans racine, de la plus ancienne à la plus récente."""
+    if not os.path.isdir(racine):
+        return []
+    return sorted(nom for nom in os.listdir(racine)
+                  if nom.startswith(PREFIXE_GENERATION) and os.path.isdir(os.path.join(racine, nom)))
+
+
+def generation_courante(racine):
+    """Nom de la génération désignée par le pointeur (None si rien n'est publié)."""
+    try:
+        with open(os.path.join(racine, POINTEUR), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publier(racine, corpus, moteur, garder=3):
+    """
+    Publie une nouvelle génération dans racine : index (save_index) et corpus
+    (pickle) dans un nouveau dossier, puis bascule atomique du pointeur.
+    Les serveurs qui surveillent racine passent à la nouvelle génération sans
+    interruption. Seules les garder dernières générations sont conservées :
+    un processus qui projette encore un ancien index en mémoire garde ses
+    fichiers (ils ne disparaissent qu'à la fermeture de la projection).
+    Retourne le nom de la génération.
+    """
+    os.makedirs(racine, exist_ok=True)
+    existantes = generations(racine)
+    numero = int(existantes[-1][len(PREFIXE_GENERATION):]) + 1 if existantes else 1
+    nom = f'{PREFIXE_GENERATION}{numero:06d}'
+    dossier = os.path.join(racine, nom)
+    os.makedirs(dossier)
+    moteur.save_index(os.path.join(dossier, 'index'))
+    corpus.save(os.path.join(dossier, 'corpus'), format_type='pickle')
+
+    temporaire = os.path.join(racine, POINTEUR + '.tmp')
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        f.write(nom)
+    os.replace(temporaire, os.path.join(racine, POINTEUR))
+
+    for ancienne in generations(racine)[:-garder] if garder > 0 else []:
+        shutil.rmtree(os.path.join(racine, ancienne), ignore_errors=True)
+    return nom
+
+
+class Generation:
+    """Corpus et moteur d'une génération publiée (en lecture seule une fois chargés)."""
+
+    def __init__(self, nom, corpus, moteur):
+        self.nom = nom
+        self.corpus = corpus
+        self.moteur = moteur
+
+    @classmethod
+    def charger(cls, racine, nom, backend='matrice', instrumentation=None):
+        dossier = os.path.join(racine, nom)
+        corpus = Corpus.load(os.path.join(dossier, 'corpus'), format_type='pickle',
+                             instrumentation=instrumentation)
+        # publier écrit le corpus et l'index ensemble : l'empreinte (lecture de
+        # tous les textes) n'est pas recalculée par chaque processus
+        moteur = MoteurRecherche.open_index(os.path.join(dossier, 'index'), backend=backend,
+                                            instrumentation=instrumentation)
+        moteur.corpus = corpus
+        return cls(nom, corpus, moteur)
+
+
+def fusionner_prometheus(textes):
+    """
+    Réunit les exports Prometheus de plusieurs processus : chaque famille de
+    métriques (ligne # TYPE) n'apparaît qu'une fois, suivie des lignes de tous
+    les processus.
+    """
+    familles = {}   # nom -> (ligne TYPE, lignes)
+    for texte in textes:
+        famille = None
+        for ligne in texte.splitlines():
+            if ligne.startswith('# TYPE '):
+                famille = familles.setdefault(ligne.split()[2], (ligne, []))
+            elif ligne and famille is not None:
+                famille[1].append(ligne)
+    return ''.join(type_ + '\n' + ''.join(l + '\n' for l in lignes) for type_, lignes in familles.values())
+
+
+# --- Regroupement des requêtes concurrentes ---
+
+class LotRequetes:
+    """
+    Regroupe les recherches simples (sans filtre) reçues en même temps par les
+    threads d'un processus : un thread les collecte pendant au plus delai
+    secondes (ou jusqu'à taille_max requêtes) et les évalue d'un seul
+    search_many, un produit creux par lot au lieu d'un par requête (backend
+    'matrice'). Les résultats sont ceux de search quel que soit le backend :
+    une requête avec filtres, évaluée par search, est classée de la même façon.
+    """
+
+    def __init__(self, serveur, taille_max=64, delai=0.002):
+        self.serveur = serveur
+        self.taille_max = taille_max
+        self.delai = delai
+        self._file = queue.Queue()
+        self._thread = threading.Thread(target=self._boucle, daemon=True)
+        self._thread.start()
+
+    def rechercher(self, requete, nb_docs):
+        """Résultats (DataFrame de search) d'une requête, évaluée dans le prochain lot."""
+        attente = {'fait': threading.Event(), 'resultat': None, 'erreur': None}
+        self._file.put((requete, nb_docs, attente))
+        attente['fait'].wait()
+        if attente['erreur'] is not None:
+            raise attente['erreur']
+        return attente['resultat']
+
+    def _boucle(self):
+        while True:
+            lot = [self._file.get()]
+            limite = time.perf_counter() + self.delai
+            while len(lot) < self.taille_max:
+                reste = limite - time.perf_counter()
+                if reste <= 0:
+                    break
+                try:
+                    lot.append(self._file.get(timeout=reste))
+                except queue.Empty:
+                    break
+            self._evaluer(lot)
+
+    def _evaluer(self, lot):
+        instrumentation = self.serveur.instrumentation
+        instrumentation.compter('serveur.lots')
+        instrumentation.compter('serveur.requetes_groupees', len(lot))
+        try:
+            moteur = self.serveur.generation.moteur
+            nb_docs = max(nb for _, nb, _ in lot)
+            resultats = moteur.search_many([requete for requete, _, _ in lot], nb_docs=nb_docs)
+            for (_, nb, attente), resultat in zip(lot, resultats):
+                attente['resultat'] = resultat.head(nb).reset_index(drop=True)
+        except Exception as erreur:
+            for _, _, attente in lot:
+                attente['erreur'] = erreur
+        for _, _, attente in lot:
+            attente['fait'].set()
+
+
+# --- HTTP ---
+
+class _ServeurHTTP(ThreadingMixIn, HTTPServer):
+    # server_close attend la fin des requêtes en cours (arrêt propre)
+    daemon_threads = False
+    block_on_close = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def get_request(self):
+        # La socket d'écoute partagée est non bloquante (plusieurs processus
+        # attendent dessus) ; les connexions acceptées, elles, sont bloquantes
+        connexion, adresse = super().get_request()
+        connexion.setblocking(True)
+        return connexion, adresse
+
+
+def _tableau_json(tableau):
+    """DataFrame -> liste de dictionnaires (NaN -> null)."""
+    return json.loads(tableau.to_json(orient='records', force_ascii=False))
+
+
+class _Gestionnaire(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Une connexion inactive est fermée après timeout secondes
+    timeout = 5
+
+    ROUTES = {'/search': 'search', '/suggest': 'suggest', '/concorde': 'concorde', '/stats': 'stats',
+              '/metrics': 'metrics', '/sante': 'sante'}
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        self._traiter('GET')
+
+    def do_POST(self):
+        self._traiter('POST')
+
+    def _traiter(self, methode):
+        application = self.server.application
+        url = urlparse(self.path)
+        nom = self.ROUTES.get(url.path)
+        if nom is None:
+            application.instrumentation.compter('http.inconnu')
+            return self._repondre(404, {'erreur': f"Chemin inconnu : {url.path}"})
+
+        parametres = {cle: valeurs[0] if len(valeurs) == 1 else valeurs
+                      for cle, valeurs in parse_qs(url.query).items()}
+        with application.instrumentation.etape(f'http.{nom}'):
+            try:
+                if methode == 'POST':
+                    longueur = int(self.headers.get('Content-Length', 0))
+                    corps = json.loads(self.rfile.read(longueur) or b'{}')
+                    if not isinstance(corps, dict):
+                        raise ValueError("Le corps JSON doit être un objet")
+                    parametres.update(corps)
+                statut, reponse = getattr(application, f'_route_{nom}')(methode, parametres)
+            except (ValueError, TypeError, KeyError) as erreur:
+                application.instrumentation.compter('http.erreurs_requete')
+                statut, reponse = 400, {'erreur': str(erreur)}
+            except Exception as erreur:
+                logger.exception("Erreur sur %s", self.path)
+                application.instrumentation.compter('http.erreurs_serveur')
+                statut, reponse = 500, {'erreur': repr(erreur)}
+            self._repondre(statut, reponse)
+
+    def _repondre(self, statut, reponse):
+        if isinstance(reponse, str):
+            corps, type_ = reponse.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            corps, type_ = json.dumps(reponse, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8'
+        self.send_response(statut)
+        self.send_header('Content-Type', type_)
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+
+def _entier(parametres, nom, defaut):
+    valeur = parametres.get(nom, defaut)
+    try:
+        return int(valeur)
+    except (TypeError, ValueError):
+        raise ValueError(f"Paramètre {nom} : entier attendu, reçu {valeur!r}") from None
+
+
+class ServeurRecherche:
+    """
+    Serveur HTTP/JSON local du moteur de recherche, en pré-fork :
+    nb_processus processus partagent la socket d'écoute et servent chacun
+    plusieurs connexions à la fois (un thread par connexion). Tous projettent
+    en mémoire les mêmes fichiers d'index (lecture seule, partagés par le
+    cache de pages) ; le corpus et l'index de départ sont chargés avant le
+    fork.
+
+    racine : dossier des générations écrites par publier(). Chaque processus
+    relit le pointeur toutes les intervalle_rechargement secondes (ou dès
+    SIGHUP) et passe à la nouvelle génération une fois chargée ; les
+    requêtes en cours finissent sur l'ancienne.
+
+    Routes (paramètres en query string, ou corps JSON en POST) :
+        - /search?q=...&n=10 : filtres auteurs, types, date_debut, date_fin ;
+          mode=lexical (défaut), semantique (poids_lexical) ou booleen.
+          En POST, {"requetes": [...], "n": 10} évalue un lot de requêtes
+        - /suggest?q=ame&k=10 : autocomplétion (mots les plus fréquents)
+        - /concorde?motif=...&taille=30&limite=100
+        - /stats?n=10 : mots les plus fréquents
+        - /metrics : durées par route et par étape du moteur, compteurs, au
+          format Prometheus, réunis sur tous les processus
+        - /sante : génération servie, processus, nombre de documents
+
+    Les recherches lexicales sans filtre reçues ensemble sont regroupées en
+    un seul search_many (voir LotRequetes).
+    """
+
+    def __init__(self, racine, hote='127.0.0.1', port=8000, nb_processus=2, backend='matrice',
+                 taille_lot=64, delai_lot=0.002, intervalle_rechargement=0.5, intervalle_metriques=1.0):
+        if nb_processus <= 0:
+            raise ValueError(f"nb_processus doit être strictement positif : {nb_processus}")
+        if generation_courante(racine) is None:
+            raise ValueError(f"Aucune génération publiée dans {racine} (voir publier)")
+        self.racine = racine
+        self.nb_processus = nb_processus
+        self.backend = backend
+        self.taille_lot = taille_lot
+        self.delai_lot = delai_lot
+        self.intervalle_rechargement = intervalle_rechargement
+        self.intervalle_metriques = intervalle_metriques
+
+        self.statistiques = StatistiquesMemoire()
+        self.instrumentation = Instrumentation([self.statistiques])
+        self.generation = Generation.charger(racine, generation_courante(racine), backend, self.instrumentation)
+
+        self.serveur = _ServeurHTTP((hote, port), _Gestionnaire)
+        self.serveur.application = self
+        self.serveur.socket.setblocking(False)
+        self.dossier_metriques = tempfile.mkdtemp(prefix='metriques-')
+        self.enfants = set()
+        self._arret = False
+        self._reveil = threading.Event()
+        self.lots = None
+
+    @property
+    def adresse(self):
+        hote, port = self.serveur.server_address[:2]
+        return f'http://{hote}:{port}'
+
+    # --- Processus parent ---
+
+    def demarrer(self):
+        """Lance les processus et les surveille (bloquant jusqu'à SIGINT / SIGTERM)."""
+        def arreter(signum, frame):
+            self._arret = True
+            self._signaler(signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, arreter)
+        signal.signal(signal.SIGINT, arreter)
+        signal.signal(signal.SIGHUP, lambda signum, frame: self._signaler(signal.SIGHUP))
+        logger.info("Serveur sur %s (%d processus, %s)", self.adresse, self.nb_processus, self.generation.nom)
+        try:
+            for _ in range(self.nb_processus):
+                self._lancer()
+            while self.enfants:
+                try:
+                    pid, _ = os.wait()
+                except ChildProcessError:
+                    break
+                self.enfants.discard(pid)
+                if not self._arret:
+                    # Un processus mort est remplacé
+                    logger.warning("Processus %d arrêté, relancé", pid)
+                    self._lancer()
+        finally:
+            self.serveur.server_close()
+            shutil.rmtree(self.dossier_metriques, ignore_errors=True)
+
+    def _signaler(self, signum):
+        for pid in list(self.enfants):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _lancer(self):
+        pid = os.fork()
+        if pid:
+            self.enfants.add(pid)
+            return
+        code = 0
+        try:
+            self.servir_processus()
+        except BaseException:
+            logger.exception("Processus %d interrompu", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    # --- Processus de service ---
+
+    def servir_processus(self):
+        """Boucle de service d'un processus (appelée après le fork, ou seule pour déboguer)."""
+        self.enfants = set()
+        self.statistiques.vider()
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=self.serveur.shutdown).start())
+        signal.signal(signal.SIGHUP, lambda signum, frame: self._reveil.set())
+        self.lots = LotRequetes(self, self.taille_lot, self.delai_lot)
+        threading.Thread(target=self._surveiller, daemon=True).start()
+        try:
+            self.serveur.serve_forever(poll_interval=0.1)
+            self.serveur.server_close()
+        finally:
+            try:
+                os.remove(self._fichier_metriques())
+            except FileNotFoundError:
+                pass
+
+    def _surveiller(self):
+        """Rechargement des nouvelles générations et export périodique des métriques."""
+        prochain_export = 0.0
+        while True:
+            self._reveil.wait(min(self.intervalle_rechargement, self.intervalle_metriques))
+            self._reveil.clear()
+            try:
+                self.recharger()
+            except Exception:
+                # La génération en place continue d'être servie
+                logger.exception("Rechargement impossible, génération %s conservée", self.generation.nom)
+            if time.monotonic() >= prochain_export:
+                self._exporter_metriques()
+                prochain_export = time.monotonic() + self.intervalle_metriques
+
+    def recharger(self):
+        """Charge la génération désignée par le pointeur si elle a changé ; retourne True si oui."""
+        nom = generation_courante(self.racine)
+        if nom is None or nom == self.generation.nom:
+            return False
+        with self.instrumentation.etape('serveur.rechargement'):
+            generation = Generation.charger(self.racine, nom, self.backend, self.instrumentation)
+        # Simple remplacement de référence : les requêtes en cours gardent l'ancienne
+        self.generation = generation
+        self.instrumentation.compter('serveur.rechargements')
+        logger.info("Processus %d : génération %s", os.getpid(), nom)
+        return True
+
+    def _fichier_metriques(self):
+        return os.path.join(self.dossier_metriques, f'{os.getpid()}.prom')
+
+    def _exporter_metriques(self):
+        texte = self.statistiques.prometheus(etiquettes={'processus': os.getpid()})
+        temporaire = self._fichier_metriques() + '.tmp'
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            f.write(texte)
+        os.replace(temporaire, self._fichier_metriques())
+
+    # --- Routes ---
+
+    def _route_search(self, methode, parametres):
+        generation = self.generation
+        moteur = generation.moteur
+        nb_docs = _entier(parametres, 'n', 10)
+
+        if 'requetes' in parametres:
+            requetes = parametres['requetes']
+            if isinstance(requetes, str):
+                requetes = [requetes]
+            resultats = moteur.search_many(requetes, nb_docs=nb_docs)
+            return 200, {'generation': generation.nom,
+                         'resultats': [_tableau_json(tableau) for tableau in resultats]}
+
+        requete = parametres.get('q')
+        if not isinstance(requete, str):
+            raise ValueError("Paramètre q (requête) manquant")
+        mode = parametres.get('mode', 'lexical')
+        filtres = {nom: parametres.get(nom) for nom in ('auteurs', 'types', 'date_debut', 'date_fin')}
+
+        if mode == 'lexical':
+            if all(valeur is None for valeur in filtres.values()):
+                tableau = self.lots.rechercher(requete, nb_docs)
+            else:
+                tableau = moteur.search(requete, nb_docs, **filtres)
+        elif mode == 'semantique':
+            tableau = moteur.search_semantique(requete, nb_docs, float(parametres.get('poids_lexical', 0.0)),
+                                               **filtres)
+        elif mode == 'booleen':
+            tableau = moteur.search_booleen(requete, nb_docs)
+        else:
+            raise ValueError(f"Mode inconnu : {mode} (attendu : lexical, semantique, booleen)")
+        return 200, {'generation': generation.nom, 'resultats': _tableau_json(tableau)}
+
+    def _route_suggest(self, methode, parametres):
+        generation = self.generation
+        prefixe = parametres.get('q')
+        if not isinstance(prefixe, str):
+            raise ValueError("Paramètre q (préfixe) manquant")
+        return 200, {'generation': generation.nom,
+                     'suggestions': generation.moteur.suggest(prefixe, _entier(parametres, 'k', 10))}
+
+    def _route_concorde(self, methode, parametres):
+        generation = self.generation
+        motif = parametres.get('motif')
+        if not isinstance(motif, str) or not motif:
+            raise ValueError("Paramètre motif manquant")
+        tableau = generation.corpus.concorde(motif, _entier(parametres, 'taille', 30),
+                                             _entier(parametres, 'limite', 100))
+        return 200, {'generation': generation.nom, 'resultats': _tableau_json(tableau)}
+
+    def _route_stats(self, methode, parametres):
+        generation = self.generation
+        tableau = generation.corpus.stats(_entier(parametres, 'n', 10), afficher=False)
+        return 200, {'generation': generation.nom, 'nb_documents': generation.corpus.ndoc,
+                     'nb_mots_differents': len(tableau),
+                     'mots': _tableau_json(tableau.head(_entier(parametres, 'n', 10)))}
+
+    def _route_metrics(self, methode, parametres):
+        self._exporter_metriques()
+        textes = []
+        for nom in sorted(os.listdir(self.dossier_metriques)):
+            if nom.endswith('.prom'):
+                try:
+                    with open(os.path.join(self.dossier_metriques, nom), encoding='utf-8') as f:
+                        textes.append(f.read())
+                except FileNotFoundError:
+                    pass
+        return 200, fusionner_prometheus(textes)
+
+    def _route_sante(self, methode, parametres):
+        generation = self.generation
+        return 200, {'generation': generation.nom, 'processus': os.getpid(),
+                     'nb_documents': len(generation.moteur.doc_ids)}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Serveur HTTP/JSON local du moteur de recherche")
+    parser.add_argument('racine', help="dossier des générations d'index (voir publier)")
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--processus', type=int, default=2, help="nombre de processus de service")
+    parser.add_argument('--backend', default='matrice')
+    parser.add_argument('--csv', default=None,
+                        help="construit et publie d'abord une génération à partir de ce CSV")
+    parser.add_argument('--sep', default=',')
+    parser.add_argument('--ponderation', default='tfidf')
+    options = parser.parse_args(arguments)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(process)d %(message)s')
+
+    if options.csv:
+        corpus = Corpus(os.path.splitext(os.path.basename(options.csv))[0])
+        corpus.charger_csv(options.csv, sep=options.sep)
+        moteur = MoteurRecherche(corpus, backend=options.backend, ponderation=options.ponderation)
+        logger.info("Génération %s publiée", publier(options.racine, corpus, moteur))
+
+    serveur = ServeurRecherche(options.racine, options.hote, options.port, options.processus, options.backend)
+    serveur.demarrer()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import os
+import zlib
+
+import numpy as np
+
+
+def ecrire_tableau(dossier, nom, tableau, fichiers):
+    """
+    Écrit un tableau numpy brut dans dossier/nom.bin et ajoute sa description
+    (dtype, taille, CRC32) au dictionnaire fichiers de l'entête.
+    """
+    tableau = np.ascontiguousarray(tableau)
+    tableau.tofile(os.path.join(dossier, f'{nom}.bin'))
+    fichiers[nom] = {
+        'dtype': str(tableau.dtype),
+        'taille': int(tableau.size),
+        'crc32': zlib.crc32(tableau.tobytes())
+    }
+
+
+def lire_tableau(dossier, nom, fichiers, mmap=True, verifier=False):
+    """
+    Relit un tableau écrit par ecrire_tableau, projeté en mémoire en lecture
+    seule si mmap. verifier=True contrôle le CRC32 (lit tout le fichier).
+    """
+    info = fichiers[nom]
+    chemin = os.path.join(dossier, f'{nom}.bin')
+    if info['taille'] == 0:
+        tableau = np.zeros(0, dtype=info['dtype'])
+    elif mmap:
+        tableau = np.memmap(chemin, dtype=info['dtype'], mode='r', shape=(info['taille'],))
+    else:
+        tableau = np.fromfile(chemin, dtype=info['dtype'], count=info['taille'])
+
+    if verifier and zlib.crc32(np.asarray(tableau).tobytes()) != info['crc32']:
+        raise ValueError(f"Fichier {chemin} corrompu : somme de contrôle invalide")
+    return tableau
+
+
+class EcrivainTableau:
+    """
+    Écrit un tableau par morceaux successifs dans dossier/nom.bin, sans jamais
+    l'avoir en entier en mémoire. Le fichier et sa description (CRC32 cumulé)
+    sont identiques à ceux de ecrire_tableau sur le tableau complet.
+    """
+
+    def __init__(self, dossier, nom, dtype):
+        self.nom = nom
+        self.dtype = np.dtype(dtype)
+        self.taille = 0
+        self.crc32 = 0
+        self.fichier = open(os.path.join(dossier, f'{nom}.bin'), 'wb')
+
+    def ajouter(self, morceau):
+        octets = np.ascontiguousarray(morceau, dtype=self.dtype).tobytes()
+        self.fichier.write(octets)
+        self.crc32 = zlib.crc32(octets, self.crc32)
+        self.taille += len(octets) // self.dtype.itemsize
+
+    def fermer(self, fichiers):
+        """Ferme le fichier et ajoute sa description au dictionnaire fichiers."""
+        self.fichier.close()
+        fichiers[self.nom] = {'dtype': str(self.dtype), 'taille': self.taille, 'crc32': self.crc32}
@@ -0,0 +1,20 @@
+import numpy as np
+
+
+def selection_top_k(scores, k):
+    """
+    Indices des k meilleurs scores, triés par score décroissant.
+    À score égal, l'ordre des documents est conservé (comme un tri stable).
+    """
+    n = scores.shape[0]
+    if k >= n:
+        candidats = np.arange(n)
+    else:
+        # Valeur du k-ième meilleur score, sans trier tout le tableau
+        seuil = np.partition(scores, n - k)[n - k]
+        superieurs = np.flatnonzero(scores > seuil)
+        egaux = np.flatnonzero(scores == seuil)[:k - len(superieurs)]
+        candidats = np.concatenate([superieurs, egaux])
+
+    ordre = np.lexsort((candidats, -scores[candidats]))
+    return candidats[ordre]
@@ -1,106 +1,51 @@
-import praw
-import pandas as pd
-import urllib.request
-import xmltodict
-from datetime import datetime
-reddit = praw.Reddit(
-    client_id='g0yGjEVRBuR3QgQr4bSHRw',
-    client_secret='6BHtjRDAR1MrL6xe1jWhUA3N3FQdwQ',
-    user_agent='Python WebScraping'
-)
-
-keyword = "climate"  # mot-clé de recherche
-ids = []
-titres = []
-auteurs = []
-dates = []
-urls = []
-textes = []
-sources = []
-
-doc_id = 0
-
-print("Récupération Reddit…")
-
-for post in reddit.subreddit("all").search(keyword,
-limit=10):
-
-    if not post.selftext:  # ignorer posts sans texte
-        continue
-    texte = post.selftext.replace("\n", " ")
-
-    # auteur = inconnu si None
-    auteur = str(post.author) if post.author else "inconnu"
-
-    ids.append(doc_id)
-    titres.append(post.title)
-    auteurs.append(auteur)
-    dates.append(datetime.fromtimestamp(post.created_utc).strftime("%Y-%m-%d"))
-    urls.append(post.url)
-    textes.append(texte)
-    sources.append("reddit")
-    doc_id += 1
-
-print(f"→ {sum(1 for s
-in sources if s == 'reddit')} documents Reddit récupérés.")
-
-print("Récupération Arxiv…")
-
-url = f"http://export.arxiv.org/api/query?search_query=all:{keyword}&start=0&max_results=10"
-response = urllib.request.urlopen(url)
-
-data = response.read()
-parsed = xmltodict.parse(data)
-entries = parsed["feed"]["entry"]
-
-if not isinstance(entries, list):
-    entries = [entries]   # 1 seul résultat possible
+import asyncio
+import os
 
-for entry in entries:
-
-    summary = entry["summary"].replace("\n", "")
-    titre = entry["title"]
-    pdf_url = entry["id"]
-    date_pub = entry["published"][:10]  # format YYYY-MM-DD
-    author_field = entry.get("author", None)
-
-    if author_field is None:
-        auteur = "inconnu"
-
-    elif isinstance(author_field, list):  # plusieurs auteurs
-
-        auteur = ", ".join(a["name"] for a
-in author_field)
-
-    else:  # un seul auteur
-        auteur = author_field["name"]
-
-    # Ajouter au DataFrame 
-    ids.append(doc_id)
-    titres.append(titre)
-    auteurs.append(auteur)
-    dates.append(date_pub)
-    urls.append(pdf_url)
-    textes.append(summary)
-    sources.append("arxiv")
+import pandas as pd
 
-    doc_id += 1
+from Corpus import Corpus
+from Ingestion import PipelineIngestion, SourceArxiv, SourceReddit
 
-print(f"→ {sum(1 for s
-in sources if s == 'arxiv')} documents Arxiv récupérés.")
+keyword = "climate"  # mot-clé de recherche
+limite_reddit = 100   # nombre maximal de posts Reddit parcourus
+limite_arxiv = 100    # nombre maximal d'articles Arxiv
+chemin = "corpus.csv"
+
+# Identifiants Reddit lus dans l'environnement (voir README) ; sans eux,
+# la recherche passe par l'API publique, plus lente
+client_id = os.environ.get("CLIENT_ID")
+client_secret = os.environ.get("CLIENT_SECRET")
+user_agent = os.environ.get("USER_AGENT", "MoteurRechercheInfoMaison")
+
+# Le corpus existant est rechargé : les nouveaux documents sont ajoutés à la
+# fin de corpus.csv (les URL déjà présentes sont ignorées)
+corpus = Corpus("Corpus")
+if os.path.exists(chemin):
+    corpus.charger_csv(chemin, sep=",", colonnes_type=("source", "Source"))
+print(f"Corpus existant : {corpus.ndoc} documents.")
+
+print("Récupération Reddit et Arxiv…")
+pipeline = PipelineIngestion(
+    corpus,
+    [
+        SourceReddit(keyword, limite=limite_reddit, client_id=client_id,
+                     client_secret=client_secret, user_agent=user_agent),
+        SourceArxiv(keyword, limite=limite_arxiv),
+    ],
+    chemin_csv=chemin,
+)
+asyncio.run(pipeline.executer())
 
-df = pd.DataFrame({
-    "id": ids,
-    "titre": titres,
-    "auteur": auteurs,
-    "date": dates,
-    "url": urls,
-    "texte": textes,
-    "source": sources
-})
+print(f"→ {pipeline.nb_ajoutes.get('reddit', 0)} documents Reddit récupérés.")
+print(f"→ {pipeline.nb_ajoutes.get('arxiv', 0)} documents Arxiv récupérés.")
+print(f"→ {pipeline.nb_ignores} documents déjà présents ignorés.")
+for source, erreur in pipeline.erreurs.items():
+    print(f"Erreur {source} : {erreur}")
 
-df.to_csv("corpus.csv", index=False)
-print("\n Fichier corpus.csv sauvegardé avec succès !")
+if not os.path.exists(chemin):
+    raise SystemExit("Aucun document récupéré : corpus.csv n'a pas été créé.")
+df = pd.read_csv(chemin)
+print("\n Fichier corpus.csv mis à jour avec succès !")
 
 print("\n=== TAILLE DU CORPUS ===")
 
@@ -109,23 +54,16 @@ print("Nombre de documents :", len(df))
 print("\n===== NOMBRE DE MOTS ET PHRASES =====")
 
 for _, row in df.iterrows():
-    mots = len(row["texte"].split())
-    phrases = len(row["texte"].split("."))
+    mots = len(str(row["texte"]).split())
+    phrases = len(str(row["texte"]).split("."))
     print(f"Doc {row['id']}: {mots} mots, {phrases} phrases")
 
 print("\n=== SUPPRESSION DOCS < 20 CARACTERES ===")
-df_clean = df[df["texte"].str.len() >=
-20]
+df_clean = df[df["texte"].astype(str).str.len() >= 20]
 print("Documents conservés :", len(df_clean))
 
-
-
-
-
-
-
 print("\n===== CREATION CHAINE TOTALE =====")
 
-big_string = " ".join(df_clean["texte"])
+big_string = " ".join(df_clean["texte"].astype(str))
 
-print("Début de la chaîne :", big_string[:200], "...")
\ No newline at end of file
+print("Début de la chaîne :", big_string[:200], "...")
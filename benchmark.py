@@ -0,0 +1,398 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Corpus import Corpus, nettoyer, MOT
+from MoteurRecherche import MoteurRecherche
+
+# Format des fichiers de résultats (à incrémenter si leur structure change)
+FORMAT_RESULTATS = 'benchmark'
+VERSION_RESULTATS = 2
+
+# Chaque mesure est répétée (corpus rechargé, moteurs reconstruits) et la médiane gardée
+REPETITIONS = 5
+
+# En dessous de ce nombre de répétitions, une variation n'est pas déclarée régression
+REPETITIONS_MIN = 3
+
+# Largeur de la bande de bruit, en écarts-types robustes des deux exécutions combinés
+FACTEUR_BRUIT = 3.0
+
+# Mesures où une valeur plus grande est meilleure (toutes les autres : plus petite)
+PLUS_GRAND_MEILLEUR = ('qps',)
+
+# Valeurs descriptives, non comparées d'une exécution à l'autre
+MESURES_IGNOREES = ('nb', 'taille_vocabulaire', 'taille_csv_mo', 'rss_mo', 'rss_delta_mo')
+
+
+class ModeleCorpus:
+    """
+    Statistiques d'un corpus réel servant de modèle au générateur :
+        - vocabulaire trié par fréquence et exposant de Zipf (fréquence ~ rang^-s)
+        - loi de Heaps (taille du vocabulaire ~ K * nb_mots^beta)
+        - longueurs des documents (log-normale)
+    """
+
+    def __init__(self, mots, exposant_zipf, heaps_k, heaps_beta, log_longueur_moyenne, log_longueur_ecart):
+        self.mots = mots
+        self.exposant_zipf = exposant_zipf
+        self.heaps_k = heaps_k
+        self.heaps_beta = heaps_beta
+        self.log_longueur_moyenne = log_longueur_moyenne
+        self.log_longueur_ecart = log_longueur_ecart
+
+    @classmethod
+    def depuis_csv(cls, chemin='discours_US.csv', sep='\t', colonne='text'):
+        textes = pd.read_csv(chemin, sep=sep)[colonne].dropna().astype(str)
+        tokens = [MOT.findall(nettoyer(texte)) for texte in textes]
+        flux = [mot for doc in tokens for mot in doc]
+
+        mots, comptes = np.unique(flux, return_counts=True)
+        ordre = np.argsort(-comptes, kind='stable')
+        mots, comptes = mots[ordre], comptes[ordre]
+
+        # Zipf : pente de log(fréquence) en fonction de log(rang), hors tête et queue
+        rangs = np.arange(1, len(comptes) + 1)
+        zone = slice(10, max(11, min(len(comptes), 2000)))
+        exposant = -np.polyfit(np.log(rangs[zone]), np.log(comptes[zone]), 1)[0]
+
+        # Heaps : croissance du vocabulaire le long du flux de mots
+        _, premiers = np.unique(flux, return_index=True)
+        nouveaux = np.zeros(len(flux), dtype=np.int64)
+        nouveaux[premiers] = 1
+        vocabulaire = np.cumsum(nouveaux)
+        points = np.unique(np.geomspace(100, len(flux), 30).astype(np.int64)) - 1
+        beta, log_k = np.polyfit(np.log(points + 1), np.log(vocabulaire[points]), 1)
+
+        longueurs = np.log(np.array([max(len(doc), 1) for doc in tokens], dtype=np.float64))
+        return cls(list(mots), float(exposant), float(np.exp(log_k)), float(beta),
+                   float(longueurs.mean()), float(longueurs.std()))
+
+
+def generer_corpus(chemin, nb_docs, modele, graine=0, mots_par_doc=None, taille_lot=10000):
+    """
+    Écrit un CSV synthétique de nb_docs documents (colonnes de corpus.csv),
+    par lots de taille_lot : la mémoire ne dépend pas de nb_docs.
+    Les mots suivent la loi de Zipf du modèle sur un vocabulaire dont la taille
+    suit la loi de Heaps ; au-delà des mots réels, des variantes numérotées
+    (« climate7 ») complètent le vocabulaire.
+    mots_par_doc : longueur moyenne imposée (sinon celle du modèle).
+    """
+    rng = np.random.default_rng(graine)
+    moyenne = modele.log_longueur_moyenne if mots_par_doc is None else np.log(mots_par_doc) - modele.log_longueur_ecart ** 2 / 2
+    nb_mots_estime = nb_docs * np.exp(moyenne + modele.log_longueur_ecart ** 2 / 2)
+    taille_vocabulaire = max(len(modele.mots) // 10, int(modele.heaps_k * nb_mots_estime ** modele.heaps_beta))
+
+    reels = np.array(modele.mots[:taille_vocabulaire], dtype=object)
+    if taille_vocabulaire > len(reels):
+        suffixes = np.arange(len(reels), taille_vocabulaire)
+        base = np.array(modele.mots, dtype=object)[suffixes % len(modele.mots)]
+        vocabulaire = np.concatenate([reels, base + (suffixes // len(modele.mots)).astype(str).astype(object)])
+    else:
+        vocabulaire = reels
+    poids = np.arange(1, taille_vocabulaire + 1, dtype=np.float64) ** -modele.exposant_zipf
+    repartition = np.cumsum(poids / poids.sum())
+
+    nb_auteurs = max(2, nb_docs // 50)
+    poids_auteurs = np.arange(1, nb_auteurs + 1, dtype=np.float64) ** -1.0
+    repartition_auteurs = np.cumsum(poids_auteurs / poids_auteurs.sum())
+    debut_dates = np.datetime64('2010-01-01')
+    nb_jours = int((np.datetime64('2026-01-01') - debut_dates).astype(np.int64))
+    sources = np.array(['reddit', 'arxiv', 'discours'], dtype=object)
+
+    if os.path.exists(chemin):
+        os.remove(chemin)
+    for debut in range(0, nb_docs, taille_lot):
+        n = min(taille_lot, nb_docs - debut)
+        longueurs = np.maximum(1, rng.lognormal(moyenne, modele.log_longueur_ecart, n).astype(np.int64))
+        rangs = np.searchsorted(repartition, rng.random(int(longueurs.sum())), side='right')
+        rangs = np.minimum(rangs, taille_vocabulaire - 1)
+        mots = vocabulaire[rangs]
+        bornes = np.cumsum(longueurs)
+        textes = [' '.join(morceau) for morceau in np.split(mots, bornes[:-1])]
+        titres = [' '.join(texte.split(' ', 6)[:6]) for texte in textes]
+        auteurs = np.searchsorted(repartition_auteurs, rng.random(n), side='right')
+        dates = (debut_dates + rng.integers(0, nb_jours, n).astype('timedelta64[D]')).astype(str)
+        ids = np.arange(debut, debut + n)
+        pd.DataFrame({
+            'id': ids,
+            'titre': titres,
+            'auteur': [f'auteur_{a}' for a in auteurs],
+            'date': dates,
+            'url': [f'https://exemple.org/doc/{i}' for i in ids],
+            'texte': textes,
+            'source': sources[rng.integers(0, len(sources), n)],
+        }).to_csv(chemin, mode='a', header=debut == 0, index=False)
+    return taille_vocabulaire
+
+
+def _reinitialiser_pic():
+    """Remet à zéro le pic de mémoire du processus (Linux uniquement)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _memoire():
+    """(RSS actuelle, pic de RSS) en Mo ; pic depuis le dernier _reinitialiser_pic sous Linux."""
+    try:
+        valeurs = {}
+        with open('/proc/self/status') as f:
+            for ligne in f:
+                cle, _, reste = ligne.partition(':')
+                if cle in ('VmRSS', 'VmHWM'):
+                    valeurs[cle] = int(reste.split()[0]) / 1024
+        return valeurs['VmRSS'], valeurs['VmHWM']
+    except (OSError, KeyError):
+        # ru_maxrss : en Ko sous Linux, en octets sous macOS
+        pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pic = pic / 1024 / 1024 if sys.platform == 'darwin' else pic / 1024
+        return float('nan'), pic
+
+
+def mesurer(fonction):
+    """Exécute fonction() et retourne (résultat, {'duree_s', 'rss_mo', 'rss_pic_mo'})."""
+    _reinitialiser_pic()
+    avant, _ = _memoire()
+    debut = time.perf_counter()
+    resultat = fonction()
+    duree = time.perf_counter() - debut
+    apres, pic = _memoire()
+    return resultat, {'duree_s': duree, 'rss_mo': apres, 'rss_delta_mo': apres - avant, 'rss_pic_mo': pic}
+
+
+def latences(fonction, arguments, nb_chauffe=5):
+    """Latences (ms) de fonction sur chaque argument, après quelques appels de chauffe."""
+    for argument in arguments[:nb_chauffe]:
+        fonction(argument)
+    durees = np.empty(len(arguments))
+    debut_total = time.perf_counter()
+    for i, argument in enumerate(arguments):
+        debut = time.perf_counter()
+        fonction(argument)
+        durees[i] = time.perf_counter() - debut
+    total = time.perf_counter() - debut_total
+    return {
+        'nb': len(arguments),
+        'p50_ms': float(np.percentile(durees, 50) * 1000),
+        'p95_ms': float(np.percentile(durees, 95) * 1000),
+        'p99_ms': float(np.percentile(durees, 99) * 1000),
+        'max_ms': float(durees.max() * 1000),
+        'qps': len(arguments) / total if total > 0 else float('inf'),
+    }
+
+
+def requetes_aleatoires(mots, nb, graine=0):
+    """Requêtes de 1 à 3 mots tirés parmi les mots de fréquence moyenne du corpus."""
+    rng = np.random.default_rng(graine)
+    zone = mots[min(50, len(mots) - 1):max(51, min(len(mots), 5000))]
+    return [' '.join(rng.choice(zone, size=rng.integers(1, 4))) for _ in range(nb)]
+
+
+def dispersion(valeurs):
+    """
+    Écart-type robuste relatif d'une série de mesures (1.4826 * MAD / médiane) :
+    0 pour une seule mesure.
+    """
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    mediane = np.median(valeurs)
+    if len(valeurs) < 2 or not mediane or np.isnan(mediane):
+        return 0.0
+    return float(1.4826 * np.median(np.abs(valeurs - mediane)) / abs(mediane))
+
+
+def executer(nb_docs, modele, dossier, backends=('matrice', 'index'), ponderations=('tfidf',),
+             nb_requetes=500, graine=0, mots_par_doc=None, repetitions=REPETITIONS):
+    """
+    Génère un corpus de nb_docs documents et mesure chaque étape repetitions
+    fois. Retourne (résultats, dispersions) : la médiane de chaque mesure et
+    son écart-type robuste relatif (voir dispersion).
+    """
+    if repetitions < 1:
+        raise ValueError("repetitions doit être au moins 1")
+    chemin = os.path.join(dossier, f'synthetique_{nb_docs}.csv')
+    resultats = {}
+    taille_vocabulaire, resultats['generation'] = mesurer(
+        lambda: generer_corpus(chemin, nb_docs, modele, graine, mots_par_doc)
+    )
+    resultats['generation']['taille_vocabulaire'] = taille_vocabulaire
+    resultats['generation']['taille_csv_mo'] = os.path.getsize(chemin) / 1024 / 1024
+
+    echantillons = {}   # etape -> mesure -> valeurs des répétitions
+    for _ in range(repetitions):
+        for etape, mesures in _executer_une_fois(chemin, modele, backends, ponderations,
+                                                 nb_requetes, graine).items():
+            for mesure, valeur in mesures.items():
+                echantillons.setdefault(etape, {}).setdefault(mesure, []).append(valeur)
+    os.remove(chemin)
+
+    dispersions = {}
+    for etape, mesures in echantillons.items():
+        resultats[etape] = {mesure: float(np.median(valeurs)) for mesure, valeurs in mesures.items()}
+        dispersions[etape] = {mesure: dispersion(valeurs) for mesure, valeurs in mesures.items()}
+    return resultats, dispersions
+
+
+def _executer_une_fois(chemin, modele, backends, ponderations, nb_requetes, graine):
+    """Une mesure de chaque étape sur le corpus déjà généré dans chemin."""
+    resultats = {}
+    corpus = Corpus('benchmark')
+    _, resultats['chargement'] = mesurer(
+        lambda: corpus.charger_csv(chemin, sep=',', colonnes_type=('source', 'Source'))
+    )
+    _, resultats['analyse'] = mesurer(lambda: corpus.analyser())
+
+    requetes = requetes_aleatoires(modele.mots, nb_requetes, graine)
+    for ponderation in ponderations:
+        for backend in backends:
+            nom = f'moteur_{backend}_{ponderation}'
+            moteur, resultats[f'{nom}_construction'] = mesurer(
+                lambda: MoteurRecherche(corpus, backend=backend, ponderation=ponderation)
+            )
+            resultats[f'{nom}_search'] = latences(lambda requete: moteur.search(requete, 10), requetes)
+            del moteur
+
+    mots_concorde = [requete.split()[0] for requete in requetes[:20]]
+    resultats['concorde'] = latences(lambda mot: corpus.concorde(mot, limite=100), mots_concorde, nb_chauffe=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, resultats['stats'] = mesurer(lambda: corpus.stats(10))
+    return resultats
+
+
+def environnement():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plateforme': platform.platform(),
+        'processeurs': os.cpu_count(),
+    }
+
+
+def comparer(ancien, nouveau, seuil=0.10, facteur_bruit=FACTEUR_BRUIT, repetitions_min=REPETITIONS_MIN):
+    """
+    Compare deux fichiers de résultats, mesure par mesure (médianes des
+    répétitions). Une mesure régresse si elle se dégrade (plus lente, plus
+    gourmande, ou moins de requêtes par seconde) au-delà de sa tolérance :
+    le plus grand de seuil (10 % par défaut) et de facteur_bruit fois le
+    bruit, écart-type robuste relatif des deux exécutions combinés.
+    Une comparaison dont l'un des fichiers a moins de repetitions_min
+    répétitions n'est pas fiable : ses variations sont affichées mais ne
+    sont pas des régressions.
+    Retourne un DataFrame (taille, etape, mesure, ancien, nouveau, variation,
+    bruit, tolerance, fiable, regression).
+    """
+    # Fichiers de la version 1 : une seule exécution, sans dispersion
+    nb_ancien = ancien.get('parametres', {}).get('repetitions', 1)
+    nb_nouveau = nouveau.get('parametres', {}).get('repetitions', 1)
+    fiable = min(nb_ancien, nb_nouveau) >= repetitions_min
+
+    lignes = []
+    for taille, etapes in nouveau['resultats'].items():
+        for etape, mesures in etapes.items():
+            if etape == 'generation':
+                # Génération du corpus : outil de mesure, pas le moteur
+                continue
+            anciennes = ancien['resultats'].get(taille, {}).get(etape, {})
+            bruits_anciens = ancien.get('dispersions', {}).get(taille, {}).get(etape, {})
+            bruits_nouveaux = nouveau.get('dispersions', {}).get(taille, {}).get(etape, {})
+            for mesure, valeur in mesures.items():
+                reference = anciennes.get(mesure)
+                if reference is None or mesure in MESURES_IGNOREES:
+                    continue
+                if not reference or np.isnan(reference) or np.isnan(valeur):
+                    continue
+                variation = (valeur - reference) / abs(reference)
+                bruit = float(np.hypot(bruits_anciens.get(mesure, 0.0), bruits_nouveaux.get(mesure, 0.0)))
+                tolerance = max(seuil, facteur_bruit * bruit)
+                plus_grand = mesure in PLUS_GRAND_MEILLEUR
+                regression = fiable and (variation < -tolerance if plus_grand else variation > tolerance)
+                lignes.append((int(taille), etape, mesure, reference, valeur, variation, bruit, tolerance,
+                               fiable, regression))
+    return pd.DataFrame(lignes, columns=['taille', 'etape', 'mesure', 'ancien', 'nouveau', 'variation',
+                                         'bruit', 'tolerance', 'fiable', 'regression'])
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance du moteur sur des corpus synthétiques")
+    parser.add_argument('--docs', type=int, nargs='+', default=[1000, 10000],
+                        help="tailles des corpus générés (nombre de documents)")
+    parser.add_argument('--mots-par-doc', type=int, default=None,
+                        help="longueur moyenne des documents (défaut : celle du modèle)")
+    parser.add_argument('--modele', default='discours_US.csv', help="CSV (séparateur tabulation) servant de modèle")
+    parser.add_argument('--backends', nargs='+', default=['matrice', 'index'])
+    parser.add_argument('--ponderations', nargs='+', default=['tfidf'])
+    parser.add_argument('--requetes', type=int, default=500, help="nombre de requêtes mesurées")
+    parser.add_argument('--repetitions', type=int, default=REPETITIONS,
+                        help="répétitions de chaque mesure (la médiane est gardée)")
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--sortie', default=None, help="fichier JSON des résultats")
+    parser.add_argument('--comparer', nargs=2, metavar=('ANCIEN', 'NOUVEAU'),
+                        help="compare deux fichiers de résultats au lieu de mesurer")
+    parser.add_argument('--seuil', type=float, default=0.10, help="dégradation tolérée avant régression")
+    parser.add_argument('--bruit', type=float, default=FACTEUR_BRUIT,
+                        help="tolérance minimale en écarts-types robustes des mesures")
+    options = parser.parse_args(arguments)
+
+    if options.comparer:
+        with open(options.comparer[0], encoding='utf-8') as f:
+            ancien = json.load(f)
+        with open(options.comparer[1], encoding='utf-8') as f:
+            nouveau = json.load(f)
+        tableau = comparer(ancien, nouveau, options.seuil, options.bruit)
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(tableau.to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+        regressions = tableau[tableau['regression']]
+        print(f"\n{len(regressions)} régression(s) au-delà de {options.seuil:.0%} "
+              f"ou de {options.bruit:g} écarts-types du bruit")
+        if len(tableau) and not tableau['fiable'].all():
+            print(f"Comparaison indicative : moins de {REPETITIONS_MIN} répétitions dans l'un des fichiers")
+        return 1 if len(regressions) else 0
+
+    modele = ModeleCorpus.depuis_csv(options.modele)
+    rapport = {
+        'format': FORMAT_RESULTATS,
+        'version': VERSION_RESULTATS,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'environnement': environnement(),
+        'parametres': {k: v for k, v in vars(options).items() if k not in ('comparer', 'seuil', 'bruit', 'sortie')},
+        'modele': {'exposant_zipf': modele.exposant_zipf, 'heaps_k': modele.heaps_k,
+                   'heaps_beta': modele.heaps_beta, 'nb_mots': len(modele.mots)},
+        'resultats': {},
+        'dispersions': {},
+    }
+    with tempfile.TemporaryDirectory() as dossier:
+        for nb_docs in options.docs:
+            print(f"--- {nb_docs} documents ---")
+            resultats, dispersions = executer(nb_docs, modele, dossier, options.backends, options.ponderations,
+                                              options.requetes, options.graine, options.mots_par_doc,
+                                              options.repetitions)
+            rapport['resultats'][str(nb_docs)] = resultats
+            rapport['dispersions'][str(nb_docs)] = dispersions
+            for etape, mesures in resultats.items():
+                resume = ', '.join(f'{k}={v:.4g}' for k, v in mesures.items() if isinstance(v, float))
+                print(f"{etape:32s} {resume}")
+
+    if options.sortie:
+        with open(options.sortie, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2)
+        print(f"\nRésultats écrits dans {options.sortie}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())